@@ -0,0 +1,263 @@
+"""Benchmark de carga y latencia de la API.
+
+Siembra un catálogo sintético en SQLite (por defecto) o en la base indicada con
+--db-url, levanta la app en proceso (o usa --url contra un servidor ya corriendo)
+y ejecuta cada escenario con N clientes concurrentes. El resultado es un JSON con
+throughput, latencias p50/p95/p99 y consultas SQL por petición, pensado para
+compararse entre versiones:
+
+    python benchmarks/bench_api.py --productos 20000 --peticiones 2000 --concurrencia 32 --salida bench.json
+    python benchmarks/bench_api.py --comparar bench_anterior.json bench.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ_API = Path(__file__).resolve().parent.parent
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", help="URL SQLAlchemy de una base vacía (por defecto un SQLite temporal)")
+    parser.add_argument("--db-async-url", help="URL del motor async (solo con --async)")
+    parser.add_argument("--async", dest="modo_async", action="store_true", help="Registra los endpoints async (DB_ASYNC=true)")
+    parser.add_argument("--url", help="Servidor ya levantado; no siembra datos ni cuenta consultas")
+    parser.add_argument("--productos", type=int, default=5000, help="Tamaño del catálogo sintético")
+    parser.add_argument("--categorias", type=int, default=20)
+    parser.add_argument("--peticiones", type=int, default=500, help="Peticiones por escenario")
+    parser.add_argument("--concurrencia", type=int, default=16, help="Clientes concurrentes")
+    parser.add_argument("--escenarios", help="Lista separada por comas (por defecto todos)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto stdout)")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DESPUES"), help="Compara dos resultados y termina")
+    return parser.parse_args(argv)
+
+def configurar_entorno(args) -> str | None:
+    # Debe correr antes de importar database.py, que lee las variables al importarse
+    if args.url:
+        return None
+    ruta_sqlite = None
+    if not args.db_url:
+        ruta_sqlite = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+        args.db_url = f"sqlite:///{ruta_sqlite}"
+        if args.modo_async and not args.db_async_url:
+            args.db_async_url = f"sqlite+aiosqlite:///{ruta_sqlite}"
+    os.environ["DB_URL"] = args.db_url
+    os.environ["DB_ASYNC"] = "true" if args.modo_async else "false"
+    if args.db_async_url:
+        os.environ["DB_ASYNC_URL"] = args.db_async_url
+    sys.path.insert(0, str(RAIZ_API))
+    return ruta_sqlite
+
+def sembrar_catalogo(engine, cantidad: int, categorias: int, semilla: int):
+    from sqlalchemy import insert
+    from sqlmodel import SQLModel
+    from models.producto import Producto
+    import models.movimiento_stock  # noqa: F401  registra la tabla para create_all
+
+    # Se espera una base vacía: los escenarios asumen producto_id entre 1 y cantidad
+    SQLModel.metadata.create_all(engine)
+    azar = random.Random(semilla)
+    ahora = datetime.datetime.now()
+    estados = ["activo"] * 8 + ["inactivo", "eliminado"]
+    filas = [
+        {
+            "categoria_id": azar.randint(1, categorias),
+            "sku": f"BENCH-{i:07d}",
+            "nombre": f"Producto sintético {i}",
+            "descripcion": "Descripción de prueba " * azar.randint(1, 10),
+            "precio": azar.randint(500, 150000),
+            "stock": azar.randint(0, 500),
+            "imagen_url": f"https://cdn.example.com/productos/{i}.jpg",
+            "fecha_creacion": ahora,
+            "estado_producto": azar.choice(estados),
+            "fecha_actualizacion": ahora,
+        }
+        for i in range(cantidad)
+    ]
+    with engine.begin() as conexion:
+        for inicio in range(0, cantidad, 1000):
+            conexion.execute(insert(Producto), filas[inicio:inicio + 1000])
+
+class ContadorConsultas:
+    # Cuenta sentencias enviadas al driver en todos los motores de la app
+    def __init__(self, motores):
+        from sqlalchemy import event
+        self.total = 0
+        for motor in motores:
+            event.listen(motor, "before_cursor_execute", self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+def construir_escenarios(args, azar: random.Random):
+    ids = lambda: azar.randint(1, args.productos)
+
+    def fila_bulk(i):
+        return {
+            "categoria_id": azar.randint(1, args.categorias),
+            "sku": f"BENCH-{azar.randint(0, args.productos * 2):07d}",
+            "nombre": f"Producto bulk {i}",
+            "descripcion": None,
+            "precio": azar.randint(500, 150000),
+            "stock": azar.randint(0, 500),
+            "imagen_url": None,
+            "fecha_creacion": datetime.datetime.now().isoformat(),
+            "estado_producto": "activo",
+        }
+
+    return {
+        "listado": lambda: ("GET", "/productos/?limite=50", {}, None),
+        "listado_filtrado": lambda: (
+            "GET", f"/productos/?limite=50&estado_producto=activo&categoria_id={azar.randint(1, args.categorias)}&precio_min=10000", {}, None,
+        ),
+        "listado_campos": lambda: ("GET", "/productos/?limite=200&fields=precio,stock", {}, None),
+        "detalle": lambda: ("GET", f"/productos/{ids()}", {}, None),
+        "detalle_304": lambda: ("GET", f"/productos/{ids()}", {"condicional": True}, None),
+        "exportar_ndjson": lambda: ("GET", "/productos/export?formato=ndjson", {}, None),
+        "ajustes_stock": lambda: ("POST", "/stock/ajustes", {}, {
+            "ajustes": [{"producto_id": ids(), "delta": azar.choice([-1, 1, 2]), "tipo_operacion": "ajuste"} for _ in range(10)],
+            "atomico": False,
+        }),
+        "upsert_bulk": lambda: ("POST", "/productos/bulk", {}, [fila_bulk(i) for i in range(100)]),
+    }
+
+# La exportación recorre la tabla completa: se limita para no dominar el tiempo total
+MAX_PETICIONES_ESCENARIO = {"exportar_ndjson": 20}
+
+def percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    inferior = int(k)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (k - inferior)
+
+async def ejecutar_escenario(cliente, generador, peticiones: int, concurrencia: int, contador):
+    latencias: list[float] = []
+    errores: dict[str, int] = {}
+    etags: dict[str, str] = {}
+    pendientes = iter(range(peticiones))
+
+    async def trabajador():
+        for _ in pendientes:
+            metodo, ruta, opciones, cuerpo = generador()
+            headers = {}
+            if opciones.get("condicional"):
+                if ruta not in etags:
+                    previa = await cliente.get(ruta)
+                    etags[ruta] = previa.headers.get("etag", "")
+                headers["If-None-Match"] = etags[ruta]
+            inicio = time.perf_counter()
+            respuesta = await cliente.request(metodo, ruta, headers=headers, json=cuerpo)
+            await respuesta.aread()
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            if respuesta.status_code >= 400:
+                errores[str(respuesta.status_code)] = errores.get(str(respuesta.status_code), 0) + 1
+
+    consultas_inicio = contador.total if contador else 0
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    duracion = time.perf_counter() - inicio
+    consultas = (contador.total - consultas_inicio) if contador else None
+    return {
+        "peticiones": len(latencias),
+        "concurrencia": concurrencia,
+        "duracion_s": round(duracion, 4),
+        "throughput_rps": round(len(latencias) / duracion, 2) if duracion else 0.0,
+        "latencia_ms": {
+            "p50": round(percentil(latencias, 50), 3),
+            "p95": round(percentil(latencias, 95), 3),
+            "p99": round(percentil(latencias, 99), 3),
+            "max": round(max(latencias, default=0.0), 3),
+            "media": round(statistics.fmean(latencias), 3) if latencias else 0.0,
+        },
+        # Incluye las consultas de precalentamiento de ETags en detalle_304
+        "consultas_por_peticion": round(consultas / len(latencias), 3) if consultas is not None and latencias else None,
+        "errores": errores,
+    }
+
+async def correr(args):
+    import httpx
+
+    azar = random.Random(args.semilla)
+    contador = None
+    if args.url:
+        transporte, base_url = None, args.url
+    else:
+        import database
+        from main import app
+        sembrar_catalogo(database.engine, args.productos, args.categorias, args.semilla)
+        motores = [database.engine] + ([database.async_engine.sync_engine] if database.async_engine else [])
+        contador = ContadorConsultas(motores)
+        transporte, base_url = httpx.ASGITransport(app=app), "http://bench"
+
+    escenarios = construir_escenarios(args, azar)
+    if args.escenarios:
+        escenarios = {nombre: escenarios[nombre] for nombre in args.escenarios.split(",")}
+    resultados = {}
+    limites = httpx.Limits(max_connections=args.concurrencia)
+    async with httpx.AsyncClient(transport=transporte, base_url=base_url, limits=limites, timeout=60) as cliente:
+        for nombre, generador in escenarios.items():
+            peticiones = min(args.peticiones, MAX_PETICIONES_ESCENARIO.get(nombre, args.peticiones))
+            resultados[nombre] = await ejecutar_escenario(cliente, generador, peticiones, args.concurrencia, contador)
+            print(f"{nombre}: {resultados[nombre]['throughput_rps']} rps, p95 {resultados[nombre]['latencia_ms']['p95']} ms", file=sys.stderr)
+    return resultados
+
+def comparar(ruta_antes: str, ruta_despues: str):
+    antes = json.loads(Path(ruta_antes).read_text())["escenarios"]
+    despues = json.loads(Path(ruta_despues).read_text())["escenarios"]
+    print(f"{'escenario':<20}{'rps':>22}{'p95 ms':>24}{'consultas/pet':>18}")
+    for nombre in despues:
+        if nombre not in antes:
+            continue
+        a, d = antes[nombre], despues[nombre]
+        cambio = (d["throughput_rps"] / a["throughput_rps"] - 1) * 100 if a["throughput_rps"] else 0.0
+        print(
+            f"{nombre:<20}{a['throughput_rps']:>9} -> {d['throughput_rps']:>8} ({cambio:+.0f}%)"
+            f"{a['latencia_ms']['p95']:>10} -> {d['latencia_ms']['p95']:>10}"
+            f"{str(a['consultas_por_peticion']):>8} -> {str(d['consultas_por_peticion']):<6}"
+        )
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+    ruta_sqlite = configurar_entorno(args)
+    try:
+        escenarios = asyncio.run(correr(args))
+    finally:
+        if ruta_sqlite:
+            os.unlink(ruta_sqlite)
+    resultado = {
+        "meta": {
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "destino": args.url or ("sqlite" if ruta_sqlite else args.db_url.split(":", 1)[0]),
+            "modo_async": args.modo_async,
+            "productos": args.productos,
+            "peticiones": args.peticiones,
+            "concurrencia": args.concurrencia,
+            "semilla": args.semilla,
+        },
+        "escenarios": escenarios,
+    }
+    salida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salida:
+        Path(args.salida).write_text(salida + "\n", encoding="utf-8")
+    else:
+        print(salida)
+
+if __name__ == "__main__":
+    main()
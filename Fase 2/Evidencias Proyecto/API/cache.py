@@ -0,0 +1,198 @@
+# cache.py
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+    import redis.asyncio as redis_async
+except ImportError:  # el nivel compartido es opcional
+    redis = None
+    redis_async = None
+
+# Cache read-through de productos en dos niveles:
+#  - local: LRU con TTL dentro de cada worker (sin red)
+#  - compartido: Redis opcional (CACHE_REDIS_URL), común a todos los workers
+# Las escrituras de la API invalidan ambos niveles; el nivel local de otros workers
+# se corrige solo al vencer el TTL, por eso CACHE_TTL debe mantenerse corto.
+CACHE_MAX_ITEMS = int(os.getenv("CACHE_MAX_ITEMS", "10000"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+CACHE_REDIS_TTL = int(os.getenv("CACHE_REDIS_TTL", "300"))
+
+
+class CacheLRU:
+    def __init__(self, max_items: int, ttl: float):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._datos: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expiraciones = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.misses += 1
+                return None
+            valor, vence = entrada
+            if vence < time.monotonic():
+                del self._datos[clave]
+                self.expiraciones += 1
+                self.misses += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return valor
+
+    def guardar(self, clave, valor) -> None:
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + self.ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_items:
+                self._datos.popitem(last=False)
+                self.evictions += 1
+
+    def invalidar(self, clave) -> None:
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def estadisticas(self) -> dict:
+        return {
+            "items": len(self._datos),
+            "max_items": self.max_items,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expiraciones": self.expiraciones,
+        }
+
+
+class CacheCompartido:
+    def __init__(self, url: str, ttl: int, prefijo: str):
+        self.ttl = ttl
+        self.prefijo = prefijo
+        self._cliente = redis.Redis.from_url(url)
+        self._cliente_async = redis_async.Redis.from_url(url)
+        self.hits = 0
+        self.misses = 0
+        self.errores = 0
+
+    def _clave(self, clave) -> str:
+        return f"{self.prefijo}:{clave}"
+
+    def _decodificar(self, crudo):
+        if crudo is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(crudo)
+
+    # Un Redis caído no debe botar la API: se registra el error y se sigue contra la BD
+    def obtener(self, clave):
+        try:
+            return self._decodificar(self._cliente.get(self._clave(clave)))
+        except redis.RedisError:
+            self.errores += 1
+            return None
+
+    def guardar(self, clave, valor) -> None:
+        try:
+            self._cliente.set(self._clave(clave), json.dumps(valor), ex=self.ttl)
+        except redis.RedisError:
+            self.errores += 1
+
+    def invalidar(self, clave) -> None:
+        try:
+            self._cliente.delete(self._clave(clave))
+        except redis.RedisError:
+            self.errores += 1
+
+    async def aobtener(self, clave):
+        try:
+            return self._decodificar(await self._cliente_async.get(self._clave(clave)))
+        except redis.RedisError:
+            self.errores += 1
+            return None
+
+    async def aguardar(self, clave, valor) -> None:
+        try:
+            await self._cliente_async.set(self._clave(clave), json.dumps(valor), ex=self.ttl)
+        except redis.RedisError:
+            self.errores += 1
+
+    async def ainvalidar(self, clave) -> None:
+        try:
+            await self._cliente_async.delete(self._clave(clave))
+        except redis.RedisError:
+            self.errores += 1
+
+    def estadisticas(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "errores": self.errores}
+
+
+class CacheDosNiveles:
+    def __init__(self, local: CacheLRU, compartido: CacheCompartido | None = None):
+        self.local = local
+        self.compartido = compartido
+
+    def obtener(self, clave):
+        valor = self.local.obtener(clave)
+        if valor is None and self.compartido is not None:
+            valor = self.compartido.obtener(clave)
+            if valor is not None:
+                self.local.guardar(clave, valor)
+        return valor
+
+    def guardar(self, clave, valor) -> None:
+        self.local.guardar(clave, valor)
+        if self.compartido is not None:
+            self.compartido.guardar(clave, valor)
+
+    def invalidar(self, clave) -> None:
+        self.local.invalidar(clave)
+        if self.compartido is not None:
+            self.compartido.invalidar(clave)
+
+    async def aobtener(self, clave):
+        valor = self.local.obtener(clave)
+        if valor is None and self.compartido is not None:
+            valor = await self.compartido.aobtener(clave)
+            if valor is not None:
+                self.local.guardar(clave, valor)
+        return valor
+
+    async def aguardar(self, clave, valor) -> None:
+        self.local.guardar(clave, valor)
+        if self.compartido is not None:
+            await self.compartido.aguardar(clave, valor)
+
+    async def ainvalidar(self, clave) -> None:
+        self.local.invalidar(clave)
+        if self.compartido is not None:
+            await self.compartido.ainvalidar(clave)
+
+    def estadisticas(self) -> dict:
+        estadisticas = {"local": self.local.estadisticas()}
+        if self.compartido is not None:
+            estadisticas["compartido"] = self.compartido.estadisticas()
+        return estadisticas
+
+
+def crear_cache(prefijo: str) -> CacheDosNiveles:
+    compartido = None
+    if CACHE_REDIS_URL:
+        if redis is None:
+            raise RuntimeError("CACHE_REDIS_URL está definido pero el paquete redis no está instalado")
+        compartido = CacheCompartido(CACHE_REDIS_URL, CACHE_REDIS_TTL, prefijo)
+    return CacheDosNiveles(CacheLRU(CACHE_MAX_ITEMS, CACHE_TTL), compartido)
+
+
+cache_productos = crear_cache("producto")
@@ -1,6 +1,23 @@
+import base64
+import binascii
+import csv
+import datetime
+import hashlib
+import io
+import json
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from typing import NamedTuple
+from itertools import islice
 from fastapi import HTTPException
+from pydantic import ValidationError, create_model
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
 from sqlmodel import Session, select
-from models.producto import Producto, ProductoCrear, ProductoActualizar, ProductoPublico
+from cache import cache_productos
+from models.estado_producto import EstadoProducto
+from models.formato_exportacion import FormatoExportacion
+from models.producto import Producto, ahora, ProductoCrear, ProductoActualizar, ProductoPublico, ProductoPagina, ResultadoBulk, RespuestaBulk
 
 # CRUD de productos
 
@@ -12,16 +29,308 @@ def crear_producto(producto: ProductoCrear, session: Session) -> ProductoPublico
     return db_producto
 
 
-def leer_productos(session: Session) -> list[ProductoPublico]:
-    productos = session.exec(select(Producto)).all()
-    return productos
+def codificar_cursor(producto_id: int) -> str:
+    # El cursor es opaco para el cliente: solo transporta el último producto_id entregado
+    return base64.urlsafe_b64encode(str(producto_id).encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> int:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(cursor + relleno).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+# Columnas que se sobrescriben cuando el SKU ya existe (fecha_creacion se conserva)
+COLUMNAS_UPSERT = ["categoria_id", "nombre", "descripcion", "precio", "stock", "imagen_url", "estado_producto"]
+
+
+def _sentencia_upsert(dialecto: str, valores: list[dict]):
+    tabla = Producto.__table__
+    if dialecto == "mysql":
+        sentencia = mysql.insert(tabla).values(valores)
+        return sentencia.on_duplicate_key_update({c: sentencia.inserted[c] for c in COLUMNAS_UPSERT + ["fecha_actualizacion"]})
+    if dialecto in ("postgresql", "sqlite"):
+        modulo = postgresql if dialecto == "postgresql" else sqlite
+        sentencia = modulo.insert(tabla).values(valores)
+        return sentencia.on_conflict_do_update(
+            index_elements=["sku"],
+            set_={c: sentencia.excluded[c] for c in COLUMNAS_UPSERT + ["fecha_actualizacion"]},
+        )
+    raise HTTPException(status_code=500, detail=f"Upsert no soportado para {dialecto}")
+
+
+class LineaInvalida(NamedTuple):
+    # Línea NDJSON que no se pudo decodificar; se informa como error de su fila sin cortar la carga
+    linea: int
+    mensaje: str
+
+
+def filas_ndjson(cuerpo: bytes) -> Iterator[dict | LineaInvalida]:
+    # Decodifica de forma perezosa; el número de línea es el real del cuerpo (1-based, contando líneas vacías)
+    for numero, linea in enumerate(cuerpo.splitlines(), start=1):
+        if not linea.strip():
+            continue
+        try:
+            yield json.loads(linea)
+        except json.JSONDecodeError as e:
+            yield LineaInvalida(numero, e.msg)
+
+
+def _upsert_lote(lote: list[tuple[int, dict]], session: Session, dialecto: str, respuesta: RespuestaBulk) -> None:
+    validos: dict[str, tuple[int, ProductoCrear]] = {}
+    for indice, fila in lote:
+        if isinstance(fila, LineaInvalida):
+            detalle = f"JSON inválido (línea {fila.linea}): {fila.mensaje}"
+            respuesta.resultados.append(ResultadoBulk(indice=indice, resultado="error", detalle=detalle))
+            continue
+        sku = fila.get("sku") if isinstance(fila, dict) else None
+        # Solo se devuelve un sku de texto: un valor de otro tipo haría fallar el propio ResultadoBulk
+        sku = sku if isinstance(sku, str) else None
+        try:
+            producto = ProductoCrear.model_validate(fila)
+        except ValidationError as e:
+            error = e.errors()[0]
+            detalle = f"{'.'.join(str(parte) for parte in error['loc'])}: {error['msg']}"
+            respuesta.resultados.append(ResultadoBulk(indice=indice, sku=sku, resultado="error", detalle=detalle))
+            continue
+        if not producto.sku:
+            respuesta.resultados.append(ResultadoBulk(indice=indice, resultado="error", detalle="sku requerido"))
+            continue
+        if producto.sku in validos:
+            # Un INSERT multi-fila no puede tocar dos veces la misma fila: gana la última aparición
+            indice_previo, _ = validos[producto.sku]
+            respuesta.resultados.append(ResultadoBulk(indice=indice_previo, sku=producto.sku, resultado="omitido", detalle="sku repetido en el lote"))
+        validos[producto.sku] = (indice, producto)
+
+    if not validos:
+        return
+
+    skus = list(validos)
+    try:
+        existentes = set(session.exec(select(Producto.sku).where(Producto.sku.in_(skus))).all())
+        fecha = ahora()
+        valores = [{**p.model_dump(), "fecha_actualizacion": fecha} for _, p in validos.values()]
+        session.execute(_sentencia_upsert(dialecto, valores))
+        ids = dict(session.exec(select(Producto.sku, Producto.producto_id).where(Producto.sku.in_(skus))).all())
+        session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        detalle = str(e.orig if getattr(e, "orig", None) else e)
+        for sku, (indice, _) in validos.items():
+            respuesta.resultados.append(ResultadoBulk(indice=indice, sku=sku, resultado="error", detalle=detalle))
+        return
+
+    for sku, (indice, _) in validos.items():
+        resultado = "actualizado" if sku in existentes else "creado"
+        if sku in existentes:
+            cache_productos.invalidar(ids[sku])
+        respuesta.resultados.append(ResultadoBulk(indice=indice, sku=sku, producto_id=ids.get(sku), resultado=resultado))
+
+
+def upsert_productos(filas: Iterable[dict | LineaInvalida], session: Session, tamano_lote: int = 500) -> RespuestaBulk:
+    # Cada lote es una transacción: un SELECT de SKUs existentes, un INSERT multi-fila
+    # con ON DUPLICATE KEY UPDATE / ON CONFLICT y un SELECT de ids, en vez de commit+refresh por fila
+    dialecto = session.get_bind().dialect.name
+    respuesta = RespuestaBulk()
+    filas_indexadas = enumerate(filas)
+    while lote := list(islice(filas_indexadas, tamano_lote)):
+        _upsert_lote(lote, session, dialecto, respuesta)
+
+    respuesta.resultados.sort(key=lambda r: r.indice)
+    for r in respuesta.resultados:
+        if r.resultado == "creado":
+            respuesta.creados += 1
+        elif r.resultado == "actualizado":
+            respuesta.actualizados += 1
+        elif r.resultado == "error":
+            respuesta.errores += 1
+    return respuesta
+
+
+def consulta_productos(
+    columnas: list | None = None,
+    cursor: str | None = None,
+    limite: int = 50,
+    categoria_id: int | None = None,
+    estado_producto: EstadoProducto | None = None,
+    precio_min: int | None = None,
+    precio_max: int | None = None,
+    stock_min: int | None = None,
+):
+    # Paginación keyset sobre producto_id: cada página es un rango sobre la PK
+    consulta = select(*columnas) if columnas else select(Producto)
+    if cursor:
+        consulta = consulta.where(Producto.producto_id > decodificar_cursor(cursor))
+    if categoria_id is not None:
+        consulta = consulta.where(Producto.categoria_id == categoria_id)
+    if estado_producto is not None:
+        consulta = consulta.where(Producto.estado_producto == estado_producto)
+    if precio_min is not None:
+        consulta = consulta.where(Producto.precio >= precio_min)
+    if precio_max is not None:
+        consulta = consulta.where(Producto.precio <= precio_max)
+    if stock_min is not None:
+        consulta = consulta.where(Producto.stock >= stock_min)
+
+    # Se pide una fila extra para saber si existe una página siguiente sin hacer COUNT
+    return consulta.order_by(Producto.producto_id).limit(limite + 1)
+
+
+def armar_pagina(productos: list[Producto], limite: int) -> ProductoPagina:
+    next_cursor = None
+    if len(productos) > limite:
+        productos = productos[:limite]
+        next_cursor = codificar_cursor(productos[-1].producto_id)
+    return ProductoPagina(items=productos, next_cursor=next_cursor)
+
+
+def leer_productos(session: Session, limite: int = 50, **filtros) -> tuple[ProductoPagina, str]:
+    productos = session.exec(consulta_productos(limite=limite, **filtros)).all()
+    return armar_pagina(productos, limite), etag_filas(productos, limite=limite, **filtros)
+
+
+# Proyección parcial (?fields=): se seleccionan solo las columnas pedidas y se responde con
+# un modelo reducido, así descripcion/imagen_url no se leen ni se serializan si no se piden
+
+CAMPOS_PRODUCTO = tuple(ProductoPublico.model_fields)
+
+
+def parsear_campos(fields: str | None) -> tuple[str, ...] | None:
+    if not fields:
+        return None
+    pedidos = {campo.strip() for campo in fields.split(",") if campo.strip()}
+    desconocidos = pedidos - set(CAMPOS_PRODUCTO)
+    if desconocidos:
+        raise HTTPException(status_code=422, detail=f"Campos desconocidos: {', '.join(sorted(desconocidos))}")
+    # producto_id siempre se incluye porque el cursor se construye a partir de él
+    pedidos.add("producto_id")
+    return tuple(campo for campo in CAMPOS_PRODUCTO if campo in pedidos)
+
+
+@lru_cache(maxsize=128)
+def modelo_parcial(campos: tuple[str, ...]):
+    return create_model(
+        "ProductoParcial",
+        **{campo: (ProductoPublico.model_fields[campo].annotation, ...) for campo in campos},
+    )
+
+
+@lru_cache(maxsize=128)
+def modelo_pagina_parcial(campos: tuple[str, ...]):
+    return create_model(
+        "ProductoPaginaParcial",
+        items=(list[modelo_parcial(campos)], ...),
+        next_cursor=(str | None, None),
+    )
+
+
+def consulta_productos_parcial(campos: tuple[str, ...], **filtros):
+    # fecha_actualizacion no es un campo público, pero se lee para calcular el ETag de la página
+    columnas = [getattr(Producto, campo) for campo in campos] + [Producto.fecha_actualizacion]
+    return consulta_productos(columnas=columnas, **filtros)
+
+
+def armar_pagina_parcial(filas, campos: tuple[str, ...], limite: int):
+    # Las filas vienen de la BD con los tipos ya correctos: model_construct evita revalidarlas
+    modelo = modelo_parcial(campos)
+    next_cursor = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        next_cursor = codificar_cursor(filas[-1].producto_id)
+    items = [modelo.model_construct(**{campo: fila._mapping[campo] for campo in campos}) for fila in filas]
+    return modelo_pagina_parcial(campos).model_construct(items=items, next_cursor=next_cursor)
+
+
+def leer_productos_parcial(session: Session, campos: tuple[str, ...], limite: int = 50, **filtros):
+    filas = session.execute(consulta_productos_parcial(campos, limite=limite, **filtros)).all()
+    return armar_pagina_parcial(filas, campos, limite), etag_filas(filas, limite=limite, **filtros)
+
+
+def proyectar_producto(producto: ProductoPublico, campos: tuple[str, ...]):
+    return modelo_parcial(campos).model_construct(**{campo: getattr(producto, campo) for campo in campos})
+
+
+def calcular_etag(*partes) -> str:
+    return '"' + hashlib.sha1(repr(partes).encode()).hexdigest() + '"'
+
+
+def consulta_etag_productos(**filtros):
+    # Validador de la colección: solo (producto_id, fecha_actualizacion) de las filas de la página,
+    # sin leer ni serializar descripcion, imagen_url, etc.
+    return consulta_productos(columnas=[Producto.producto_id, Producto.fecha_actualizacion], **filtros)
+
+
+def etag_filas(filas, **filtros) -> str:
+    # Mismo validador tanto desde la consulta angosta como desde las filas de la página ya leídas
+    # (incluida la fila extra), así el 200 no paga una segunda consulta solo para el ETag
+    return calcular_etag(sorted(filtros.items()), [(fila.producto_id, fila.fecha_actualizacion) for fila in filas])
+
+
+def etag_productos(session: Session, **filtros) -> str:
+    # Solo se usa cuando el cliente envía If-None-Match: un acierto responde 304 sin leer la página
+    filas = session.exec(consulta_etag_productos(**filtros)).all()
+    return etag_filas(filas, **filtros)
+
+
+COLUMNAS_EXPORTACION = [columna.name for columna in Producto.__table__.columns]
+
+
+def _serializar_valor(valor):
+    if isinstance(valor, (datetime.datetime, datetime.date)):
+        return valor.isoformat()
+    if isinstance(valor, EstadoProducto):
+        return valor.value
+    return valor
+
+
+def exportar_productos(session: Session, formato: FormatoExportacion, tamano_lote: int = 1000) -> Iterator[str]:
+    # Cursor del lado del servidor: las filas llegan en lotes de tamano_lote y nunca se
+    # materializa la tabla completa ni se construyen objetos ORM/Pydantic por fila
+    consulta = select(*Producto.__table__.columns).order_by(Producto.producto_id)
+    resultado = session.execute(consulta.execution_options(stream_results=True, yield_per=tamano_lote))
+
+    if formato == FormatoExportacion.csv:
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(COLUMNAS_EXPORTACION)
+        yield buffer.getvalue()
+        for lote in resultado.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            escritor.writerows([_serializar_valor(valor) for valor in fila] for fila in lote)
+            yield buffer.getvalue()
+    else:
+        for lote in resultado.partitions():
+            yield "".join(
+                json.dumps({columna: _serializar_valor(valor) for columna, valor in zip(COLUMNAS_EXPORTACION, fila)}, ensure_ascii=False) + "\n"
+                for fila in lote
+            )
+
+
+def entrada_cache(producto: Producto) -> dict:
+    # Se guarda en JSON para que la misma entrada sirva en el nivel local y en Redis
+    return {
+        "producto": ProductoPublico.model_validate(producto).model_dump(mode="json"),
+        "etag": calcular_etag(producto.producto_id, producto.fecha_actualizacion),
+    }
+
+
+def leer_producto_con_etag(producto_id: int, session: Session) -> tuple[ProductoPublico, str]:
+    # Read-through: solo se consulta la BD si el producto no está en ninguno de los niveles de cache
+    entrada = cache_productos.obtener(producto_id)
+    if entrada is None:
+        producto = session.get(Producto, producto_id)
+        if not producto:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+        entrada = entrada_cache(producto)
+        cache_productos.guardar(producto_id, entrada)
+    return ProductoPublico.model_validate(entrada["producto"]), entrada["etag"]
 
 
 def leer_producto(producto_id: int, session: Session) -> ProductoPublico:
-    producto = session.get(Producto, producto_id)
-    if not producto:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-    return producto
+    return leer_producto_con_etag(producto_id, session)[0]
 
 
 def actualizar_producto(producto_id: int, producto: ProductoActualizar, session: Session) -> ProductoPublico:
@@ -32,6 +341,7 @@ def actualizar_producto(producto_id: int, producto: ProductoActualizar, session:
     producto_db.sqlmodel_update(producto_data)
     session.add(producto_db)
     session.commit()
+    cache_productos.invalidar(producto_id)
     session.refresh(producto_db)
     return producto_db
 
@@ -42,4 +352,5 @@ def eliminar_producto(producto_id: int, session: Session) -> dict:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     session.delete(producto)
     session.commit()
+    cache_productos.invalidar(producto_id)
     return {"ok": True}
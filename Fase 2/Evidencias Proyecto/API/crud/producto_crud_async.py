@@ -0,0 +1,67 @@
+from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.producto import Producto, ProductoCrear, ProductoActualizar, ProductoPublico, ProductoPagina
+from cache import cache_productos
+from crud.producto_crud import consulta_productos, armar_pagina, consulta_etag_productos, etag_filas, entrada_cache, consulta_productos_parcial, armar_pagina_parcial
+
+# CRUD de productos (modo async): misma lógica que producto_crud.py sobre AsyncSession
+
+async def crear_producto(producto: ProductoCrear, session: AsyncSession) -> ProductoPublico:
+    db_producto = Producto.model_validate(producto)
+    session.add(db_producto)
+    await session.commit()
+    await session.refresh(db_producto)
+    return db_producto
+
+
+async def leer_productos(session: AsyncSession, limite: int = 50, **filtros) -> tuple[ProductoPagina, str]:
+    productos = (await session.exec(consulta_productos(limite=limite, **filtros))).all()
+    return armar_pagina(productos, limite), etag_filas(productos, limite=limite, **filtros)
+
+
+async def leer_productos_parcial(session: AsyncSession, campos: tuple[str, ...], limite: int = 50, **filtros):
+    filas = (await session.execute(consulta_productos_parcial(campos, limite=limite, **filtros))).all()
+    return armar_pagina_parcial(filas, campos, limite), etag_filas(filas, limite=limite, **filtros)
+
+
+async def leer_producto_con_etag(producto_id: int, session: AsyncSession) -> tuple[ProductoPublico, str]:
+    entrada = await cache_productos.aobtener(producto_id)
+    if entrada is None:
+        producto = await session.get(Producto, producto_id)
+        if not producto:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+        entrada = entrada_cache(producto)
+        await cache_productos.aguardar(producto_id, entrada)
+    return ProductoPublico.model_validate(entrada["producto"]), entrada["etag"]
+
+
+async def leer_producto(producto_id: int, session: AsyncSession) -> ProductoPublico:
+    return (await leer_producto_con_etag(producto_id, session))[0]
+
+
+async def actualizar_producto(producto_id: int, producto: ProductoActualizar, session: AsyncSession) -> ProductoPublico:
+    producto_db = await session.get(Producto, producto_id)
+    if not producto_db:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    producto_data = producto.model_dump(exclude_unset=True)
+    producto_db.sqlmodel_update(producto_data)
+    session.add(producto_db)
+    await session.commit()
+    await cache_productos.ainvalidar(producto_id)
+    await session.refresh(producto_db)
+    return producto_db
+
+
+async def eliminar_producto(producto_id: int, session: AsyncSession) -> dict:
+    producto = await session.get(Producto, producto_id)
+    if not producto:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    await session.delete(producto)
+    await session.commit()
+    await cache_productos.ainvalidar(producto_id)
+    return {"ok": True}
+
+
+async def etag_productos(session: AsyncSession, **filtros) -> str:
+    filas = (await session.exec(consulta_etag_productos(**filtros))).all()
+    return etag_filas(filas, **filtros)
@@ -0,0 +1,65 @@
+from sqlalchemy import insert, update
+from sqlmodel import Session
+from cache import cache_productos
+from models.movimiento_stock import MovimientoStock, SolicitudAjustes, ResultadoAjuste, RespuestaAjustes
+from models.producto import Producto, ahora
+
+# Ajustes de stock
+
+def aplicar_ajustes(solicitud: SolicitudAjustes, session: Session) -> RespuestaAjustes:
+    # Cada ajuste es un UPDATE condicional (stock = stock + delta solo si no queda negativo), así
+    # dos ajustes concurrentes nunca se pisan como en un leer-modificar-escribir. Se aplican ordenados
+    # por producto_id (orden estable) para que transacciones concurrentes tomen los locks en el mismo
+    # orden y no haya deadlocks. Todo el lote, incluidos los movimiento_stock, es una sola transacción.
+    respuesta = RespuestaAjustes()
+    fecha = ahora()
+    movimientos = []
+    orden = sorted(enumerate(solicitud.ajustes), key=lambda par: par[1].producto_id)
+
+    try:
+        for indice, ajuste in orden:
+            if ajuste.delta == 0:
+                respuesta.resultados.append(ResultadoAjuste(indice=indice, producto_id=ajuste.producto_id, delta=0, aplicado=False, detalle="delta no puede ser 0"))
+                continue
+            resultado = session.execute(
+                update(Producto)
+                .where(Producto.producto_id == ajuste.producto_id, Producto.stock + ajuste.delta >= 0)
+                .values(stock=Producto.stock + ajuste.delta, fecha_actualizacion=fecha)
+                .execution_options(synchronize_session=False)
+            )
+            if resultado.rowcount == 1:
+                respuesta.resultados.append(ResultadoAjuste(indice=indice, producto_id=ajuste.producto_id, delta=ajuste.delta, aplicado=True))
+                movimientos.append({
+                    "producto_id": ajuste.producto_id,
+                    "cantidad": ajuste.delta,
+                    "fecha_movimiento": fecha,
+                    "tipo_operacion": ajuste.tipo_operacion,
+                })
+            else:
+                respuesta.resultados.append(ResultadoAjuste(indice=indice, producto_id=ajuste.producto_id, delta=ajuste.delta, aplicado=False, detalle="Producto inexistente o stock insuficiente"))
+
+        rechazados = len(respuesta.resultados) - len(movimientos)
+        if solicitud.atomico and rechazados:
+            session.rollback()
+            respuesta.revertido = True
+            for r in respuesta.resultados:
+                if r.aplicado:
+                    r.aplicado = False
+                    r.detalle = "Lote revertido"
+        else:
+            if movimientos:
+                # Un solo INSERT multi-fila para todo el journal del lote
+                session.execute(insert(MovimientoStock), movimientos)
+            session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    if not respuesta.revertido:
+        for producto_id in {m["producto_id"] for m in movimientos}:
+            cache_productos.invalidar(producto_id)
+
+    respuesta.resultados.sort(key=lambda r: r.indice)
+    respuesta.aplicados = sum(r.aplicado for r in respuesta.resultados)
+    respuesta.rechazados = len(respuesta.resultados) - respuesta.aplicados
+    return respuesta
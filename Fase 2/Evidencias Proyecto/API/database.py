@@ -1,17 +1,153 @@
 # database.py
-from sqlmodel import create_engine
-from dotenv import load_dotenv
 import os
+import ssl
+import threading
+import time
+from dotenv import load_dotenv
+from sqlalchemy.engine import URL
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlmodel import create_engine
 
 load_dotenv()
 
-mysql_url = f"mysql+pymysql://{os.getenv("DB_USER")}:{os.getenv("DB_PASSWORD")}@{os.getenv("DB_HOST")}:{os.getenv("DB_PORT")}/{os.getenv("DB_NAME")}"
+
+def env_bool(nombre: str, defecto: bool) -> bool:
+    return os.getenv(nombre, str(defecto)).lower() in ("1", "true", "si")
+
+
+# DB_ASYNC=true habilita el motor async y los endpoints async def (ver routers/productos_async.py)
+DB_ASYNC = env_bool("DB_ASYNC", False)
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "aiomysql")
+
+# Perfil del pool. El log de SQL queda apagado por defecto: echo=True escribe cada sentencia
+# de forma síncrona dentro de la request. DB_POOL_SIZE + DB_MAX_OVERFLOW es el máximo de
+# conexiones por worker (y por motor), así que debe multiplicarse por la cantidad de workers
+# para compararlo con el límite de conexiones de la base de datos.
+DB_ECHO = env_bool("DB_ECHO", False)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", True)
+
+
+class EstadisticasPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.solicitudes = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+
+    def registrar(self, espera: float, timeout: bool = False) -> None:
+        with self._lock:
+            self.solicitudes += 1
+            self.timeouts += timeout
+            self.espera_total += espera
+            self.espera_max = max(self.espera_max, espera)
+
+
+class PoolMedidoMixin:
+    # Mide cuánto espera cada checkout por una conexión libre del pool
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estadisticas = EstadisticasPool()
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super().connect()
+        except PoolTimeoutError:
+            self.estadisticas.registrar(time.perf_counter() - inicio, timeout=True)
+            raise
+        self.estadisticas.registrar(time.perf_counter() - inicio)
+        return conexion
+
+
+class QueuePoolMedido(PoolMedidoMixin, QueuePool):
+    pass
+
+
+class AsyncQueuePoolMedido(PoolMedidoMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def crear_url(drivername: str) -> URL:
+    return URL.create(
+        drivername,
+        username=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        host=os.getenv("DB_HOST"),
+        port=int(os.getenv("DB_PORT")) if os.getenv("DB_PORT") else None,
+        database=os.getenv("DB_NAME"),
+    )
+
+
+def opciones_pool() -> dict:
+    return {
+        "echo": DB_ECHO,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+mysql_url = crear_url("mysql+pymysql")
+
+# DB_URL / DB_ASYNC_URL reemplazan la conexión MySQL con SSL por una URL completa
+# (por ejemplo sqlite:///bench.db o postgresql+psycopg://...), usado por benchmarks/
+DB_URL = os.getenv("DB_URL")
+DB_ASYNC_URL = os.getenv("DB_ASYNC_URL")
+
+def connect_args_url(url: str) -> dict:
+    # SQLite rechaza por defecto conexiones usadas desde otro hilo (threadpool de FastAPI)
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
 
 engine = create_engine(
-    mysql_url, 
-    connect_args={
+    DB_URL or mysql_url,
+    connect_args=connect_args_url(DB_URL) if DB_URL else {
         "ssl": {
             "ca": os.getenv("SSL_CERT_PATH")
         }
-    }, echo=True
+    },
+    poolclass=QueuePoolMedido,
+    **opciones_pool(),
 )
+
+async_engine = None
+if DB_ASYNC:
+    if DB_ASYNC_URL:
+        url_async, connect_args_async = DB_ASYNC_URL, {}
+    else:
+        # Los drivers async (aiomysql, asyncmy, asyncpg) reciben un SSLContext en vez de un dict
+        contexto_ssl = ssl.create_default_context(cafile=os.getenv("SSL_CERT_PATH"))
+        dialecto = "postgresql" if DB_ASYNC_DRIVER == "asyncpg" else "mysql"
+        url_async = crear_url(f"{dialecto}+{DB_ASYNC_DRIVER}")
+        connect_args_async = {"ssl": contexto_ssl}
+    async_engine = create_async_engine(
+        url_async,
+        connect_args=connect_args_async,
+        poolclass=AsyncQueuePoolMedido,
+        **opciones_pool(),
+    )
+
+
+def estado_pool(motor) -> dict:
+    pool = motor.pool
+    estadisticas = pool.estadisticas
+    return {
+        "tamano": pool.size(),
+        "disponibles": pool.checkedin(),
+        "en_uso": pool.checkedout(),
+        # overflow() es negativo mientras el pool base no está lleno
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "solicitudes": estadisticas.solicitudes,
+        "timeouts": estadisticas.timeouts,
+        "espera_promedio_ms": round(1000 * estadisticas.espera_total / estadisticas.solicitudes, 3) if estadisticas.solicitudes else 0.0,
+        "espera_max_ms": round(1000 * estadisticas.espera_max, 3),
+    }
@@ -0,0 +1,18 @@
+from typing import Annotated
+from fastapi import Depends
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import engine, async_engine
+
+def get_session():
+    with Session(engine) as session:
+        yield session
+
+async def get_async_session():
+    # expire_on_commit=False evita cargas implícitas (no permitidas en async) al serializar
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+SessionDep = Annotated[Session, Depends(get_session)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
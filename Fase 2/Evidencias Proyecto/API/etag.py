@@ -0,0 +1,28 @@
+from fastapi import Request, Response
+
+# Soporte de GET condicional: el cliente reenvía el ETag en If-None-Match y, si no cambió,
+# se responde 304 sin leer ni serializar el cuerpo del producto.
+
+def coincide_etag(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidatos = [candidato.strip().removeprefix("W/") for candidato in if_none_match.split(",")]
+    return etag in candidatos
+
+def no_modificado(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+def agregar_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+def respuesta_json(modelo, etag: str) -> Response:
+    # Para modelos dinámicos (proyecciones ?fields=) se serializa directo con pydantic-core
+    return Response(
+        content=modelo.model_dump_json(),
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
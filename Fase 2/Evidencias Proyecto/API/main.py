@@ -1,35 +1,60 @@
-from fastapi import Depends, FastAPI
-from sqlmodel import Session
+import json
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from typing import Annotated
 
-from models.producto import ProductoCrear, ProductoActualizar, ProductoPublico
-from crud.producto_crud import crear_producto, leer_productos, leer_producto, actualizar_producto, eliminar_producto
-from database import engine
+from models.formato_exportacion import FormatoExportacion
+from models.producto import RespuestaBulk
+from crud.producto_crud import exportar_productos, filas_ndjson, upsert_productos
+from database import DB_ASYNC
+from dependencies import SessionDep
+from routers import metricas, productos, productos_async, stock
 
 app = FastAPI()
 
-def get_session():
-    with Session(engine) as session:
-        yield session
-
-SessionDep = Annotated[Session, Depends(get_session)]
-
-@app.post("/productos/", response_model=ProductoPublico)
-def crear_producto_endpoint(producto: ProductoCrear, session: SessionDep):
-    return crear_producto(producto, session)
-
-@app.get("/productos/", response_model=list[ProductoPublico])
-def leer_productos_endpoint(session: SessionDep):
-    return leer_productos(session)
-
-@app.get("/productos/{producto_id}", response_model=ProductoPublico)
-def leer_producto_endpoint(producto_id: int, session: SessionDep):
-    return leer_producto(producto_id, session)
-
-@app.patch("/productos/{producto_id}", response_model=ProductoPublico)
-def actualizar_producto_endpoint(producto_id: int, producto: ProductoActualizar, session: SessionDep):
-    return actualizar_producto(producto_id, producto, session)
-
-@app.delete("/productos/{producto_id}")
-def eliminar_producto_endpoint(producto_id: int, session: SessionDep):
-    return eliminar_producto(producto_id, session)
+def leer_filas_bulk(cuerpo: bytes, content_type: str):
+    # Acepta un arreglo JSON o NDJSON (un producto por línea). Un arreglo inválido se rechaza
+    # entero antes de escribir; en NDJSON cada línea inválida queda como error de su propia fila
+    if "ndjson" in content_type:
+        return filas_ndjson(cuerpo)
+    filas = json.loads(cuerpo)
+    if not isinstance(filas, list):
+        raise HTTPException(status_code=422, detail="Se esperaba un arreglo JSON de productos")
+    return filas
+
+@app.post("/productos/bulk", response_model=RespuestaBulk)
+async def upsert_productos_endpoint(
+    request: Request,
+    session: SessionDep,
+    tamano_lote: Annotated[int, Query(ge=1, le=5000)] = 500,
+):
+    cuerpo = await request.body()
+    try:
+        filas = leer_filas_bulk(cuerpo, request.headers.get("content-type", ""))
+        return await run_in_threadpool(upsert_productos, filas, session, tamano_lote)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"JSON inválido: {e.msg} (línea {e.lineno})")
+
+MEDIA_TYPES_EXPORTACION = {
+    FormatoExportacion.ndjson: "application/x-ndjson",
+    FormatoExportacion.csv: "text/csv; charset=utf-8",
+}
+
+# Debe declararse antes de /productos/{producto_id} para que "export" no se interprete como id
+@app.get("/productos/export")
+def exportar_productos_endpoint(
+    session: SessionDep,
+    formato: FormatoExportacion = FormatoExportacion.ndjson,
+    tamano_lote: Annotated[int, Query(ge=100, le=10000)] = 1000,
+):
+    return StreamingResponse(
+        exportar_productos(session, formato, tamano_lote),
+        media_type=MEDIA_TYPES_EXPORTACION[formato],
+        headers={"Content-Disposition": f'attachment; filename="productos.{formato.value}"'},
+    )
+
+# CRUD de productos: sync (threadpool + PyMySQL) o async según DB_ASYNC
+app.include_router(productos_async.router if DB_ASYNC else productos.router)
+app.include_router(stock.router)
+app.include_router(metricas.router)
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class FormatoExportacion(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
@@ -0,0 +1,34 @@
+import datetime
+from sqlmodel import Field, SQLModel
+from .tipo_operacion import TipoOperacion
+
+class MovimientoStock(SQLModel, table=True):
+    __tablename__ = "movimiento_stock"
+
+    movimiento_stock_id: int | None = Field(default=None, primary_key=True)
+    producto_id: int = Field(foreign_key="producto.producto_id")
+    cantidad: int
+    fecha_movimiento: datetime.datetime
+    tipo_operacion: TipoOperacion
+
+class AjusteStock(SQLModel):
+    producto_id: int
+    delta: int = Field(description="Unidades a sumar (positivo) o descontar (negativo); no puede ser 0")
+    tipo_operacion: TipoOperacion
+
+class SolicitudAjustes(SQLModel):
+    ajustes: list[AjusteStock] = Field(min_length=1, max_length=5000)
+    atomico: bool = True
+
+class ResultadoAjuste(SQLModel):
+    indice: int
+    producto_id: int
+    delta: int
+    aplicado: bool
+    detalle: str | None = None
+
+class RespuestaAjustes(SQLModel):
+    aplicados: int = 0
+    rechazados: int = 0
+    revertido: bool = False
+    resultados: list[ResultadoAjuste] = []
@@ -13,8 +13,14 @@ class ProductoBase(SQLModel):
     fecha_creacion: datetime.datetime
     estado_producto: EstadoProducto
 
+def ahora() -> datetime.datetime:
+    return datetime.datetime.now()
+
 class Producto(ProductoBase, table=True):
     producto_id: int | None = Field(default=None, primary_key=True)
+    sku: str | None = Field(unique=True)
+    # Validador para ETags: la BD lo mantiene con ON UPDATE CURRENT_TIMESTAMP(6) y el ORM con onupdate
+    fecha_actualizacion: datetime.datetime | None = Field(default_factory=ahora, sa_column_kwargs={"onupdate": ahora})
 
 class ProductoPublico(ProductoBase):
     producto_id: int
@@ -32,3 +38,31 @@ class ProductoActualizar(ProductoBase):
     imagen_url: str | None = None
     fecha_creacion: datetime.datetime | None = None
     estado_producto: EstadoProducto | None = None
+
+class FiltrosProducto(SQLModel):
+    cursor: str | None = None
+    limite: int = Field(default=50, ge=1, le=500)
+    categoria_id: int | None = None
+    estado_producto: EstadoProducto | None = None
+    precio_min: int | None = Field(default=None, ge=0)
+    precio_max: int | None = Field(default=None, ge=0)
+    stock_min: int | None = Field(default=None, ge=0)
+    # Proyección de columnas (?fields=precio,stock); no filtra filas
+    fields: str | None = None
+
+class ProductoPagina(SQLModel):
+    items: list[ProductoPublico]
+    next_cursor: str | None = None
+
+class ResultadoBulk(SQLModel):
+    indice: int
+    sku: str | None = None
+    producto_id: int | None = None
+    resultado: str
+    detalle: str | None = None
+
+class RespuestaBulk(SQLModel):
+    creados: int = 0
+    actualizados: int = 0
+    errores: int = 0
+    resultados: list[ResultadoBulk] = []
@@ -0,0 +1,8 @@
+from enum import Enum
+
+class TipoOperacion(str, Enum):
+    venta = "venta"
+    ingreso = "ingreso"
+    ajuste = "ajuste"
+    devolucion = "devolucion"
+    merma = "merma"
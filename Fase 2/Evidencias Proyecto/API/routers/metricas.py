@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+
+from cache import cache_productos
+from database import engine, async_engine, estado_pool
+
+router = APIRouter()
+
+@router.get("/metrics")
+def metricas_endpoint():
+    metricas = {"pool": {"sync": estado_pool(engine)}}
+    if async_engine is not None:
+        metricas["pool"]["async"] = estado_pool(async_engine.sync_engine)
+    metricas["cache"] = {"productos": cache_productos.estadisticas()}
+    return metricas
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Query, Request, Response
+from typing import Annotated
+
+from models.producto import ProductoCrear, ProductoActualizar, ProductoPublico, ProductoPagina, FiltrosProducto
+from crud.producto_crud import crear_producto, leer_productos, leer_productos_parcial, actualizar_producto, eliminar_producto, leer_producto_con_etag, etag_productos, calcular_etag, parsear_campos, proyectar_producto
+from dependencies import SessionDep
+from etag import agregar_etag, coincide_etag, no_modificado, respuesta_json
+
+router = APIRouter()
+
+@router.post("/productos/", response_model=ProductoPublico)
+def crear_producto_endpoint(producto: ProductoCrear, session: SessionDep):
+    return crear_producto(producto, session)
+
+@router.get("/productos/", response_model=ProductoPagina)
+def leer_productos_endpoint(
+    filtros: Annotated[FiltrosProducto, Query()],
+    request: Request,
+    response: Response,
+    session: SessionDep,
+):
+    campos = parsear_campos(filtros.fields)
+    parametros = filtros.model_dump(exclude={"fields"})
+    # La consulta angosta del ETag solo se paga si hay un validador que comparar;
+    # en un 200 el ETag sale de las mismas filas de la página
+    if request.headers.get("if-none-match"):
+        etag = calcular_etag(etag_productos(session, **parametros), campos)
+        if coincide_etag(request, etag):
+            return no_modificado(etag)
+    if campos:
+        pagina, etag = leer_productos_parcial(session, campos, **parametros)
+        return respuesta_json(pagina, calcular_etag(etag, campos))
+    pagina, etag = leer_productos(session, **parametros)
+    agregar_etag(response, calcular_etag(etag, campos))
+    return pagina
+
+@router.get("/productos/{producto_id}", response_model=ProductoPublico)
+def leer_producto_endpoint(producto_id: int, request: Request, response: Response, session: SessionDep, fields: str | None = None):
+    campos = parsear_campos(fields)
+    producto, etag = leer_producto_con_etag(producto_id, session)
+    etag = calcular_etag(etag, campos)
+    if coincide_etag(request, etag):
+        return no_modificado(etag)
+    if campos:
+        return respuesta_json(proyectar_producto(producto, campos), etag)
+    agregar_etag(response, etag)
+    return producto
+
+@router.patch("/productos/{producto_id}", response_model=ProductoPublico)
+def actualizar_producto_endpoint(producto_id: int, producto: ProductoActualizar, session: SessionDep):
+    return actualizar_producto(producto_id, producto, session)
+
+@router.delete("/productos/{producto_id}")
+def eliminar_producto_endpoint(producto_id: int, session: SessionDep):
+    return eliminar_producto(producto_id, session)
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Query, Request, Response
+from typing import Annotated
+
+from models.producto import ProductoCrear, ProductoActualizar, ProductoPublico, ProductoPagina, FiltrosProducto
+from crud.producto_crud_async import crear_producto, leer_productos, leer_productos_parcial, actualizar_producto, eliminar_producto, leer_producto_con_etag, etag_productos
+from crud.producto_crud import calcular_etag, parsear_campos, proyectar_producto
+from dependencies import AsyncSessionDep
+from etag import agregar_etag, coincide_etag, no_modificado, respuesta_json
+
+# Mismos endpoints que routers/productos.py, pero sin pasar por el threadpool de Starlette
+
+router = APIRouter()
+
+@router.post("/productos/", response_model=ProductoPublico)
+async def crear_producto_endpoint(producto: ProductoCrear, session: AsyncSessionDep):
+    return await crear_producto(producto, session)
+
+@router.get("/productos/", response_model=ProductoPagina)
+async def leer_productos_endpoint(
+    filtros: Annotated[FiltrosProducto, Query()],
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
+):
+    campos = parsear_campos(filtros.fields)
+    parametros = filtros.model_dump(exclude={"fields"})
+    # La consulta angosta del ETag solo se paga si hay un validador que comparar;
+    # en un 200 el ETag sale de las mismas filas de la página
+    if request.headers.get("if-none-match"):
+        etag = calcular_etag(await etag_productos(session, **parametros), campos)
+        if coincide_etag(request, etag):
+            return no_modificado(etag)
+    if campos:
+        pagina, etag = await leer_productos_parcial(session, campos, **parametros)
+        return respuesta_json(pagina, calcular_etag(etag, campos))
+    pagina, etag = await leer_productos(session, **parametros)
+    agregar_etag(response, calcular_etag(etag, campos))
+    return pagina
+
+@router.get("/productos/{producto_id}", response_model=ProductoPublico)
+async def leer_producto_endpoint(producto_id: int, request: Request, response: Response, session: AsyncSessionDep, fields: str | None = None):
+    campos = parsear_campos(fields)
+    producto, etag = await leer_producto_con_etag(producto_id, session)
+    etag = calcular_etag(etag, campos)
+    if coincide_etag(request, etag):
+        return no_modificado(etag)
+    if campos:
+        return respuesta_json(proyectar_producto(producto, campos), etag)
+    agregar_etag(response, etag)
+    return producto
+
+@router.patch("/productos/{producto_id}", response_model=ProductoPublico)
+async def actualizar_producto_endpoint(producto_id: int, producto: ProductoActualizar, session: AsyncSessionDep):
+    return await actualizar_producto(producto_id, producto, session)
+
+@router.delete("/productos/{producto_id}")
+async def eliminar_producto_endpoint(producto_id: int, session: AsyncSessionDep):
+    return await eliminar_producto(producto_id, session)
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Response
+
+from models.movimiento_stock import SolicitudAjustes, RespuestaAjustes
+from crud.stock_crud import aplicar_ajustes
+from dependencies import SessionDep
+
+router = APIRouter()
+
+@router.post("/stock/ajustes", response_model=RespuestaAjustes)
+def aplicar_ajustes_endpoint(solicitud: SolicitudAjustes, response: Response, session: SessionDep):
+    respuesta = aplicar_ajustes(solicitud, session)
+    if respuesta.revertido:
+        response.status_code = 409
+    return respuesta
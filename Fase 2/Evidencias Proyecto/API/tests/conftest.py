@@ -0,0 +1,62 @@
+import datetime
+import itertools
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# database.py lee DB_URL al importarse: las pruebas usan un SQLite temporal en vez de MySQL
+RAIZ_API = Path(__file__).resolve().parent.parent
+os.environ["DB_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'pruebas.db'}"
+os.environ["DB_ASYNC"] = "false"
+sys.path.insert(0, str(RAIZ_API))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlmodel import Session, SQLModel  # noqa: E402
+
+import models.movimiento_stock  # noqa: E402,F401  registra la tabla para create_all
+from cache import CACHE_MAX_ITEMS, CACHE_TTL, CacheLRU, cache_productos  # noqa: E402
+from database import engine  # noqa: E402
+from main import app  # noqa: E402
+from models.producto import Producto  # noqa: E402
+
+
+@pytest.fixture
+def session(monkeypatch):
+    # drop_all reinicia los ids: cada prueba parte con el cache de productos vacío
+    monkeypatch.setattr(cache_productos, "local", CacheLRU(CACHE_MAX_ITEMS, CACHE_TTL))
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    SQLModel.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def client(session):
+    return TestClient(app)
+
+
+@pytest.fixture
+def crear_producto(session):
+    numeros = itertools.count(1)
+
+    def crear(stock: int, sku: str | None = None, **campos) -> Producto:
+        producto = Producto(**{
+            "categoria_id": 1,
+            "sku": sku or f"PRUEBA-{next(numeros):04d}",
+            "nombre": "Producto de prueba",
+            "descripcion": None,
+            "precio": 1000,
+            "stock": stock,
+            "imagen_url": None,
+            "fecha_creacion": datetime.datetime.now(),
+            "estado_producto": "activo",
+            **campos,
+        })
+        session.add(producto)
+        session.commit()
+        session.refresh(producto)
+        return producto
+    return crear
@@ -0,0 +1,68 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import engine
+from dependencies import get_async_session
+from routers import productos_async
+
+# El router async se monta sobre el mismo SQLite de las pruebas con aiosqlite; sin el driver se omite
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def cliente_async(session):
+    motor = create_async_engine(f"sqlite+aiosqlite:///{engine.url.database}")
+
+    async def sesion_async():
+        async with AsyncSession(motor, expire_on_commit=False) as sesion:
+            yield sesion
+
+    app = FastAPI()
+    app.include_router(productos_async.router)
+    app.dependency_overrides[get_async_session] = sesion_async
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+def test_listado_async_pagina_igual_que_el_sync(client, cliente_async, crear_producto):
+    for i in range(5):
+        crear_producto(stock=i)
+
+    for parametros in ({"limite": 2}, {"limite": 2, "stock_min": 2}, {"limite": 2, "fields": "stock"}):
+        sync = client.get("/productos/", params=parametros)
+        asincrono = cliente_async.get("/productos/", params=parametros)
+        assert asincrono.status_code == 200
+        assert asincrono.json() == sync.json()
+        assert asincrono.headers["etag"] == sync.headers["etag"]
+
+        siguiente = {**parametros, "cursor": sync.json()["next_cursor"]}
+        assert cliente_async.get("/productos/", params=siguiente).json() == client.get("/productos/", params=siguiente).json()
+
+
+def test_crud_async_crea_actualiza_y_elimina(cliente_async):
+    creado = cliente_async.post("/productos/", json={
+        "categoria_id": 1,
+        "sku": "ASYNC-1",
+        "nombre": "Producto async",
+        "descripcion": None,
+        "precio": 1000,
+        "stock": 3,
+        "imagen_url": None,
+        "fecha_creacion": "2026-01-01T00:00:00",
+        "estado_producto": "activo",
+    })
+    assert creado.status_code == 200
+    producto_id = creado.json()["producto_id"]
+
+    detalle = cliente_async.get(f"/productos/{producto_id}")
+    assert detalle.json()["stock"] == 3
+    assert cliente_async.get(f"/productos/{producto_id}", headers={"If-None-Match": detalle.headers["etag"]}).status_code == 304
+
+    assert cliente_async.patch(f"/productos/{producto_id}", json={"stock": 7}).json()["stock"] == 7
+    assert cliente_async.get(f"/productos/{producto_id}").json()["stock"] == 7
+
+    assert cliente_async.delete(f"/productos/{producto_id}").json() == {"ok": True}
+    assert cliente_async.get(f"/productos/{producto_id}").status_code == 404
@@ -0,0 +1,86 @@
+import json
+
+from sqlmodel import select
+
+from models.producto import Producto
+
+
+def fila(sku, **cambios) -> dict:
+    return {
+        "categoria_id": 1,
+        "sku": sku,
+        "nombre": f"Producto {sku}",
+        "descripcion": None,
+        "precio": 1000,
+        "stock": 5,
+        "imagen_url": None,
+        "fecha_creacion": "2026-01-01T00:00:00",
+        "estado_producto": "activo",
+        **cambios,
+    }
+
+
+def productos_por_sku(session) -> dict[str, Producto]:
+    session.expire_all()
+    return {producto.sku: producto for producto in session.exec(select(Producto))}
+
+
+def test_upsert_informa_creados_actualizados_omitidos_y_errores(client, session, crear_producto):
+    existente = crear_producto(stock=1, sku="EXISTE")
+
+    respuesta = client.post("/productos/bulk", json=[
+        fila("NUEVO"),
+        fila("EXISTE", precio=2500),
+        fila("REPETIDO", precio=100),
+        fila("REPETIDO", precio=200),
+        fila("MALO", precio="caro"),
+    ])
+
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert (cuerpo["creados"], cuerpo["actualizados"], cuerpo["errores"]) == (2, 1, 1)
+    assert [(r["indice"], r["sku"], r["resultado"]) for r in cuerpo["resultados"]] == [
+        (0, "NUEVO", "creado"),
+        (1, "EXISTE", "actualizado"),
+        (2, "REPETIDO", "omitido"),
+        (3, "REPETIDO", "creado"),
+        (4, "MALO", "error"),
+    ]
+    productos = productos_por_sku(session)
+    assert productos["EXISTE"].producto_id == existente.producto_id
+    assert productos["EXISTE"].precio == 2500
+    # En un sku repetido dentro del lote gana la última aparición
+    assert productos["REPETIDO"].precio == 200
+    assert "MALO" not in productos
+
+
+def test_sku_que_no_es_texto_es_error_de_su_fila(client, session):
+    respuesta = client.post("/productos/bulk?tamano_lote=1", json=[fila("A"), fila(1), fila("B")])
+
+    assert respuesta.status_code == 200
+    resultados = respuesta.json()["resultados"]
+    assert [(r["sku"], r["resultado"]) for r in resultados] == [("A", "creado"), (None, "error"), ("B", "creado")]
+    assert resultados[1]["detalle"].startswith("sku:")
+    assert set(productos_por_sku(session)) == {"A", "B"}
+
+
+def test_ndjson_con_linea_invalida_no_cancela_la_carga(client, session):
+    lineas = [json.dumps(fila(f"N{i}")) for i in range(4)]
+    cuerpo = "\n".join(lineas[:2] + [""] + lineas[2:] + ["{malo"])
+
+    respuesta = client.post("/productos/bulk?tamano_lote=2", content=cuerpo, headers={"content-type": "application/x-ndjson"})
+
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert (cuerpo["creados"], cuerpo["errores"]) == (4, 1)
+    error = cuerpo["resultados"][-1]
+    assert error["indice"] == 4
+    assert error["detalle"].startswith("JSON inválido (línea 6)")
+    assert set(productos_por_sku(session)) == {"N0", "N1", "N2", "N3"}
+
+
+def test_arreglo_json_invalido_se_rechaza_sin_escribir(client, session):
+    respuesta = client.post("/productos/bulk", content="[{", headers={"content-type": "application/json"})
+
+    assert respuesta.status_code == 400
+    assert productos_por_sku(session) == {}
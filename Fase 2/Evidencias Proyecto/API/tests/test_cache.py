@@ -0,0 +1,48 @@
+from cache import cache_productos
+
+
+def modificar_sin_api(session, producto, **cambios):
+    producto.sqlmodel_update(cambios)
+    session.add(producto)
+    session.commit()
+
+
+def test_detalle_se_sirve_desde_el_cache(client, session, crear_producto):
+    producto = crear_producto(stock=1)
+    url = f"/productos/{producto.producto_id}"
+    client.get(url)
+
+    # Un cambio fuera de la API no invalida: la segunda lectura sale del cache
+    modificar_sin_api(session, producto, stock=50)
+    respuesta = client.get(url)
+
+    assert respuesta.json()["stock"] == 1
+    assert cache_productos.estadisticas()["local"]["hits"] == 1
+
+
+def test_patch_invalida_el_detalle_cacheado(client, session, crear_producto):
+    producto = crear_producto(stock=1)
+    url = f"/productos/{producto.producto_id}"
+    client.get(url)
+
+    client.patch(url, json={"precio": 2500})
+
+    detalle = client.get(url).json()
+    assert (detalle["precio"], detalle["stock"]) == (2500, 1)
+    assert cache_productos.estadisticas()["local"]["misses"] == 2
+
+
+def test_delete_invalida_el_detalle_cacheado(client, crear_producto):
+    producto = crear_producto(stock=1)
+    url = f"/productos/{producto.producto_id}"
+    client.get(url)
+
+    assert client.delete(url).json() == {"ok": True}
+
+    assert client.get(url).status_code == 404
+    assert cache_productos.estadisticas()["local"]["items"] == 0
+
+
+def test_producto_inexistente_no_queda_en_cache(client, session):
+    assert client.get("/productos/9999").status_code == 404
+    assert cache_productos.estadisticas()["local"]["items"] == 0
@@ -0,0 +1,54 @@
+def test_detalle_responde_304_con_el_mismo_etag(client, crear_producto):
+    producto = crear_producto(stock=1)
+    url = f"/productos/{producto.producto_id}"
+
+    primera = client.get(url)
+    segunda = client.get(url, headers={"If-None-Match": primera.headers["etag"]})
+
+    assert primera.status_code == 200
+    assert primera.headers["cache-control"] == "no-cache"
+    assert segunda.status_code == 304
+    assert segunda.content == b""
+    assert segunda.headers["etag"] == primera.headers["etag"]
+
+
+def test_detalle_con_etag_viejo_responde_200_tras_modificar(client, crear_producto):
+    producto = crear_producto(stock=1)
+    url = f"/productos/{producto.producto_id}"
+    etag = client.get(url).headers["etag"]
+
+    client.patch(url, json={"stock": 9})
+    respuesta = client.get(url, headers={"If-None-Match": etag})
+
+    assert respuesta.status_code == 200
+    assert respuesta.json()["stock"] == 9
+    assert respuesta.headers["etag"] != etag
+
+
+def test_listado_responde_304_hasta_que_cambia_una_fila_de_la_pagina(client, crear_producto):
+    segundo = [crear_producto(stock=1) for _ in range(3)][1]
+    parametros = {"limite": 2}
+
+    primera = client.get("/productos/", params=parametros)
+    etag = primera.headers["etag"]
+    assert primera.status_code == 200
+    assert client.get("/productos/", params=parametros, headers={"If-None-Match": etag}).status_code == 304
+    # Otros filtros son otra colección aunque devuelvan las mismas filas
+    assert client.get("/productos/", params={"limite": 2, "stock_min": 0}, headers={"If-None-Match": etag}).status_code == 200
+
+    client.patch(f"/productos/{segundo.producto_id}", json={"stock": 5})
+    respuesta = client.get("/productos/", params=parametros, headers={"If-None-Match": etag})
+
+    assert respuesta.status_code == 200
+    assert [item["stock"] for item in respuesta.json()["items"]] == [1, 5]
+    assert respuesta.headers["etag"] != etag
+
+
+def test_listado_con_fields_usa_un_etag_distinto(client, crear_producto):
+    crear_producto(stock=1)
+
+    completo = client.get("/productos/")
+    parcial = client.get("/productos/", params={"fields": "stock"})
+
+    assert parcial.headers["etag"] != completo.headers["etag"]
+    assert client.get("/productos/", params={"fields": "stock"}, headers={"If-None-Match": parcial.headers["etag"]}).status_code == 304
@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+
+from crud.producto_crud import COLUMNAS_EXPORTACION
+
+
+def test_ndjson_entrega_una_linea_por_producto_en_orden(client, crear_producto):
+    ids = [crear_producto(stock=i).producto_id for i in range(5)]
+
+    respuesta = client.get("/productos/export", params={"tamano_lote": 100})
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"].startswith("application/x-ndjson")
+    assert respuesta.headers["content-disposition"] == 'attachment; filename="productos.ndjson"'
+    filas = [json.loads(linea) for linea in respuesta.text.splitlines()]
+    assert [fila["producto_id"] for fila in filas] == ids
+    assert [fila["stock"] for fila in filas] == [0, 1, 2, 3, 4]
+    assert filas[0]["estado_producto"] == "activo"
+    assert isinstance(filas[0]["fecha_creacion"], str)
+
+
+def test_csv_incluye_encabezado_y_todas_las_filas(client, crear_producto):
+    ids = [crear_producto(stock=i).producto_id for i in range(3)]
+
+    respuesta = client.get("/productos/export", params={"formato": "csv"})
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"].startswith("text/csv")
+    filas = list(csv.DictReader(io.StringIO(respuesta.text)))
+    assert [int(fila["producto_id"]) for fila in filas] == ids
+    assert {fila["sku"] for fila in filas} == {"PRUEBA-0001", "PRUEBA-0002", "PRUEBA-0003"}
+    assert filas[0]["estado_producto"] == "activo"
+
+
+def test_tabla_vacia_exporta_nada_en_ndjson_y_solo_encabezado_en_csv(client, session):
+    ndjson = client.get("/productos/export")
+    csv_vacio = client.get("/productos/export", params={"formato": "csv"})
+
+    assert ndjson.text == ""
+    assert list(csv.reader(io.StringIO(csv_vacio.text))) == [COLUMNAS_EXPORTACION]
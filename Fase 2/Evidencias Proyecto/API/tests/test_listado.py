@@ -0,0 +1,45 @@
+def recorrer(client, **parametros) -> list[list[int]]:
+    paginas, cursor = [], None
+    while True:
+        respuesta = client.get("/productos/", params={**parametros, **({"cursor": cursor} if cursor else {})})
+        assert respuesta.status_code == 200
+        cuerpo = respuesta.json()
+        paginas.append([item["producto_id"] for item in cuerpo["items"]])
+        cursor = cuerpo["next_cursor"]
+        if cursor is None:
+            return paginas
+
+
+def test_cursor_recorre_todas_las_paginas_sin_repetir(client, crear_producto):
+    ids = [crear_producto(stock=1).producto_id for _ in range(7)]
+
+    paginas = recorrer(client, limite=3)
+
+    assert paginas == [ids[0:3], ids[3:6], ids[6:7]]
+
+
+def test_ultima_pagina_exacta_no_entrega_cursor(client, crear_producto):
+    ids = [crear_producto(stock=1).producto_id for _ in range(4)]
+
+    assert recorrer(client, limite=2) == [ids[0:2], ids[2:4]]
+
+
+def test_cursor_conserva_los_filtros(client, crear_producto):
+    baratos = []
+    for i in range(8):
+        producto = crear_producto(stock=i, precio=500 if i % 2 else 5000, categoria_id=2 if i == 7 else 1)
+        if producto.precio == 500 and producto.categoria_id == 1:
+            baratos.append(producto.producto_id)
+
+    paginas = recorrer(client, limite=2, categoria_id=1, precio_max=1000)
+
+    assert paginas == [baratos[0:2], baratos[2:3]]
+
+
+def test_cursor_invalido_responde_400(client, crear_producto):
+    crear_producto(stock=1)
+
+    respuesta = client.get("/productos/", params={"cursor": "no-es-un-cursor"})
+
+    assert respuesta.status_code == 400
+    assert respuesta.json()["detail"] == "Cursor inválido"
@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlmodel import create_engine
+
+from database import QueuePoolMedido, engine, estado_pool
+
+
+def test_metrics_expone_pool_y_cache(client, crear_producto):
+    producto = crear_producto(stock=1)
+    antes = client.get("/metrics").json()
+
+    client.get(f"/productos/{producto.producto_id}")
+    client.get(f"/productos/{producto.producto_id}")
+    despues = client.get("/metrics").json()
+
+    pool = despues["pool"]["sync"]
+    assert pool["tamano"] == engine.pool.size()
+    assert pool["en_uso"] == engine.pool.checkedout()
+    assert pool["timeouts"] == 0
+    assert pool["solicitudes"] > antes["pool"]["sync"]["solicitudes"]
+    assert "async" not in despues["pool"]
+    cache = despues["cache"]["productos"]["local"]
+    assert cache["items"] == 1
+    assert cache["hits"] - antes["cache"]["productos"]["local"]["hits"] == 1
+
+
+def test_estado_pool_cuenta_esperas_agotadas():
+    motor = create_engine("sqlite://", poolclass=QueuePoolMedido, pool_size=1, max_overflow=0, pool_timeout=0.01)
+    with motor.connect():
+        with pytest.raises(PoolTimeoutError):
+            motor.connect()
+        estado = estado_pool(motor)
+
+    assert (estado["tamano"], estado["en_uso"], estado["disponibles"]) == (1, 1, 0)
+    assert (estado["solicitudes"], estado["timeouts"]) == (2, 1)
+    assert estado["espera_max_ms"] >= 10
+    motor.dispose()
@@ -0,0 +1,33 @@
+def test_listado_con_fields_devuelve_solo_las_columnas_pedidas(client, crear_producto):
+    ids = [crear_producto(stock=i).producto_id for i in range(3)]
+
+    respuesta = client.get("/productos/", params={"fields": "stock, precio", "limite": 2})
+
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    # producto_id siempre va incluido porque de él sale el cursor
+    assert cuerpo["items"] == [
+        {"producto_id": ids[0], "precio": 1000, "stock": 0},
+        {"producto_id": ids[1], "precio": 1000, "stock": 1},
+    ]
+    siguiente = client.get("/productos/", params={"fields": "stock,precio", "limite": 2, "cursor": cuerpo["next_cursor"]})
+    assert siguiente.json() == {"items": [{"producto_id": ids[2], "precio": 1000, "stock": 2}], "next_cursor": None}
+
+
+def test_detalle_con_fields(client, crear_producto):
+    producto = crear_producto(stock=4, sku="PROY-1")
+
+    respuesta = client.get(f"/productos/{producto.producto_id}", params={"fields": "sku"})
+
+    assert respuesta.json() == {"producto_id": producto.producto_id, "sku": "PROY-1"}
+
+
+def test_campo_desconocido_responde_422(client, crear_producto):
+    producto = crear_producto(stock=1)
+
+    listado = client.get("/productos/", params={"fields": "stock,costo,fecha_actualizacion"})
+    detalle = client.get(f"/productos/{producto.producto_id}", params={"fields": "costo"})
+
+    assert listado.status_code == 422
+    assert listado.json()["detail"] == "Campos desconocidos: costo, fecha_actualizacion"
+    assert detalle.status_code == 422
@@ -0,0 +1,75 @@
+from sqlmodel import select
+
+from models.movimiento_stock import MovimientoStock
+from models.producto import Producto
+
+
+def stock_actual(session, producto_id: int) -> int:
+    session.expire_all()
+    return session.get(Producto, producto_id).stock
+
+
+def movimientos(session) -> list[tuple[int, int]]:
+    filas = session.exec(select(MovimientoStock.producto_id, MovimientoStock.cantidad).order_by(MovimientoStock.movimiento_stock_id))
+    return [tuple(fila) for fila in filas]
+
+
+def test_lote_atomico_rechazado_responde_409_sin_tocar_stock(client, session, crear_producto):
+    a = crear_producto(stock=10)
+    b = crear_producto(stock=2)
+
+    respuesta = client.post("/stock/ajustes", json={"ajustes": [
+        {"producto_id": a.producto_id, "delta": -3, "tipo_operacion": "venta"},
+        {"producto_id": b.producto_id, "delta": -5, "tipo_operacion": "venta"},
+    ]})
+
+    assert respuesta.status_code == 409
+    cuerpo = respuesta.json()
+    assert cuerpo["revertido"] is True
+    assert cuerpo["aplicados"] == 0
+    assert cuerpo["rechazados"] == 2
+    assert [r["detalle"] for r in cuerpo["resultados"]] == ["Lote revertido", "Producto inexistente o stock insuficiente"]
+    assert stock_actual(session, a.producto_id) == 10
+    assert stock_actual(session, b.producto_id) == 2
+    assert movimientos(session) == []
+
+
+def test_lote_no_atomico_aplica_y_registra_solo_los_validos(client, session, crear_producto):
+    a = crear_producto(stock=10)
+    b = crear_producto(stock=2)
+    c = crear_producto(stock=0)
+
+    respuesta = client.post("/stock/ajustes", json={"atomico": False, "ajustes": [
+        {"producto_id": c.producto_id, "delta": 4, "tipo_operacion": "ingreso"},
+        {"producto_id": b.producto_id, "delta": -5, "tipo_operacion": "venta"},
+        {"producto_id": a.producto_id, "delta": -3, "tipo_operacion": "venta"},
+        {"producto_id": a.producto_id, "delta": 0, "tipo_operacion": "ajuste"},
+        {"producto_id": 9999, "delta": 1, "tipo_operacion": "ingreso"},
+    ]})
+
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert cuerpo["revertido"] is False
+    assert cuerpo["aplicados"] == 2
+    assert cuerpo["rechazados"] == 3
+    assert [r["aplicado"] for r in cuerpo["resultados"]] == [True, False, True, False, False]
+    assert stock_actual(session, a.producto_id) == 7
+    assert stock_actual(session, b.producto_id) == 2
+    assert stock_actual(session, c.producto_id) == 4
+    assert sorted(movimientos(session)) == sorted([(a.producto_id, -3), (c.producto_id, 4)])
+
+
+def test_lote_atomico_valido_registra_un_movimiento_por_ajuste(client, session, crear_producto):
+    a = crear_producto(stock=10)
+    b = crear_producto(stock=2)
+
+    respuesta = client.post("/stock/ajustes", json={"ajustes": [
+        {"producto_id": b.producto_id, "delta": -2, "tipo_operacion": "venta"},
+        {"producto_id": a.producto_id, "delta": 5, "tipo_operacion": "ingreso"},
+    ]})
+
+    assert respuesta.status_code == 200
+    assert respuesta.json()["aplicados"] == 2
+    assert stock_actual(session, a.producto_id) == 15
+    assert stock_actual(session, b.producto_id) == 0
+    assert sorted(movimientos(session)) == sorted([(a.producto_id, 5), (b.producto_id, -2)])
@@ -0,0 +1,52 @@
+-- ============================================
+-- BÚSQUEDA DE PRODUCTOS - POSTGRESQL
+-- ============================================
+-- Se aplica sobre la base en uso por la web (producto con marca_id). Agrega la columna
+-- producto.busqueda que usa Web/apps/ventas/busqueda.py:
+--   A: nombre y SKU, B: nombre de la marca, C: descripción.
+-- Los índices se crean con CONCURRENTLY, por lo que el script no debe ejecutarse dentro de una transacción.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE producto ADD COLUMN IF NOT EXISTS busqueda TSVECTOR;
+
+CREATE OR REPLACE FUNCTION fn_producto_busqueda() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.busqueda :=
+        setweight(to_tsvector('spanish', coalesce(NEW.nombre, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.sku, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce((SELECT nombre FROM marca WHERE marca_id = NEW.marca_id), '')), 'B') ||
+        setweight(to_tsvector('spanish', coalesce(NEW.descripcion, '')), 'C');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_producto_busqueda ON producto;
+CREATE TRIGGER trg_producto_busqueda
+    BEFORE INSERT OR UPDATE OF nombre, sku, descripcion, marca_id ON producto
+    FOR EACH ROW EXECUTE FUNCTION fn_producto_busqueda();
+
+-- Al renombrar una marca se recalcula la columna de sus productos (UPDATE OF marca_id dispara el trigger)
+CREATE OR REPLACE FUNCTION fn_marca_busqueda() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE producto SET marca_id = marca_id WHERE marca_id = NEW.marca_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_marca_busqueda ON marca;
+CREATE TRIGGER trg_marca_busqueda
+    AFTER UPDATE OF nombre ON marca
+    FOR EACH ROW WHEN (OLD.nombre IS DISTINCT FROM NEW.nombre)
+    EXECUTE FUNCTION fn_marca_busqueda();
+
+-- Poblar la columna para los productos existentes
+UPDATE producto SET marca_id = marca_id WHERE busqueda IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_producto_busqueda
+    ON producto USING GIN (busqueda);
+-- Similitud de trigramas (operador %) para errores de tipeo en el nombre
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_producto_nombre_trgm
+    ON producto USING GIN (nombre gin_trgm_ops);
+
+ANALYZE producto;
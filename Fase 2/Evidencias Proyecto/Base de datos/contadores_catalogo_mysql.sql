@@ -0,0 +1,59 @@
+-- ============================================
+-- CONTADORES DE CATEGORÍA - MYSQL (esquema de la API)
+-- ============================================
+-- Misma idea que contadores_catalogo_postgresql.sql para el esquema de crear_tablas_mysql.sql,
+-- que no tiene marcas ni subcategorías: productos totales y activos por categoría, mantenidos
+-- por triggers ante cualquier escritura de la API (CRUD, upsert masivo, ajustes de stock).
+-- Los productos borrados en cascada al eliminar su categoría no disparan triggers en MySQL,
+-- pero esa categoría ya no existe.
+
+ALTER TABLE categoria
+    ADD COLUMN total_productos INT NOT NULL DEFAULT 0,
+    ADD COLUMN productos_activos INT NOT NULL DEFAULT 0;
+
+DROP TRIGGER IF EXISTS trg_producto_contadores_insert;
+DROP TRIGGER IF EXISTS trg_producto_contadores_update;
+DROP TRIGGER IF EXISTS trg_producto_contadores_delete;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_producto_contadores_insert AFTER INSERT ON producto
+FOR EACH ROW
+BEGIN
+    UPDATE categoria
+       SET total_productos = total_productos + 1,
+           productos_activos = productos_activos + (NEW.estado_producto = 'activo')
+     WHERE categoria_id = NEW.categoria_id;
+END$$
+
+-- Solo cuando cambia la categoría o el estado: los UPDATE de stock y precio no tocan categoria
+CREATE TRIGGER trg_producto_contadores_update AFTER UPDATE ON producto
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.categoria_id <=> NEW.categoria_id) OR NOT (OLD.estado_producto <=> NEW.estado_producto) THEN
+        UPDATE categoria
+           SET total_productos = total_productos - 1,
+               productos_activos = productos_activos - (OLD.estado_producto = 'activo')
+         WHERE categoria_id = OLD.categoria_id;
+        UPDATE categoria
+           SET total_productos = total_productos + 1,
+               productos_activos = productos_activos + (NEW.estado_producto = 'activo')
+         WHERE categoria_id = NEW.categoria_id;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_producto_contadores_delete AFTER DELETE ON producto
+FOR EACH ROW
+BEGIN
+    UPDATE categoria
+       SET total_productos = total_productos - 1,
+           productos_activos = productos_activos - (OLD.estado_producto = 'activo')
+     WHERE categoria_id = OLD.categoria_id;
+END$$
+
+DELIMITER ;
+
+-- Valores iniciales para los datos existentes
+UPDATE categoria c SET
+    total_productos = (SELECT COUNT(*) FROM producto p WHERE p.categoria_id = c.categoria_id),
+    productos_activos = (SELECT COUNT(*) FROM producto p WHERE p.categoria_id = c.categoria_id AND p.estado_producto = 'activo');
@@ -0,0 +1,98 @@
+-- ============================================
+-- CONTADORES DE CATEGORÍA Y MARCA - POSTGRESQL
+-- ============================================
+-- Columnas desnormalizadas con la cantidad de productos (totales y activos) por categoría
+-- y marca, y de subcategorías directas por categoría. Las mantienen los triggers de este
+-- script, así se actualizan con cualquier escritura: dashboard, operaciones masivas,
+-- importación, checkout y la API. El listado de categorías del dashboard las lee en vez de
+-- contar productos en cada página; la eliminación de una categoría sigue comprobando sus
+-- productos con una consulta exacta.
+-- Refleja Categoria/Marca total_productos, productos_activos y total_subcategorias de
+-- Web/apps/ventas/models.py (tablas managed = False).
+-- Después de aplicar este script hay que ejecutar manage.py recalcular_contadores. En una base
+-- sin estos triggers (SQLite, o PostgreSQL sin este script) los contadores quedan en 0 y no se
+-- actualizan solos: el mismo comando los rellena y corrige desvíos (--solo-revisar solo informa).
+
+ALTER TABLE categoria ADD COLUMN IF NOT EXISTS total_productos INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE categoria ADD COLUMN IF NOT EXISTS productos_activos INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE categoria ADD COLUMN IF NOT EXISTS total_subcategorias INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE marca ADD COLUMN IF NOT EXISTS total_productos INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE marca ADD COLUMN IF NOT EXISTS productos_activos INTEGER NOT NULL DEFAULT 0;
+
+-- Producto: resta la fila anterior y suma la nueva (un UPDATE cambia ambas)
+CREATE OR REPLACE FUNCTION fn_producto_contadores() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE categoria
+           SET total_productos = total_productos - 1,
+               productos_activos = productos_activos - (OLD.estado_producto = 'activo')::int
+         WHERE categoria_id = OLD.categoria_id;
+        UPDATE marca
+           SET total_productos = total_productos - 1,
+               productos_activos = productos_activos - (OLD.estado_producto = 'activo')::int
+         WHERE marca_id = OLD.marca_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE categoria
+           SET total_productos = total_productos + 1,
+               productos_activos = productos_activos + (NEW.estado_producto = 'activo')::int
+         WHERE categoria_id = NEW.categoria_id;
+        UPDATE marca
+           SET total_productos = total_productos + 1,
+               productos_activos = productos_activos + (NEW.estado_producto = 'activo')::int
+         WHERE marca_id = NEW.marca_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_producto_contadores ON producto;
+CREATE TRIGGER trg_producto_contadores
+    AFTER INSERT OR DELETE ON producto
+    FOR EACH ROW EXECUTE FUNCTION fn_producto_contadores();
+
+-- Solo cuando cambia algo que se cuenta: los UPDATE de stock y precio (checkout, ajustes,
+-- operaciones masivas) no tocan categoria ni marca
+DROP TRIGGER IF EXISTS trg_producto_contadores_update ON producto;
+CREATE TRIGGER trg_producto_contadores_update
+    AFTER UPDATE OF categoria_id, marca_id, estado_producto ON producto
+    FOR EACH ROW
+    WHEN (OLD.categoria_id IS DISTINCT FROM NEW.categoria_id
+          OR OLD.marca_id IS DISTINCT FROM NEW.marca_id
+          OR OLD.estado_producto IS DISTINCT FROM NEW.estado_producto)
+    EXECUTE FUNCTION fn_producto_contadores();
+
+-- Categoría: subcategorías directas de la categoría padre
+CREATE OR REPLACE FUNCTION fn_categoria_subcategorias() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE categoria SET total_subcategorias = total_subcategorias - 1
+         WHERE categoria_id = OLD.categoria_padre_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE categoria SET total_subcategorias = total_subcategorias + 1
+         WHERE categoria_id = NEW.categoria_padre_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_categoria_subcategorias ON categoria;
+CREATE TRIGGER trg_categoria_subcategorias
+    AFTER INSERT OR DELETE ON categoria
+    FOR EACH ROW EXECUTE FUNCTION fn_categoria_subcategorias();
+
+DROP TRIGGER IF EXISTS trg_categoria_subcategorias_update ON categoria;
+CREATE TRIGGER trg_categoria_subcategorias_update
+    AFTER UPDATE OF categoria_padre_id ON categoria
+    FOR EACH ROW WHEN (OLD.categoria_padre_id IS DISTINCT FROM NEW.categoria_padre_id)
+    EXECUTE FUNCTION fn_categoria_subcategorias();
+
+-- Valores iniciales para los datos existentes
+UPDATE categoria c SET
+    total_productos = (SELECT count(*) FROM producto p WHERE p.categoria_id = c.categoria_id),
+    productos_activos = (SELECT count(*) FROM producto p WHERE p.categoria_id = c.categoria_id AND p.estado_producto = 'activo'),
+    total_subcategorias = (SELECT count(*) FROM categoria s WHERE s.categoria_padre_id = c.categoria_id);
+UPDATE marca m SET
+    total_productos = (SELECT count(*) FROM producto p WHERE p.marca_id = m.marca_id),
+    productos_activos = (SELECT count(*) FROM producto p WHERE p.marca_id = m.marca_id AND p.estado_producto = 'activo');
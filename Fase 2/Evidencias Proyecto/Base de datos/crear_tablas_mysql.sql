@@ -127,6 +127,7 @@ CREATE TABLE producto (
     imagen_url TEXT,
     fecha_creation TIMESTAMP,
     estado_producto ENUM('activo','inactivo','eliminado') DEFAULT 'activo',
+    fecha_actualizacion TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
     CONSTRAINT fk_producto_categoria 
         FOREIGN KEY (categoria_id) 
         REFERENCES categoria(categoria_id)
@@ -143,12 +143,25 @@ CREATE TABLE producto (
     imagen_url TEXT,
     fecha_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
     estado_producto estado_producto DEFAULT 'activo' NOT NULL,
+    fecha_actualizacion TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP NOT NULL,
     CONSTRAINT fk_producto_categoria
         FOREIGN KEY (categoria_id)
         REFERENCES categoria(categoria_id)
         ON DELETE RESTRICT ON UPDATE CASCADE
 );
 
+-- Mantiene producto.fecha_actualizacion (validador de ETags de la API)
+CREATE OR REPLACE FUNCTION fn_producto_fecha_actualizacion() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.fecha_actualizacion := clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_producto_fecha_actualizacion
+    BEFORE UPDATE ON producto
+    FOR EACH ROW EXECUTE FUNCTION fn_producto_fecha_actualizacion();
+
 CREATE TABLE movimiento_stock (
     movimiento_stock_id BIGSERIAL PRIMARY KEY,
     producto_id INTEGER NOT NULL,
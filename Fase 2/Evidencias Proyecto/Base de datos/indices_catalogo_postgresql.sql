@@ -0,0 +1,20 @@
+-- ============================================
+-- ÍNDICES DEL CATÁLOGO DE LA TIENDA - POSTGRESQL
+-- ============================================
+-- Se aplican sobre la base en uso por la web (producto con marca_id), cuyas tablas
+-- Django no administra (managed = False). Reflejan Producto.Meta.indexes en
+-- Web/apps/ventas/models.py; CONCURRENTLY evita bloquear escrituras mientras se crean.
+
+-- Filtros de /catalogo/: estado + categoría + marca
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_producto_catalogo
+    ON producto (estado_producto, categoria_id, marca_id);
+
+-- Un índice por orden de /catalogo/?orden=...; terminan en producto_id para la paginación por cursor
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_producto_catalogo_fecha
+    ON producto (estado_producto, fecha_creation, producto_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_producto_catalogo_precio
+    ON producto (estado_producto, precio, producto_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_producto_catalogo_nombre
+    ON producto (estado_producto, nombre, producto_id);
+
+ANALYZE producto;
@@ -0,0 +1,22 @@
+-- ============================================
+-- PUNTO DE REORDEN Y STOCK BAJO - POSTGRESQL
+-- ============================================
+-- Reemplaza el umbral fijo de stock bajo (stock < 10) del dashboard por un punto de
+-- reorden por producto. La categoría guarda el valor que heredan sus productos nuevos;
+-- al cambiarlo desde el dashboard se actualizan los productos que tenían el valor anterior.
+-- Refleja Categoria.punto_reorden, Producto.punto_reorden e idx_producto_stock_bajo de
+-- Web/apps/ventas/models.py (tablas managed = False).
+
+ALTER TABLE categoria ADD COLUMN IF NOT EXISTS punto_reorden INTEGER NOT NULL DEFAULT 10;
+
+ALTER TABLE producto ADD COLUMN IF NOT EXISTS punto_reorden INTEGER NOT NULL DEFAULT 10;
+ALTER TABLE producto DROP CONSTRAINT IF EXISTS producto_punto_reorden_check;
+ALTER TABLE producto ADD CONSTRAINT producto_punto_reorden_check CHECK (punto_reorden >= 0);
+
+-- Índice parcial: solo contiene los productos activos bajo su punto de reorden, por lo que
+-- es pequeño y el conteo del dashboard y el filtro ?stock_bajo=1 no recorren toda la tabla
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_producto_stock_bajo
+    ON producto (categoria_id, stock)
+    WHERE estado_producto = 'activo' AND stock < punto_reorden;
+
+ANALYZE producto;
@@ -0,0 +1,13 @@
+-- ============================================
+-- RESÚMENES DIARIOS DE VENTAS - POSTGRESQL
+-- ============================================
+-- Las tablas venta_diaria y pedido_diario_estado las crea la migración de
+-- Web/apps/dashboard (manage.py migrate) y las llena el comando
+-- manage.py actualizar_ventas_diarias (cron diario, después de medianoche).
+-- Este script agrega el índice que usa el cálculo de los resúmenes: los ítems de los
+-- pedidos de un rango de fechas (idx_pedido_fecha -> pedido_item por pedido_id).
+-- Refleja idx_pedido_item_pedido de Web/apps/ventas/models.py (tabla managed = False).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_pedido_item_pedido ON pedido_item (pedido_id);
+
+ANALYZE pedido_item;
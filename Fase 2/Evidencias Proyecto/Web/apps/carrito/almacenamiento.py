@@ -0,0 +1,280 @@
+"""Almacenamiento del carrito según settings.CARRITO_ALMACENAMIENTO: sesión (por defecto), base de
+datos o cache. Cada línea es {"precio", "cantidad", "nombre", "imagen_url"} indexada por producto_id."""
+
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import CarritoGuardado, CarritoLinea
+
+# Claves usadas dentro de request.session
+CLAVE_CARRITO_SESION = "session_key"
+CLAVE_RESUMEN = "carrito_resumen"
+CLAVE_TOKEN_CARRITO = "carrito_token"
+
+
+def calcular_resumen(lineas):
+    return {
+        "cantidad": sum(item.get('cantidad', 1) for item in lineas.values()),
+        "subtotal": sum(int(item['precio']) * item.get('cantidad', 1) for item in lineas.values()),
+    }
+
+
+class AlmacenamientoCarrito:
+    """Base de los almacenamientos fuera de la sesión; las subclases implementan _cargar, _resumen,
+    _aplicar_cambios, _vaciar y _eliminar, que reciben la clave del carrito."""
+
+    def __init__(self, request):
+        self.session = request.session
+        self.usuario = getattr(request, "user", None)
+
+    def clave(self, crear=False):
+        # "usuario:<id>" con login; si no, un token guardado una sola vez en la sesión
+        if self.usuario is not None and self.usuario.is_authenticated:
+            return f"usuario:{self.usuario.pk}"
+        token = self.session.get(CLAVE_TOKEN_CARRITO)
+        if token is None and crear:
+            # Única escritura en la sesión: al crear el carrito
+            token = self.session[CLAVE_TOKEN_CARRITO] = uuid.uuid4().hex
+        return f"sesion:{token}" if token else None
+
+    def cargar(self):
+        self.importar_sesion()
+        clave = self.clave()
+        return self._cargar(clave) if clave else {}
+
+    def resumen(self):
+        self.importar_sesion()
+        clave = self.clave()
+        return self._resumen(clave) if clave else calcular_resumen({})
+
+    def guardar_linea(self, producto_id, item):
+        self.aplicar_cambios({str(producto_id): item}, [])
+
+    def eliminar_linea(self, producto_id):
+        self.aplicar_cambios({}, [str(producto_id)])
+
+    def aplicar_cambios(self, guardadas, eliminadas):
+        # Escribe de una vez las líneas nuevas o modificadas ({producto_id: item}) y las eliminadas
+        clave = self.clave(crear=bool(guardadas))
+        if clave and (guardadas or eliminadas):
+            self._aplicar_cambios(clave, guardadas, eliminadas)
+
+    def vaciar(self):
+        clave = self.clave()
+        if clave:
+            self._vaciar(clave)
+
+    def importar_sesion(self):
+        # Carritos guardados en la sesión antes de cambiar de almacenamiento
+        if CLAVE_CARRITO_SESION not in self.session:
+            return
+        legado = self.session.pop(CLAVE_CARRITO_SESION) or {}
+        self.session.pop(CLAVE_RESUMEN, None)
+        self.aplicar_cambios({
+            producto_id: {**item, "cantidad": item.get("cantidad", 1)} for producto_id, item in legado.items()
+        }, [])
+
+    def fusionar_invitado(self):
+        token = self.session.pop(CLAVE_TOKEN_CARRITO, None)
+        if token is None:
+            return
+        clave_invitado = f"sesion:{token}"
+        destino = self.cargar()
+        guardadas = {}
+        for producto_id, item in self._cargar(clave_invitado).items():
+            if producto_id in destino:
+                item = {**item, "cantidad": destino[producto_id]["cantidad"] + item["cantidad"]}
+            guardadas[producto_id] = item
+        self.aplicar_cambios(guardadas, [])
+        self._eliminar(clave_invitado)
+
+
+class AlmacenamientoSesion(AlmacenamientoCarrito):
+    # El carrito completo como JSON en la sesión; el badge de la cabecera lee el resumen sin consultas
+    def cargar(self):
+        return self.session.get(CLAVE_CARRITO_SESION, {})
+
+    def resumen(self):
+        resumen = self.session.get(CLAVE_RESUMEN)
+        if resumen is None:
+            # Sesiones creadas antes de existir el resumen
+            carrito = self.cargar()
+            resumen = calcular_resumen(carrito)
+            if carrito:
+                self.session[CLAVE_RESUMEN] = resumen
+        return resumen
+
+    def _guardar(self, carrito):
+        self.session[CLAVE_CARRITO_SESION] = carrito
+        self.session[CLAVE_RESUMEN] = calcular_resumen(carrito)
+        self.session.modified = True
+
+    def aplicar_cambios(self, guardadas, eliminadas):
+        # Carrito ya modificó el mismo dict de la sesión; se guarda igual para marcarla como modificada
+        carrito = self.cargar()
+        for producto_id in eliminadas:
+            carrito.pop(producto_id, None)
+        carrito.update(guardadas)
+        self._guardar(carrito)
+
+    def vaciar(self):
+        self._guardar({})
+
+    def importar_sesion(self):
+        pass
+
+    def fusionar_invitado(self):
+        # login() conserva los datos de la sesión del invitado
+        pass
+
+
+class AlmacenamientoBaseDatos(AlmacenamientoCarrito):
+    # Tablas carrito / carrito_linea: cada cambio escribe solo la línea afectada y el resumen de la cabecera
+    def __init__(self, request):
+        super().__init__(request)
+        self._ids = {}
+
+    def _carrito_id(self, clave, crear=False):
+        if self._ids.get(clave) is None:
+            if crear:
+                self._ids[clave] = CarritoGuardado.objects.get_or_create(clave=clave)[0].pk
+            else:
+                self._ids[clave] = CarritoGuardado.objects.filter(clave=clave).values_list("pk", flat=True).first()
+        return self._ids[clave]
+
+    def _cargar(self, clave):
+        filas = CarritoLinea.objects.filter(carrito__clave=clave).values_list(
+            "carrito_id", "producto_id", "precio", "cantidad", "nombre", "imagen_url"
+        )
+        lineas = {}
+        for carrito_id, producto_id, precio, cantidad, nombre, imagen_url in filas:
+            self._ids[clave] = carrito_id
+            lineas[str(producto_id)] = {"precio": precio, "cantidad": cantidad, "nombre": nombre, "imagen_url": imagen_url}
+        return lineas
+
+    def _resumen(self, clave):
+        fila = CarritoGuardado.objects.filter(clave=clave).values_list("pk", "cantidad_total", "subtotal").first()
+        if fila is None:
+            return calcular_resumen({})
+        self._ids[clave] = fila[0]
+        return {"cantidad": fila[1], "subtotal": fila[2]}
+
+    def _actualizar_resumen(self, carrito_id):
+        # Un solo UPDATE con subconsultas: el resumen queda consistente aunque haya escrituras concurrentes
+        lineas = CarritoLinea.objects.filter(carrito_id=OuterRef("pk")).order_by().values("carrito_id")
+        CarritoGuardado.objects.filter(pk=carrito_id).update(
+            cantidad_total=Coalesce(Subquery(lineas.annotate(total=Sum("cantidad")).values("total")), 0),
+            subtotal=Coalesce(Subquery(lineas.annotate(total=Sum(F("precio") * F("cantidad"))).values("total")), 0),
+            fecha_actualizacion=timezone.now(),
+        )
+
+    def _aplicar_cambios(self, clave, guardadas, eliminadas):
+        carrito_id = self._carrito_id(clave, crear=bool(guardadas))
+        if not carrito_id:
+            return
+        eliminadas = [int(producto_id) for producto_id in eliminadas if producto_id not in guardadas]
+        with transaction.atomic():
+            if eliminadas:
+                CarritoLinea.objects.filter(carrito_id=carrito_id, producto_id__in=eliminadas).delete()
+            if guardadas:
+                # INSERT ... ON CONFLICT DO UPDATE: una consulta para todas las líneas nuevas o modificadas
+                CarritoLinea.objects.bulk_create(
+                    [
+                        CarritoLinea(
+                            carrito_id=carrito_id,
+                            producto_id=int(producto_id),
+                            precio=int(item["precio"]),
+                            cantidad=item["cantidad"],
+                            nombre=item["nombre"],
+                            imagen_url=item.get("imagen_url") or "",
+                        )
+                        for producto_id, item in guardadas.items()
+                    ],
+                    update_conflicts=True,
+                    unique_fields=["carrito", "producto_id"],
+                    update_fields=["precio", "cantidad", "nombre", "imagen_url"],
+                )
+            self._actualizar_resumen(carrito_id)
+
+    def _vaciar(self, clave):
+        carrito_id = self._carrito_id(clave)
+        if carrito_id:
+            with transaction.atomic():
+                CarritoLinea.objects.filter(carrito_id=carrito_id).delete()
+                self._actualizar_resumen(carrito_id)
+
+    def _eliminar(self, clave):
+        CarritoLinea.objects.filter(carrito__clave=clave).delete()
+        CarritoGuardado.objects.filter(clave=clave).delete()
+        self._ids.pop(clave, None)
+
+
+class AlmacenamientoCache(AlmacenamientoCarrito):
+    # Una entrada de cache por línea más un índice de productos y el resumen
+
+    # Los carritos en cache duran lo mismo que la cookie de sesión
+    timeout = settings.SESSION_COOKIE_AGE
+
+    def _cargar(self, clave):
+        productos = cache.get(f"carrito:{clave}:productos") or []
+        lineas = cache.get_many([f"carrito:{clave}:linea:{producto_id}" for producto_id in productos])
+        return {
+            producto_id: lineas[f"carrito:{clave}:linea:{producto_id}"]
+            for producto_id in productos
+            if f"carrito:{clave}:linea:{producto_id}" in lineas
+        }
+
+    def _resumen(self, clave):
+        resumen = cache.get(f"carrito:{clave}:resumen")
+        return resumen if resumen is not None else calcular_resumen(self._cargar(clave))
+
+    def _aplicar_cambios(self, clave, guardadas, eliminadas):
+        lineas = self._cargar(clave)
+        productos = list(lineas)
+        borradas = [producto_id for producto_id in eliminadas if lineas.pop(producto_id, None) is not None]
+        lineas.update(guardadas)
+        valores = {f"carrito:{clave}:linea:{producto_id}": item for producto_id, item in guardadas.items()}
+        valores[f"carrito:{clave}:resumen"] = calcular_resumen(lineas)
+        # El índice de productos solo se reescribe si se agregaron o quitaron líneas
+        if list(lineas) != productos:
+            valores[f"carrito:{clave}:productos"] = list(lineas)
+        cache.set_many(valores, self.timeout)
+        borradas = [producto_id for producto_id in borradas if producto_id not in guardadas]
+        if borradas:
+            cache.delete_many([f"carrito:{clave}:linea:{producto_id}" for producto_id in borradas])
+
+    def _vaciar(self, clave):
+        self._eliminar(clave)
+
+    def _eliminar(self, clave):
+        productos = cache.get(f"carrito:{clave}:productos") or []
+        cache.delete_many([
+            f"carrito:{clave}:productos",
+            f"carrito:{clave}:resumen",
+            *(f"carrito:{clave}:linea:{producto_id}" for producto_id in productos),
+        ])
+
+
+@lru_cache(maxsize=None)
+def clase_almacenamiento(ruta):
+    return import_string(ruta)
+
+
+def obtener_almacenamiento(request):
+    return clase_almacenamiento(settings.CARRITO_ALMACENAMIENTO)(request)
+
+
+def fusionar_carrito_invitado(sender, request, user, **kwargs):
+    # Receptor de user_logged_in (CarritoConfig.ready): el carrito del invitado pasa al usuario
+    if request is not None and hasattr(request, "session"):
+        almacenamiento = obtener_almacenamiento(request)
+        almacenamiento.usuario = user
+        almacenamiento.fusionar_invitado()
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CarritoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.carrito'
+
+    def ready(self):
+        from django.contrib.auth.signals import user_logged_in
+
+        from .almacenamiento import fusionar_carrito_invitado
+
+        user_logged_in.connect(fusionar_carrito_invitado, dispatch_uid="carrito_fusionar_invitado")
@@ -1,18 +1,27 @@
+from functools import cached_property
+
 from apps.ventas.models import Producto
 
+from .almacenamiento import calcular_resumen, obtener_almacenamiento
+from .validacion import validar_carrito
+
+
 class Carrito():
     def __init__(self, request):
         self.session = request.session
+        # Sesión, base de datos o cache según settings.CARRITO_ALMACENAMIENTO (ver almacenamiento.py).
+        # Nada se lee hasta que se usa el carrito, y un carrito vacío no se guarda hasta la primera modificación
+        self.almacenamiento = obtener_almacenamiento(request)
 
-        # Obtener la llave de la sesión
-        carrito = self.session.get("session_key")
+    @cached_property
+    def carrito(self):
+        return self.almacenamiento.cargar()
 
-        # Si no existe, crear un carrito vacío
-        if 'session_key' not in request.session:
-            carrito = self.session['session_key'] = {}
-
-        # Verificar si el carrito existe en todos los pages
-        self.carrito = carrito
+    def get_resumen(self):
+        if "carrito" in self.__dict__:
+            # Con las líneas ya cargadas el resumen se calcula sin volver a consultar
+            return calcular_resumen(self.carrito)
+        return self.almacenamiento.resumen()
         
     def agregar(self, producto, cantidad=1):
         producto_id = str(producto.producto_id)
@@ -26,13 +35,13 @@ class Carrito():
                 "nombre": producto.nombre,
                 "imagen_url": producto.imagen_url or ""
             }
-        self.session.modified = True
+        self.almacenamiento.guardar_linea(producto_id, self.carrito[producto_id])
 
     def eliminar(self, producto_id):
         producto_id = str(producto_id)
         if producto_id in self.carrito:
             del self.carrito[producto_id]
-            self.session.modified = True
+            self.almacenamiento.eliminar_linea(producto_id)
 
     def actualizar_cantidad(self, producto_id, cantidad):
         producto_id = str(producto_id)
@@ -41,7 +50,41 @@ class Carrito():
                 self.eliminar(producto_id)
             else:
                 self.carrito[producto_id]['cantidad'] = cantidad
-                self.session.modified = True
+                self.almacenamiento.guardar_linea(producto_id, self.carrito[producto_id])
+
+    def aplicar_lote(self, operaciones, productos):
+        """Aplica en orden operaciones ya validadas ({"accion", "producto_id", "cantidad"}) y las guarda de una vez.
+
+        `productos` es {producto_id: Producto} con los productos que se agregan.
+        """
+        guardadas, eliminadas = {}, set()
+        for operacion in operaciones:
+            producto_id = str(operacion["producto_id"])
+            cantidad = operacion.get("cantidad", 1)
+            if operacion["accion"] == "agregar":
+                producto = productos[int(producto_id)]
+                if producto_id in self.carrito:
+                    self.carrito[producto_id]['cantidad'] += cantidad
+                else:
+                    self.carrito[producto_id] = {
+                        "precio": str(producto.precio),
+                        "cantidad": cantidad,
+                        "nombre": producto.nombre,
+                        "imagen_url": producto.imagen_url or ""
+                    }
+            elif producto_id not in self.carrito:
+                # Igual que actualizar_cantidad() y eliminar(): una línea que no está en el carrito se ignora
+                continue
+            elif operacion["accion"] == "actualizar" and cantidad > 0:
+                self.carrito[producto_id]['cantidad'] = cantidad
+            else:
+                del self.carrito[producto_id]
+                guardadas.pop(producto_id, None)
+                eliminadas.add(producto_id)
+                continue
+            guardadas[producto_id] = self.carrito[producto_id]
+            eliminadas.discard(producto_id)
+        self.almacenamiento.aplicar_cambios(guardadas, sorted(eliminadas))
 
     def get_productos(self):
         producto_ids = self.carrito.keys()
@@ -59,22 +102,33 @@ class Carrito():
                     self.carrito[producto_id]['cantidad'] = 1
                     self.carrito[producto_id]['nombre'] = producto.nombre
                     self.carrito[producto_id]['imagen_url'] = producto.imagen_url or ""
-                    self.session.modified = True
+                    self.almacenamiento.guardar_linea(producto_id, self.carrito[producto_id])
                 
                 producto.subtotal = int(self.carrito[producto_id]['precio']) * producto.cantidad_carrito
         
         return productos
 
+    def validar(self):
+        # Precio, stock y estado actuales de todas las líneas en una consulta (ver validacion.py)
+        return validar_carrito(self.carrito)
+
+    def actualizar_precios(self, validacion):
+        # Reemplaza los precios guardados que cambiaron; solo se escriben esas líneas
+        for cambio in validacion["cambios"]:
+            producto_id = str(cambio["producto_id"])
+            if cambio["tipo"] == "precio" and producto_id in self.carrito:
+                self.carrito[producto_id]["precio"] = cambio["actual"]
+                self.almacenamiento.guardar_linea(producto_id, self.carrito[producto_id])
+
     def get_total_productos(self):
-        return sum(item.get('cantidad', 1) for item in self.carrito.values())
+        return self.get_resumen()["cantidad"]
 
     def get_subtotal(self):
-        return sum(int(item['precio']) * item.get('cantidad', 1) for item in self.carrito.values())
+        return self.get_resumen()["subtotal"]
 
     def get_total(self, costo_envio=2990):
         return self.get_subtotal() + costo_envio
 
     def limpiar(self):
         self.carrito = {}
-        self.session['session_key'] = {}
-        self.session.modified = True
\ No newline at end of file
+        self.almacenamiento.vaciar()
\ No newline at end of file
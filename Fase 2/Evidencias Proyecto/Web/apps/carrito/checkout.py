@@ -0,0 +1,76 @@
+"""Checkout: Pedido, PedidoItem, stock y movimiento_stock en una transacción con los productos bloqueados."""
+
+from django.db import transaction
+from django.db.models import Case, F, When
+
+from apps.dashboard.kpis import invalidar_kpis
+from apps.ventas.cache_catalogo import catalogo_modificado
+from apps.ventas.models import MovimientoStock, Pedido, PedidoItem, Producto
+
+from .validacion import CAMPOS_VALIDACION, comparar_lineas
+
+
+def stock_vendido():
+    # Fragmentos, facetas en_stock, validación del carrito y KPIs dependen del stock recién descontado
+    catalogo_modificado()
+    invalidar_kpis()
+
+
+class PedidoRechazado(Exception):
+    def __init__(self, cambios):
+        super().__init__("El carrito cambió desde la última validación")
+        self.cambios = cambios
+
+
+def crear_pedido(lineas, cliente, direccion, costo_envio=0, notas=None):
+    """Crea el pedido para `lineas` ({producto_id: {"precio", "cantidad", ...}}, como Carrito.carrito).
+
+    `cliente` es el FK del pedido (p. ej. {"cliente_invitado": invitado}) y `direccion` los campos
+    calle, ciudad, region y codigo_postal. Lanza PedidoRechazado con los cambios si el carrito no es válido.
+    """
+    if not lineas:
+        raise PedidoRechazado([])
+    cantidades = {int(producto_id): item.get("cantidad", 1) for producto_id, item in lineas.items()}
+
+    # Transacción corta sin llamadas externas: el pago se registra después, con el pedido en 'Pendiente de pago'
+    with transaction.atomic():
+        # FOR UPDATE en orden de producto_id: checkouts concurrentes toman los locks en el mismo orden (sin
+        # deadlocks) y el segundo ve el stock ya descontado. Con las filas bloqueadas se vuelve a validar.
+        productos = list(
+
+            Producto.objects.select_for_update()
+            .filter(producto_id__in=cantidades)
+            .order_by("producto_id")
+            .only(*CAMPOS_VALIDACION)
+        )
+        validacion = comparar_lineas(lineas, productos)
+        if not validacion["valido"]:
+            raise PedidoRechazado(validacion["cambios"])
+
+        pedido = Pedido.objects.create(
+            **cliente,
+            **direccion,
+            total=validacion["subtotal"] + costo_envio,
+            notas=notas,
+        )
+        PedidoItem.objects.bulk_create(
+            PedidoItem(
+                pedido=pedido,
+                producto_id=linea["producto_id"],
+                cantidad=linea["cantidad_carrito"],
+                precio_unitario=linea["precio"],
+                subtotal=linea["subtotal"],
+            )
+            for linea in validacion["lineas"]
+        )
+        Producto.objects.filter(producto_id__in=cantidades).update(
+            stock=Case(*(When(producto_id=producto_id, then=F("stock") - cantidad) for producto_id, cantidad in cantidades.items()))
+        )
+        MovimientoStock.objects.bulk_create(
+            MovimientoStock(producto_id=producto_id, cantidad=-cantidad, tipo_operacion="venta")
+            for producto_id, cantidad in sorted(cantidades.items())
+        )
+        # Solo si la transacción confirma: un pedido rechazado o revertido no invalida nada
+        transaction.on_commit(stock_vendido)
+
+    return pedido
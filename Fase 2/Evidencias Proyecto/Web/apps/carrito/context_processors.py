@@ -1,4 +1,32 @@
+from functools import cached_property
+
 from .carrito import Carrito
 
+
+class CarritoPerezoso:
+    """Proxy del carrito para las plantillas: no lee la sesión hasta que una plantilla lo usa."""
+
+    def __init__(self, request):
+        self._request = request
+
+    @cached_property
+    def _carrito(self):
+        return Carrito(self._request)
+
+    @property
+    def total_productos(self):
+        return self._carrito.get_resumen()["cantidad"]
+
+    @property
+    def subtotal(self):
+        return self._carrito.get_resumen()["subtotal"]
+
+    def __getattr__(self, nombre):
+        # Compatibilidad con plantillas que usan los métodos de Carrito (get_productos, get_total...)
+        if nombre.startswith("_"):
+            raise AttributeError(nombre)
+        return getattr(self._carrito, nombre)
+
+
 def carrito(request):
-    return {'carrito': Carrito(request)}
\ No newline at end of file
+    return {'carrito': CarritoPerezoso(request)}
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarritoGuardado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, unique=True)),
+                ('cantidad_total', models.PositiveIntegerField(default=0)),
+                ('subtotal', models.PositiveIntegerField(default=0)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'carrito',
+                'indexes': [models.Index(fields=['fecha_actualizacion'], name='idx_carrito_actualizacion')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CarritoLinea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('producto_id', models.IntegerField()),
+                ('cantidad', models.PositiveIntegerField(default=1)),
+                ('precio', models.PositiveIntegerField()),
+                ('nombre', models.CharField(max_length=50)),
+                ('imagen_url', models.TextField(blank=True, default='')),
+                ('carrito', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lineas', to='carrito.carritoguardado')),
+            ],
+            options={
+                'db_table': 'carrito_linea',
+                'constraints': [models.UniqueConstraint(fields=('carrito', 'producto_id'), name='uq_carrito_linea_producto')],
+            },
+        ),
+    ]
@@ -1,3 +1,50 @@
 from django.db import models
 
-# Create your models here.
+
+class CarritoGuardadoQuerySet(models.QuerySet):
+    def abandonados(self, desde):
+        # Carritos con productos que no se modifican desde `desde` (usa idx_carrito_actualizacion)
+        return self.filter(fecha_actualizacion__lt=desde, cantidad_total__gt=0)
+
+
+class CarritoGuardado(models.Model):
+    """Carrito persistido por apps.carrito.almacenamiento.AlmacenamientoBaseDatos."""
+
+    # "sesion:<token>" para invitados o "usuario:<id>" para usuarios autenticados
+    clave = models.CharField(max_length=64, unique=True)
+    # Resumen desnormalizado para el contador del header (se recalcula en cada cambio de línea)
+    cantidad_total = models.PositiveIntegerField(default=0)
+    subtotal = models.PositiveIntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    objects = CarritoGuardadoQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'carrito'
+        indexes = [
+            models.Index(fields=['fecha_actualizacion'], name='idx_carrito_actualizacion'),
+        ]
+
+    def __str__(self):
+        return f"Carrito {self.clave} ({self.cantidad_total} productos)"
+
+
+class CarritoLinea(models.Model):
+    carrito = models.ForeignKey(CarritoGuardado, on_delete=models.CASCADE, related_name='lineas')
+    # Sin FK: producto es una tabla managed=False de apps.ventas creada por los scripts SQL
+    producto_id = models.IntegerField()
+    cantidad = models.PositiveIntegerField(default=1)
+    # Precio al momento de agregar, igual que el carrito en sesión
+    precio = models.PositiveIntegerField()
+    nombre = models.CharField(max_length=50)
+    imagen_url = models.TextField(blank=True, default='')
+
+    class Meta:
+        db_table = 'carrito_linea'
+        constraints = [
+            models.UniqueConstraint(fields=['carrito', 'producto_id'], name='uq_carrito_linea_producto'),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre} x{self.cantidad}"
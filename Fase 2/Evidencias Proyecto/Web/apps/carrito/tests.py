@@ -1,3 +1,294 @@
-from django.test import TestCase
+"""Pruebas del carrito: almacenamientos, contexto de plantillas, validación, operaciones en lote y checkout."""
 
-# Create your tests here.
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import RequestFactory
+
+from apps.dashboard.kpis import CLAVE_KPIS
+from apps.ventas.cache_catalogo import catalogo_modificado, version_catalogo
+from apps.ventas.models import Categoria, MovimientoStock, Pedido, PedidoItem, Producto, SesionInvitado
+from apps.ventas.tests import VentasTestCase
+
+from .checkout import PedidoRechazado, crear_pedido
+from .context_processors import carrito as carrito_contexto
+from .validacion import validar_carrito
+
+DIRECCION = {"calle": "Av. Siempre Viva 742", "ciudad": "Santiago", "region": "RM", "codigo_postal": 7500}
+
+
+class CheckoutTests(VentasTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Alimentos", slug="alimentos")
+        cls.invitado = SesionInvitado.objects.create(
+            session_id="prueba-checkout",
+            nombres="Ana",
+            apellido_paterno="Rojas",
+            email="ana@example.com",
+            telefono="912345678",
+            calle_envio=DIRECCION["calle"],
+            ciudad_envio=DIRECCION["ciudad"],
+            region_envio=DIRECCION["region"],
+            codigo_postal_envio=DIRECCION["codigo_postal"],
+        )
+        cls.alimento = Producto.objects.create(categoria=categoria, sku="ALI-1", nombre="Alimento", precio=12990, stock=5)
+        cls.collar = Producto.objects.create(categoria=categoria, sku="COL-1", nombre="Collar", precio=4990, stock=2)
+
+    def lineas(self, *items):
+        return {str(producto.producto_id): {"precio": precio, "cantidad": cantidad} for producto, precio, cantidad in items}
+
+    def pedir(self, lineas):
+        return crear_pedido(lineas, {"cliente_invitado": self.invitado}, DIRECCION, costo_envio=3000)
+
+    def stock(self, producto):
+        return Producto.objects.values_list("stock", flat=True).get(pk=producto.pk)
+
+    def assertSinEscrituras(self):
+        self.assertFalse(Pedido.objects.exists())
+        self.assertFalse(PedidoItem.objects.exists())
+        self.assertFalse(MovimientoStock.objects.exists())
+        self.assertEqual(self.stock(self.alimento), 5)
+        self.assertEqual(self.stock(self.collar), 2)
+
+    def test_precio_cambiado_rechaza_sin_escribir(self):
+        lineas = self.lineas((self.alimento, 12990, 1), (self.collar, 3990, 1))
+
+        with self.assertRaises(PedidoRechazado) as contexto:
+            self.pedir(lineas)
+
+        self.assertEqual(
+            [(c["producto_id"], c["tipo"], c["anterior"], c["actual"]) for c in contexto.exception.cambios],
+            [(self.collar.producto_id, "precio", 3990, 4990)],
+        )
+        self.assertSinEscrituras()
+
+    def test_stock_insuficiente_rechaza_sin_escribir(self):
+        lineas = self.lineas((self.alimento, 12990, 1), (self.collar, 4990, 3))
+
+        with self.assertRaises(PedidoRechazado) as contexto:
+            self.pedir(lineas)
+
+        self.assertEqual([c["tipo"] for c in contexto.exception.cambios], ["stock_insuficiente"])
+        self.assertSinEscrituras()
+
+    def test_pedido_descuenta_el_stock_registrado_en_movimientos(self):
+        lineas = self.lineas((self.alimento, 12990, 3), (self.collar, 4990, 2))
+
+        pedido = self.pedir(lineas)
+
+        self.assertEqual(pedido.total, 3 * 12990 + 2 * 4990 + 3000)
+        self.assertEqual(
+            sorted(pedido.items.values_list("producto_id", "cantidad", "precio_unitario", "subtotal")),
+            sorted([(self.alimento.producto_id, 3, 12990, 38970), (self.collar.producto_id, 2, 4990, 9980)]),
+        )
+        for producto, stock_inicial in ((self.alimento, 5), (self.collar, 2)):
+            movimientos = MovimientoStock.objects.filter(producto=producto)
+            self.assertEqual(set(movimientos.values_list("tipo_operacion", flat=True)), {"venta"})
+            descontado = stock_inicial - self.stock(producto)
+            self.assertEqual(descontado, -movimientos.aggregate(total=Sum("cantidad"))["total"])
+            self.assertEqual(descontado, lineas[str(producto.producto_id)]["cantidad"])
+
+    def test_pedido_confirmado_invalida_catalogo_y_kpis(self):
+        version = version_catalogo()
+        cache.set(CLAVE_KPIS, {"productos_stock_bajo": 0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pedir(self.lineas((self.collar, 4990, 2)))
+
+        self.assertNotEqual(version_catalogo(), version)
+        self.assertIsNone(cache.get(CLAVE_KPIS))
+
+    def test_pedido_rechazado_no_invalida_catalogo(self):
+        version = version_catalogo()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, self.assertRaises(PedidoRechazado):
+            self.pedir(self.lineas((self.collar, 4990, 3)))
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(version_catalogo(), version)
+
+
+class CarritoTestCase(VentasTestCase):
+    BACKENDS = (
+        "apps.carrito.almacenamiento.AlmacenamientoSesion",
+        "apps.carrito.almacenamiento.AlmacenamientoBaseDatos",
+        "apps.carrito.almacenamiento.AlmacenamientoCache",
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Alimentos", slug="alimentos")
+        cls.alimento = Producto.objects.create(categoria=categoria, sku="ALI-1", nombre="Alimento", precio=12990, stock=5)
+        cls.collar = Producto.objects.create(categoria=categoria, sku="COL-1", nombre="Collar", precio=4990, stock=2)
+
+    def agregar(self, producto, cantidad):
+        respuesta = self.client.post("/carrito/add/", {"action": "post", "producto_id": producto.producto_id, "cantidad": cantidad})
+        return respuesta.json()["total_productos"]
+
+    def lineas(self):
+        respuesta = self.client.get("/carrito/")
+        return {linea["producto_id"]: linea["cantidad_carrito"] for linea in respuesta.context["productos_carrito"]}
+
+
+class AlmacenamientoTests(CarritoTestCase):
+    def test_cada_almacenamiento_guarda_y_elimina_lineas(self):
+        for ruta in self.BACKENDS:
+            with self.subTest(almacenamiento=ruta), self.settings(CARRITO_ALMACENAMIENTO=ruta):
+                self.client = self.client_class()
+                self.assertEqual(self.agregar(self.alimento, 2), 2)
+                self.assertEqual(self.agregar(self.collar, 1), 3)
+                self.client.post("/carrito/remove/", {"action": "post", "producto_id": self.collar.producto_id})
+
+                self.assertEqual(self.lineas(), {self.alimento.producto_id: 2})
+
+    def test_login_fusiona_el_carrito_del_invitado_con_el_del_usuario(self):
+        for ruta in self.BACKENDS[1:]:
+            with self.subTest(almacenamiento=ruta), self.settings(CARRITO_ALMACENAMIENTO=ruta):
+                self.client = self.client_class()
+                usuario = User.objects.create_user(ruta.rsplit(".", 1)[1])
+                self.client.force_login(usuario)
+                self.agregar(self.alimento, 1)
+                self.client.logout()
+
+                self.agregar(self.alimento, 2)
+                self.agregar(self.collar, 1)
+                self.client.force_login(usuario)
+
+                self.assertEqual(self.lineas(), {self.alimento.producto_id: 3, self.collar.producto_id: 1})
+                # El carrito es del usuario: al cerrar sesión el invitado parte vacío
+                self.client.logout()
+                self.assertEqual(self.lineas(), {})
+
+    def test_sesion_conserva_el_carrito_del_invitado_al_iniciar_sesion(self):
+        self.agregar(self.collar, 2)
+
+        self.client.force_login(User.objects.create_user("cliente"))
+
+        self.assertEqual(self.lineas(), {self.collar.producto_id: 2})
+
+
+class LoteCarritoTests(CarritoTestCase):
+    def lote(self, *operaciones):
+        return self.client.post("/carrito/batch/", json.dumps({"operaciones": list(operaciones)}), content_type="application/json")
+
+    def test_lote_valido_aplica_todas_las_operaciones(self):
+        for ruta in self.BACKENDS:
+            with self.subTest(almacenamiento=ruta), self.settings(CARRITO_ALMACENAMIENTO=ruta):
+                self.client = self.client_class()
+                self.agregar(self.collar, 1)
+
+                respuesta = self.lote(
+                    {"accion": "agregar", "producto_id": self.alimento.producto_id, "cantidad": 2},
+                    {"accion": "agregar", "producto_id": self.alimento.producto_id},
+                    {"accion": "eliminar", "producto_id": self.collar.producto_id},
+                )
+
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(respuesta.json()["total_productos"], 3)
+                self.assertEqual(self.lineas(), {self.alimento.producto_id: 3})
+
+    def test_una_operacion_invalida_rechaza_el_lote_completo(self):
+        inactivo = Producto.objects.create(
+            categoria=self.alimento.categoria, sku="DESC-1", nombre="Descontinuado", precio=990, stock=1, estado_producto="inactivo"
+        )
+        for ruta in self.BACKENDS:
+            with self.subTest(almacenamiento=ruta), self.settings(CARRITO_ALMACENAMIENTO=ruta):
+                self.client = self.client_class()
+                self.agregar(self.collar, 1)
+
+                respuesta = self.lote(
+                    {"accion": "agregar", "producto_id": self.alimento.producto_id, "cantidad": 2},
+                    {"accion": "eliminar", "producto_id": self.collar.producto_id},
+                    {"accion": "agregar", "producto_id": inactivo.producto_id},
+                    {"accion": "vaciar", "producto_id": self.alimento.producto_id},
+                    {"accion": "agregar", "producto_id": self.collar.producto_id, "cantidad": 0},
+                )
+
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual([error["indice"] for error in respuesta.json()["errores"]], [2, 3, 4])
+                self.assertEqual(self.lineas(), {self.collar.producto_id: 1})
+
+    def test_cuerpo_invalido_o_metodo_distinto_de_post(self):
+        self.assertEqual(self.client.post("/carrito/batch/", "no es json", content_type="application/json").status_code, 400)
+        self.assertEqual(self.lote().status_code, 400)
+        self.assertEqual(self.client.get("/carrito/batch/").status_code, 405)
+
+
+class CarritoContextoTests(CarritoTestCase):
+    def test_proxy_no_lee_la_sesion_hasta_que_la_plantilla_lo_usa(self):
+        request = RequestFactory().get("/")
+        request.session = SessionStore()
+
+        contexto = carrito_contexto(request)
+
+        self.assertNotIn("_carrito", vars(contexto["carrito"]))
+        self.assertFalse(request.session.accessed)
+        self.assertEqual(contexto["carrito"].total_productos, 0)
+        self.assertTrue(request.session.accessed)
+
+    def test_badge_muestra_el_resumen_sin_crear_sesion_para_visitantes(self):
+        respuesta = self.client.get("/catalogo/")
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, respuesta.cookies)
+
+        self.agregar(self.alimento, 2)
+        self.agregar(self.collar, 1)
+
+        self.assertContains(self.client.get("/catalogo/"), 'cart-count">3<')
+
+
+class ValidacionCarritoTests(CarritoTestCase):
+    def linea(self, precio, cantidad):
+        return {"precio": precio, "cantidad": cantidad, "nombre": "", "imagen_url": ""}
+
+    def test_una_consulta_detecta_todos_los_cambios(self):
+        agotado = Producto.objects.create(categoria=self.alimento.categoria, sku="AGO-1", nombre="Agotado", precio=990, stock=0)
+        inactivo = Producto.objects.create(
+            categoria=self.alimento.categoria, sku="INA-1", nombre="Inactivo", precio=990, stock=9, estado_producto="inactivo"
+        )
+        lineas = {
+            str(self.alimento.pk): self.linea(11990, 1),
+            str(self.collar.pk): self.linea(4990, 3),
+            str(agotado.pk): self.linea(990, 1),
+            str(inactivo.pk): self.linea(990, 1),
+            "99999": self.linea(500, 1),
+        }
+
+        with self.assertNumQueries(1):
+            validacion = validar_carrito(lineas)
+
+        self.assertFalse(validacion["valido"])
+        self.assertEqual([(c["producto_id"], c["tipo"], c["anterior"], c["actual"]) for c in validacion["cambios"]], [
+            (self.alimento.pk, "precio", 11990, 12990),
+            (self.collar.pk, "stock_insuficiente", 3, 2),
+            (agotado.pk, "sin_stock", 1, 0),
+            (inactivo.pk, "inactivo", None, None),
+            (99999, "inactivo", None, None),
+        ])
+        self.assertEqual(validacion["subtotal"], 12990 + 3 * 4990 + 990 + 990 + 500)
+
+    def test_resultado_en_cache_hasta_que_cambia_el_catalogo(self):
+        lineas = {str(self.collar.pk): self.linea(4990, 2)}
+        self.assertTrue(validar_carrito(lineas)["valido"])
+        Producto.objects.filter(pk=self.collar.pk).update(stock=1)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(validar_carrito(lineas)["valido"])
+        catalogo_modificado()
+        self.assertEqual([c["tipo"] for c in validar_carrito(lineas)["cambios"]], ["stock_insuficiente"])
+
+    def test_ver_carrito_actualiza_los_precios_cambiados(self):
+        self.agregar(self.alimento, 1)
+        Producto.objects.filter(pk=self.alimento.pk).update(precio=10990)
+        catalogo_modificado()
+
+        primera = self.client.get("/carrito/")
+        segunda = self.client.get("/carrito/")
+
+        self.assertEqual([c["tipo"] for c in primera.context["cambios_carrito"]], ["precio"])
+        self.assertEqual(primera.context["subtotal"], 10990)
+        self.assertEqual(segunda.context["cambios_carrito"], [])
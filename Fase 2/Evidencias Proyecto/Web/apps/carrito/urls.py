@@ -8,4 +8,7 @@ urlpatterns = [
     path("add/", views.agregar_carrito, name="agregar_al_carrito"),
     path("remove/", views.eliminar_carrito, name="eliminar_del_carrito"),
     path("update/", views.actualizar_carrito, name="actualizar_el_carrito"),
+    path("batch/", views.lote_carrito, name="lote_carrito"),
+    path("checkout/", views.checkout, name="checkout"),
+    path("pedido/<int:pedido_id>/", views.pedido_confirmado, name="pedido_confirmado"),
 ]
@@ -0,0 +1,91 @@
+"""Validación del carrito contra el catálogo con una sola consulta, en cache por contenido del carrito
+y versión del catálogo."""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+
+from apps.ventas.cache_catalogo import TIMEOUT_CATALOGO, version_catalogo
+from apps.ventas.models import Producto
+
+CAMPOS_VALIDACION = ("producto_id", "precio", "stock", "estado_producto")
+
+
+def clave_validacion(lineas):
+    # Cada pedido confirmado cambia la versión del catálogo (checkout.stock_vendido)
+    contenido = json.dumps(
+        sorted((producto_id, int(item["precio"]), item.get("cantidad", 1)) for producto_id, item in lineas.items()),
+        separators=(",", ":"),
+    )
+    resumen = hashlib.sha1(contenido.encode()).hexdigest()
+    return f"carrito:validacion:{version_catalogo()}:{resumen}"
+
+
+def calcular_validacion(lineas):
+    productos = Producto.objects.filter(producto_id__in=[int(producto_id) for producto_id in lineas]).only(*CAMPOS_VALIDACION)
+    return comparar_lineas(lineas, productos)
+
+
+def comparar_lineas(lineas, productos):
+    # También la usa checkout.py con las filas bloqueadas (SELECT ... FOR UPDATE). Tipos de cambio:
+    # "precio", "sin_stock", "stock_insuficiente" e "inactivo" (inactivo, eliminado o inexistente)
+    por_id = {str(producto.producto_id): producto for producto in productos}
+
+    validadas, cambios = [], []
+    for producto_id, item in lineas.items():
+        cantidad = item.get("cantidad", 1)
+        precio_carrito = int(item["precio"])
+        producto = por_id.get(producto_id)
+        activo = producto is not None and producto.estado_producto == "activo"
+        precio = producto.precio if producto is not None else precio_carrito
+        stock = producto.stock if producto is not None else 0
+
+        def cambio(tipo, anterior=None, actual=None):
+            cambios.append({
+                "producto_id": int(producto_id),
+                "nombre": item.get("nombre", ""),
+                "tipo": tipo,
+                "anterior": anterior,
+                "actual": actual,
+            })
+
+        if not activo:
+            cambio("inactivo")
+        else:
+            if precio != precio_carrito:
+                cambio("precio", precio_carrito, precio)
+            if stock <= 0:
+                cambio("sin_stock", cantidad, 0)
+            elif stock < cantidad:
+                cambio("stock_insuficiente", cantidad, stock)
+
+        validadas.append({
+            "producto_id": int(producto_id),
+            "nombre": item.get("nombre", ""),
+            "imagen_url": item.get("imagen_url", ""),
+            "precio": precio,
+            "precio_carrito": precio_carrito,
+            "stock": stock,
+            "cantidad_carrito": cantidad,
+            "subtotal": precio * cantidad,
+            "disponible": activo and stock >= cantidad,
+        })
+
+    return {
+        "lineas": validadas,
+        "cambios": cambios,
+        "subtotal": sum(linea["subtotal"] for linea in validadas),
+        "valido": not cambios,
+    }
+
+
+def validar_carrito(lineas):
+    if not lineas:
+        return {"lineas": [], "cambios": [], "subtotal": 0, "valido": True}
+    clave = clave_validacion(lineas)
+    validacion = cache.get(clave)
+    if validacion is None:
+        validacion = calcular_validacion(lineas)
+        cache.set(clave, validacion, TIMEOUT_CATALOGO)
+    return validacion
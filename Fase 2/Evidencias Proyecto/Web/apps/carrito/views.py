@@ -1,21 +1,43 @@
-from django.shortcuts import render, get_object_or_404
+import json
+
+from django.shortcuts import render, get_object_or_404, redirect
 from .carrito import Carrito
-from apps.ventas.models import Producto
-from django.http import JsonResponse
+from .checkout import PedidoRechazado, crear_pedido
+from apps.ventas.models import Pedido, Producto, SesionInvitado
+from django.http import Http404, JsonResponse
+
+ACCIONES_LOTE = ("agregar", "actualizar", "eliminar")
+MAX_OPERACIONES_LOTE = 100
+COSTO_ENVIO = 2990
+# Datos del invitado y de despacho: (campo, largo máximo, obligatorio)
+CAMPOS_CHECKOUT = (
+    ("nombres", 25, True),
+    ("apellido_paterno", 25, True),
+    ("apellido_materno", 25, False),
+    ("email", 50, True),
+    ("telefono", 10, True),
+    ("calle", 50, True),
+    ("ciudad", 50, True),
+    ("region", 50, True),
+    ("codigo_postal", 5, True),
+)
 
 def ver_carrito(request):
     carrito = Carrito(request)
-    productos_carrito = carrito.get_productos()
-    subtotal = carrito.get_subtotal()
-    costo_envio = 2990
-    total = carrito.get_total(costo_envio)
+    # Líneas con precio y stock actuales; los precios que cambiaron se actualizan en el carrito
+    validacion = carrito.validar()
+    carrito.actualizar_precios(validacion)
+    subtotal = validacion["subtotal"]
+    costo_envio = COSTO_ENVIO
+    total = subtotal + costo_envio
     
     context = {
-        "productos_carrito": productos_carrito,
+        "productos_carrito": validacion["lineas"],
+        "cambios_carrito": validacion["cambios"],
         "subtotal": subtotal,
         "costo_envio": costo_envio,
         "total": total,
-        "carrito_vacio": len(productos_carrito) == 0
+        "carrito_vacio": len(validacion["lineas"]) == 0
     }
     return render(request, "carrito/ver_carrito.html", context)
 
@@ -55,4 +77,147 @@ def actualizar_carrito(request):
             "total_productos": carrito.get_total_productos(),
             "subtotal": carrito.get_subtotal(),
             "total": carrito.get_total()
-        })
\ No newline at end of file
+        })
+
+def leer_operaciones(datos):
+    """Valida la forma de cada operación del lote; devuelve (operaciones, errores)."""
+    operaciones, errores = [], []
+    for indice, operacion in enumerate(datos):
+        try:
+            accion = operacion["accion"]
+            producto_id = int(operacion["producto_id"])
+            cantidad = int(operacion.get("cantidad", 1))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            errores.append({"indice": indice, "error": "Se espera {accion, producto_id, cantidad}"})
+            continue
+        if accion not in ACCIONES_LOTE:
+            errores.append({"indice": indice, "error": f"Acción inválida: {accion}"})
+        elif accion == "agregar" and cantidad < 1:
+            errores.append({"indice": indice, "error": "La cantidad debe ser mayor que 0"})
+        else:
+            operaciones.append({"indice": indice, "accion": accion, "producto_id": producto_id, "cantidad": cantidad})
+    return operaciones, errores
+
+def lote_carrito(request):
+    """Aplica varias operaciones del carrito en una petición: se guardan todas o ninguna.
+
+    Cuerpo JSON: {"operaciones": [{"accion": "agregar"|"actualizar"|"eliminar", "producto_id": 1, "cantidad": 2}, ...]}
+    """
+    if request.method != "POST":
+        return JsonResponse({"success": False, "errores": [{"error": "Método no permitido"}]}, status=405)
+    try:
+        datos = json.loads(request.body)["operaciones"]
+    except (ValueError, KeyError, TypeError):
+        datos = None
+    if not isinstance(datos, list) or not 0 < len(datos) <= MAX_OPERACIONES_LOTE:
+        return JsonResponse({
+            "success": False,
+            "errores": [{"error": f"Se espera {{\"operaciones\": [...]}} con 1 a {MAX_OPERACIONES_LOTE} operaciones"}],
+        }, status=400)
+
+    operaciones, errores = leer_operaciones(datos)
+    # Todos los productos que se agregan se validan en una sola consulta
+    ids_agregar = {operacion["producto_id"] for operacion in operaciones if operacion["accion"] == "agregar"}
+    productos = Producto.objects.filter(estado_producto="activo").only(
+        "producto_id", "nombre", "precio", "imagen_url"
+    ).in_bulk(ids_agregar) if ids_agregar else {}
+    for operacion in operaciones:
+        if operacion["accion"] == "agregar" and operacion["producto_id"] not in productos:
+            errores.append({"indice": operacion["indice"], "error": "Producto no disponible"})
+    if errores:
+        return JsonResponse({"success": False, "errores": sorted(errores, key=lambda error: error["indice"])}, status=400)
+
+    carrito = Carrito(request)
+    carrito.aplicar_lote(operaciones, productos)
+    return JsonResponse({
+        "success": True,
+        "total_productos": carrito.get_total_productos(),
+        "subtotal": carrito.get_subtotal(),
+        "total": carrito.get_total()
+    })
+
+def validar_datos_checkout(datos):
+    errores = []
+    for campo, largo, obligatorio in CAMPOS_CHECKOUT:
+        if obligatorio and not datos[campo]:
+            errores.append(f"El campo {campo.replace('_', ' ')} es obligatorio")
+        elif len(datos[campo]) > largo:
+            errores.append(f"El campo {campo.replace('_', ' ')} admite hasta {largo} caracteres")
+    if datos["email"] and "@" not in datos["email"]:
+        errores.append("El email no es válido")
+    # codigo_postal es SMALLINT en sesion_invitado y pedido
+    if datos["codigo_postal"] and not (datos["codigo_postal"].isdigit() and int(datos["codigo_postal"]) <= 32767):
+        errores.append("El código postal no es válido")
+    return errores
+
+def checkout(request):
+    carrito = Carrito(request)
+    validacion = carrito.validar()
+    if not validacion["lineas"]:
+        return redirect("carrito:ver_carrito")
+
+    datos = {campo: request.POST.get(campo, "").strip() for campo, _, _ in CAMPOS_CHECKOUT}
+    errores = []
+    status = 200
+    if request.method == "POST":
+        errores = validar_datos_checkout(datos)
+        status = 400
+        if not errores:
+            if request.session.session_key is None:
+                request.session.save()
+            invitado, _ = SesionInvitado.objects.update_or_create(
+                session_id=request.session.session_key,
+                defaults={
+                    "nombres": datos["nombres"],
+                    "apellido_paterno": datos["apellido_paterno"],
+                    "apellido_materno": datos["apellido_materno"] or None,
+                    "email": datos["email"],
+                    "telefono": datos["telefono"],
+                    "calle_envio": datos["calle"],
+                    "ciudad_envio": datos["ciudad"],
+                    "region_envio": datos["region"],
+                    "codigo_postal_envio": int(datos["codigo_postal"]),
+                },
+            )
+            try:
+                pedido = crear_pedido(
+                    carrito.carrito,
+                    cliente={"cliente_invitado": invitado},
+                    direccion={
+                        "calle": datos["calle"],
+                        "ciudad": datos["ciudad"],
+                        "region": datos["region"],
+                        "codigo_postal": int(datos["codigo_postal"]),
+                    },
+                    costo_envio=COSTO_ENVIO,
+                )
+            except PedidoRechazado as rechazo:
+                # Se muestran los cambios (precio, stock, disponibilidad) y el carrito toma los precios actuales
+                carrito.actualizar_precios({"cambios": rechazo.cambios})
+                validacion = {**carrito.validar(), "cambios": rechazo.cambios}
+                status = 409
+            else:
+                carrito.limpiar()
+                request.session["ultimo_pedido"] = pedido.pedido_id
+                return redirect("carrito:pedido_confirmado", pedido_id=pedido.pedido_id)
+
+    context = {
+        "datos": datos,
+        "errores": errores,
+        "productos_carrito": validacion["lineas"],
+        "cambios_carrito": validacion["cambios"],
+        "subtotal": validacion["subtotal"],
+        "costo_envio": COSTO_ENVIO,
+        "total": validacion["subtotal"] + COSTO_ENVIO,
+    }
+    return render(request, "carrito/checkout.html", context, status=status)
+
+def pedido_confirmado(request, pedido_id):
+    # Solo la sesión que hizo el pedido puede ver la confirmación
+    if request.session.get("ultimo_pedido") != pedido_id:
+        raise Http404("Pedido no encontrado")
+    pedido = get_object_or_404(Pedido, pedido_id=pedido_id)
+    items = pedido.items.select_related("producto").only(
+        "cantidad", "precio_unitario", "subtotal", "pedido_id", "producto__nombre"
+    )
+    return render(request, "carrito/pedido_confirmado.html", {"pedido": pedido, "items": items})
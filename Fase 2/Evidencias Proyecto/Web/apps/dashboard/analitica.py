@@ -0,0 +1,213 @@
+"""Analítica de ventas desde los resúmenes diarios (venta_diaria, pedido_diario_estado); los días aún
+no resumidos se calculan en vivo."""
+
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.ventas.models import Categoria, Marca, Pedido, PedidoItem, Producto
+
+from .models import PedidoDiarioEstado, VentaDiaria
+
+# Orden del enum estado_pedido
+ESTADOS_PEDIDO = (
+    'Pendiente de pago', 'Procesando', 'Despachado', 'Entregado', 'Entrega fallida', 'Cancelado', 'Reembolsado',
+)
+# Ventas = pedidos fuera de estos estados; ingresos = suma de subtotales de los ítems, sin envío.
+# El embudo de estados incluye todos los pedidos.
+ESTADOS_SIN_VENTA = ('Cancelado', 'Reembolsado')
+
+# Días ya resumidos que se recalculan para recoger cambios de estado recientes (cancelaciones, reembolsos)
+DIAS_REVISION = 14
+# Días recalculados por transacción (borrar e insertar el bloque)
+DIAS_POR_BLOQUE = 31
+
+
+# dimensión -> campo de pedido_item con la clave (None: una fila por día)
+DIMENSIONES = {
+    'total': None,
+    'producto': 'producto_id',
+    'categoria': 'producto__categoria_id',
+    'marca': 'producto__marca_id',
+}
+MODELOS_DIMENSION = {'producto': Producto, 'categoria': Categoria, 'marca': Marca}
+
+
+def rango_fechas(desde, hasta):
+    # Días locales [desde, hasta] como datetimes para usar idx_pedido_fecha
+    inicio = timezone.make_aware(datetime.combine(desde, time.min))
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+    return inicio, fin
+
+
+def calcular_ventas(desde, hasta, dimensiones=DIMENSIONES):
+    # Filas de VentaDiaria sin guardar: una consulta agrupada por dimensión
+    inicio, fin = rango_fechas(desde, hasta)
+    items = (
+        PedidoItem.objects.filter(pedido__fecha__gte=inicio, pedido__fecha__lt=fin)
+        .exclude(pedido__estado__in=ESTADOS_SIN_VENTA)
+        .annotate(dia=TruncDate('pedido__fecha'))
+        .order_by()
+    )
+    filas = []
+    for dimension in dimensiones:
+        campo = DIMENSIONES[dimension]
+        grupos = items.values('dia', *([campo] if campo else [])).annotate(
+            total_pedidos=Count('pedido_id', distinct=True),
+            total_unidades=Sum('cantidad'),
+            total_ingresos=Sum('subtotal'),
+        )
+        filas.extend(
+            VentaDiaria(
+                fecha=grupo['dia'],
+                dimension=dimension,
+                clave=(grupo[campo] or 0) if campo else 0,
+                pedidos=grupo['total_pedidos'],
+                unidades=grupo['total_unidades'],
+                ingresos=grupo['total_ingresos'],
+            )
+            for grupo in grupos
+        )
+    return filas
+
+
+def calcular_estados(desde, hasta):
+    inicio, fin = rango_fechas(desde, hasta)
+    grupos = (
+        Pedido.objects.filter(fecha__gte=inicio, fecha__lt=fin)
+        .annotate(dia=TruncDate('fecha'))
+        .order_by()
+        .values('dia', 'estado')
+        .annotate(total_pedidos=Count('pedido_id'), monto=Sum('total'))
+    )
+    return [
+        PedidoDiarioEstado(fecha=grupo['dia'], estado=grupo['estado'], pedidos=grupo['total_pedidos'], total=grupo['monto'])
+        for grupo in grupos
+    ]
+
+
+def ultimo_dia_resumido():
+    # Todo día con pedidos tiene filas en pedido_diario_estado, aunque no tenga ventas
+    return PedidoDiarioEstado.objects.aggregate(ultimo=Max('fecha'))['ultimo']
+
+
+def actualizar_resumenes(desde=None, hasta=None):
+    """Recalcula los resúmenes de los días cerrados [desde, hasta]; hasta es como máximo ayer.
+
+    Devuelve (desde, hasta) efectivos, o None si no hay nada que resumir.
+    """
+    # Hoy nunca se resume: sigue recibiendo pedidos y las consultas lo calculan en vivo
+    ayer = timezone.localdate() - timedelta(days=1)
+    hasta = min(hasta, ayer) if hasta else ayer
+    if desde is None:
+        ultimo = ultimo_dia_resumido()
+        if ultimo is not None:
+            desde = ultimo - timedelta(days=DIAS_REVISION)
+        else:
+            primero = Pedido.objects.aggregate(primero=Min('fecha'))['primero']
+            if primero is None:
+                return None
+            desde = timezone.localdate(primero)
+    if desde > hasta:
+        return None
+
+    inicio = desde
+    while inicio <= hasta:
+        fin = min(inicio + timedelta(days=DIAS_POR_BLOQUE - 1), hasta)
+        ventas, estados = calcular_ventas(inicio, fin), calcular_estados(inicio, fin)
+        with transaction.atomic():
+            VentaDiaria.objects.filter(fecha__range=(inicio, fin)).delete()
+            PedidoDiarioEstado.objects.filter(fecha__range=(inicio, fin)).delete()
+            VentaDiaria.objects.bulk_create(ventas, batch_size=1000)
+            PedidoDiarioEstado.objects.bulk_create(estados, batch_size=1000)
+        inicio = fin + timedelta(days=1)
+    return desde, hasta
+
+
+def _tramos(desde, hasta):
+    # (rango resumido o None, rango en vivo o None) para los días [desde, hasta]
+    ultimo = ultimo_dia_resumido()
+    resumido = (desde, min(hasta, ultimo)) if ultimo is not None and desde <= ultimo else None
+    inicio_vivo = max(desde, ultimo + timedelta(days=1)) if ultimo is not None else desde
+    vivo = (inicio_vivo, hasta) if inicio_vivo <= hasta else None
+    return resumido, vivo
+
+
+def _sumar(acumulado, clave, pedidos, unidades, ingresos):
+    fila = acumulado.setdefault(clave, {'pedidos': 0, 'unidades': 0, 'ingresos': 0})
+    fila['pedidos'] += pedidos
+    fila['unidades'] += unidades
+    fila['ingresos'] += ingresos
+
+
+def totales_ventas(dimension, desde, hasta, agrupar='clave'):
+    """{clave o fecha: {"pedidos", "unidades", "ingresos"}} de la dimensión en [desde, hasta]."""
+    resumido, vivo = _tramos(desde, hasta)
+    acumulado = {}
+    if resumido:
+        grupos = (
+            VentaDiaria.objects.filter(dimension=dimension, fecha__range=resumido)
+            .order_by()
+            .values(agrupar)
+            .annotate(total_pedidos=Sum('pedidos'), total_unidades=Sum('unidades'), total_ingresos=Sum('ingresos'))
+        )
+        for grupo in grupos:
+            _sumar(acumulado, grupo[agrupar], grupo['total_pedidos'], grupo['total_unidades'], grupo['total_ingresos'])
+    if vivo:
+        for fila in calcular_ventas(*vivo, dimensiones=[dimension]):
+            _sumar(acumulado, getattr(fila, agrupar), fila.pedidos, fila.unidades, fila.ingresos)
+    return acumulado
+
+
+def serie_diaria(desde, hasta):
+    # Un punto por día del rango, con ceros en los días sin ventas
+    por_dia = totales_ventas('total', desde, hasta, agrupar='fecha')
+    vacio = {'pedidos': 0, 'unidades': 0, 'ingresos': 0}
+    return [
+        {'fecha': dia, **por_dia.get(dia, vacio)}
+        for dia in (desde + timedelta(days=n) for n in range((hasta - desde).days + 1))
+    ]
+
+
+def resumen_ventas(serie):
+    totales = {campo: sum(punto[campo] for punto in serie) for campo in ('pedidos', 'unidades', 'ingresos')}
+    totales['ticket_promedio'] = totales['ingresos'] // totales['pedidos'] if totales['pedidos'] else 0
+    return totales
+
+
+def ranking(dimension, desde, hasta, limite=10):
+    # Claves con más ingresos en el rango, con el nombre de cada una
+    totales = totales_ventas(dimension, desde, hasta)
+    mejores = sorted(totales.items(), key=lambda par: par[1]['ingresos'], reverse=True)[:limite]
+    nombres = MODELOS_DIMENSION[dimension].objects.only('nombre').in_bulk([clave for clave, _ in mejores if clave])
+    return [
+        {
+            'clave': clave,
+            'nombre': nombres[clave].nombre if clave in nombres else ('Sin marca' if dimension == 'marca' and not clave else f'#{clave}'),
+            **fila,
+        }
+        for clave, fila in mejores
+    ]
+
+
+def embudo_estados(desde, hasta):
+    resumido, vivo = _tramos(desde, hasta)
+    acumulado = {estado: {'pedidos': 0, 'total': 0} for estado in ESTADOS_PEDIDO}
+    filas = []
+    if resumido:
+        filas.extend(
+            PedidoDiarioEstado.objects.filter(fecha__range=resumido)
+            .order_by()
+            .values_list('estado')
+            .annotate(Sum('pedidos'), Sum('total'))
+        )
+    if vivo:
+        filas.extend((fila.estado, fila.pedidos, fila.total) for fila in calcular_estados(*vivo))
+    for estado, pedidos, total in filas:
+        fila = acumulado.setdefault(estado, {'pedidos': 0, 'total': 0})
+        fila['pedidos'] += pedidos
+        fila['total'] += total
+    return [{'estado': estado, **fila} for estado, fila in acumulado.items()]
@@ -0,0 +1,49 @@
+"""Revisión y reparación de los contadores de Categoria y Marca, que en PostgreSQL mantienen los triggers de
+"Base de datos/contadores_catalogo_postgresql.sql"; en bases sin ellos (SQLite) esto los rellena."""
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.ventas.models import Categoria, Marca, Producto
+
+
+def _conteo(modelo, campo, **filtro):
+    filas = modelo.objects.filter(**{campo: OuterRef('pk')}, **filtro).order_by().values(campo)
+    return Coalesce(Subquery(filas.annotate(total=Count('pk')).values('total')), 0)
+
+
+def contadores_reales(modelo):
+    campo = 'categoria' if modelo is Categoria else 'marca'
+    reales = {
+        'total_productos': _conteo(Producto, campo),
+        'productos_activos': _conteo(Producto, campo, estado_producto='activo'),
+    }
+    if modelo is Categoria:
+        reales['total_subcategorias'] = _conteo(Categoria, 'categoria_padre')
+    return reales
+
+
+def recalcular_contadores(modelo, reparar=True):
+    """Filas de `modelo` con contadores desviados ({"pk", campo, "real_<campo>"}); con reparar las corrige."""
+    reales = contadores_reales(modelo)
+    desviado = Q()
+    for campo in reales:
+        desviado |= ~Q(**{campo: F(f'real_{campo}')})
+    desviados = list(
+        modelo.objects.annotate(**{f'real_{campo}': expresion for campo, expresion in reales.items()})
+        .filter(desviado)
+        .order_by('pk')
+        .values('pk', *reales, *(f'real_{campo}' for campo in reales))
+    )
+    if reparar and desviados:
+        ids = [fila['pk'] for fila in desviados]
+        with transaction.atomic():
+            # Los triggers de producto bloquean las mismas filas: ninguna escritura concurrente queda
+            # fuera del recálculo ni se cuenta dos veces
+            list(modelo.objects.select_for_update().filter(pk__in=ids).order_by('pk').values_list('pk'))
+            modelo.objects.filter(pk__in=ids).update(**contadores_reales(modelo))
+    return desviados
+
+
+MODELOS_CONTADORES = (Categoria, Marca)
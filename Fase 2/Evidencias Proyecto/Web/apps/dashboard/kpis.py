@@ -0,0 +1,46 @@
+"""Indicadores del dashboard principal: una consulta agregada por tabla, en cache por TIMEOUT_KPIS."""
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from apps.ventas.models import Categoria, Marca, Producto
+
+CLAVE_KPIS = "dashboard:kpis"
+TIMEOUT_KPIS = 60
+
+# Producto activo bajo su punto de reorden; coincide con la condición de idx_producto_stock_bajo
+FILTRO_STOCK_BAJO = Q(estado_producto='activo', stock__lt=F('punto_reorden'))
+
+
+def calcular_kpis():
+    # Conteos condicionales (Count(filter=Q(...))): una consulta por tabla en vez de un COUNT por indicador
+    return {
+        **Producto.objects.aggregate(
+            total_productos=Count('producto_id'),
+            productos_activos=Count('producto_id', filter=Q(estado_producto='activo')),
+            productos_stock_bajo=Count('producto_id', filter=FILTRO_STOCK_BAJO),
+        ),
+        **Categoria.objects.aggregate(
+            total_categorias=Count('categoria_id'),
+            categorias_activas=Count('categoria_id', filter=Q(activa=True)),
+        ),
+        **Marca.objects.aggregate(
+            total_marcas=Count('marca_id'),
+            marcas_activas=Count('marca_id', filter=Q(activa=True)),
+        ),
+        'kpis_calculados': timezone.now(),
+    }
+
+
+def kpis_dashboard():
+    kpis = cache.get(CLAVE_KPIS)
+    if kpis is None:
+        kpis = calcular_kpis()
+        cache.set(CLAVE_KPIS, kpis, TIMEOUT_KPIS)
+    return kpis
+
+
+def invalidar_kpis():
+    # La llaman las vistas de productos y categorías del dashboard al escribir y el checkout tras cada pedido
+    cache.delete(CLAVE_KPIS)
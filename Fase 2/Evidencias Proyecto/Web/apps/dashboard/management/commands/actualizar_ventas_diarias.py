@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.dashboard.analitica import DIAS_REVISION, actualizar_resumenes
+
+
+def fecha(valor):
+    resultado = parse_date(valor)
+    if resultado is None:
+        raise ValueError(valor)
+    return resultado
+
+
+class Command(BaseCommand):
+    help = (
+        "Actualiza los resúmenes diarios de ventas (venta_diaria y pedido_diario_estado). "
+        f"Sin fechas recalcula desde el último día resumido menos {DIAS_REVISION} días hasta ayer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", type=fecha, help="Primer día a recalcular (AAAA-MM-DD)")
+        parser.add_argument("--hasta", type=fecha, help="Último día a recalcular (AAAA-MM-DD); como máximo ayer")
+
+    def handle(self, *args, desde=None, hasta=None, **options):
+        if desde and hasta and desde > hasta:
+            raise CommandError("--desde debe ser anterior o igual a --hasta")
+        rango = actualizar_resumenes(desde, hasta)
+        if rango is None:
+            self.stdout.write("No hay días para resumir.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Resúmenes actualizados del {rango[0]} al {rango[1]}."))
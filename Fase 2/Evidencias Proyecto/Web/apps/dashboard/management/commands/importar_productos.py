@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.dashboard.kpis import invalidar_kpis
+from apps.dashboard.masivo import ErrorImportacion, importar_productos
+from apps.ventas.cache_catalogo import catalogo_modificado
+
+
+class Command(BaseCommand):
+    help = "Actualiza precio, stock y estado de productos por SKU desde un archivo CSV o XLSX, por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Ruta del archivo .csv o .xlsx")
+
+    def handle(self, *args, archivo, **options):
+        actualizados = errores = 0
+        try:
+            with open(archivo, "rb") as entrada:
+                for lote in importar_productos(entrada, archivo):
+                    actualizados = lote["actualizados"]
+                    errores += len(lote["errores"])
+                    for error in lote["errores"]:
+                        self.stderr.write(error)
+                    self.stdout.write(f"{lote['procesados']} filas procesadas, {actualizados} productos actualizados")
+        except (OSError, ErrorImportacion) as e:
+            raise CommandError(str(e))
+        finally:
+            if actualizados:
+                catalogo_modificado()
+                invalidar_kpis()
+        self.stdout.write(self.style.SUCCESS(f"Importación terminada: {actualizados} productos actualizados, {errores} filas con errores."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.dashboard.contadores import MODELOS_CONTADORES, recalcular_contadores
+
+
+class Command(BaseCommand):
+    help = "Revisa los contadores de productos y subcategorías de categorías y marcas y corrige los desviados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--solo-revisar", action="store_true", help="Informa los desvíos sin corregirlos")
+
+    def handle(self, *args, solo_revisar=False, **options):
+        for modelo in MODELOS_CONTADORES:
+            desviados = recalcular_contadores(modelo, reparar=not solo_revisar)
+            nombre = modelo._meta.db_table
+            for fila in desviados[:20]:
+                cambios = ", ".join(
+                    f"{campo} {fila[campo]} -> {fila[f'real_{campo}']}"
+                    for campo in modelo.CAMPOS_CONTADORES
+                    if fila[campo] != fila[f"real_{campo}"]
+                )
+                self.stdout.write(f"{nombre} {fila['pk']}: {cambios}")
+            if len(desviados) > 20:
+                self.stdout.write(f"... y {len(desviados) - 20} más")
+            accion = "con desvíos" if solo_revisar else "corregidas"
+            self.stdout.write(self.style.SUCCESS(f"{nombre}: {len(desviados)} filas {accion}."))
@@ -0,0 +1,249 @@
+"""Operaciones masivas sobre productos (acciones del listado e importación CSV/XLSX), por lotes de
+TAMANO_LOTE en transacciones separadas."""
+
+import csv
+import io
+import os
+import re
+
+from django.db import transaction
+from django.db.models import F
+
+from apps.ventas.models import MovimientoEstado, MovimientoStock, Producto
+
+# Cada lote es su propia transacción: un error deja aplicados los anteriores y no se bloquea la
+# tabla completa durante toda la operación
+TAMANO_LOTE = 500
+ESTADOS_PRODUCTO = ('activo', 'inactivo', 'eliminado')
+
+# Columnas reconocidas en la importación -> campo de Producto
+COLUMNAS_IMPORTACION = {
+    'sku': 'sku',
+    'precio': 'precio',
+    'stock': 'stock',
+    'estado': 'estado_producto',
+    'estado_producto': 'estado_producto',
+}
+
+
+class ErrorImportacion(Exception):
+    pass
+
+
+def lotes(valores, tamano=TAMANO_LOTE):
+    lote = []
+    for valor in valores:
+        lote.append(valor)
+        if len(lote) == tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _avance(procesados, total, actualizados, errores=()):
+    # Las operaciones son generadores que entregan esto después de cada lote (vista o comando)
+    return {'procesados': procesados, 'total': total, 'actualizados': actualizados, 'errores': list(errores)}
+
+
+def ajustar_precios(ids, porcentaje):
+    """Sube (o baja, con porcentaje negativo) el precio de `ids`, redondeado al peso."""
+    # Aritmética entera en puntos básicos: mismo redondeo en PostgreSQL y SQLite
+    factor = round((100 + porcentaje) * 100)
+    if factor < 0:
+        raise ValueError('el porcentaje no puede ser menor a -100')
+    procesados = actualizados = 0
+    for lote in lotes(ids):
+        actualizados += Producto.objects.filter(producto_id__in=lote).update(precio=(F('precio') * factor + 5000) / 10000)
+        procesados += len(lote)
+        yield _avance(procesados, len(ids), actualizados)
+
+
+def cambiar_estado(ids, estado):
+    if estado not in ESTADOS_PRODUCTO:
+        raise ValueError(f'estado inválido: {estado}')
+    procesados = actualizados = 0
+    for lote in lotes(ids):
+        with transaction.atomic():
+            anteriores = list(
+                Producto.objects.select_for_update()
+                .filter(producto_id__in=lote)
+                .exclude(estado_producto=estado)
+                .order_by('producto_id')
+                .values_list('producto_id', 'estado_producto')
+            )
+            if anteriores:
+                Producto.objects.filter(producto_id__in=[producto_id for producto_id, _ in anteriores]).update(estado_producto=estado)
+                MovimientoEstado.objects.bulk_create(
+                    MovimientoEstado(producto_id=producto_id, estado_anterior=anterior, estado_actual=estado)
+                    for producto_id, anterior in anteriores
+                )
+        actualizados += len(anteriores)
+        procesados += len(lote)
+        yield _avance(procesados, len(ids), actualizados)
+
+
+def cargar_stock(ids, cantidad, tipo_operacion='ingreso'):
+    """Suma `cantidad` al stock de `ids` (negativa para descontar) y registra un movimiento por producto."""
+    procesados = actualizados = 0
+    for lote in lotes(ids):
+        errores = []
+        with transaction.atomic():
+            productos = Producto.objects.select_for_update().filter(producto_id__in=lote).order_by('producto_id')
+            if cantidad < 0:
+                # Sin dejar stock negativo (producto_stock_check): esos productos se informan como errores
+                insuficientes = list(productos.filter(stock__lt=-cantidad).values_list('sku', flat=True))
+                errores = [f'{sku}: stock insuficiente' for sku in insuficientes]
+                productos = productos.filter(stock__gte=-cantidad)
+            afectados = list(productos.values_list('producto_id', flat=True))
+            if afectados:
+                Producto.objects.filter(producto_id__in=afectados).update(stock=F('stock') + cantidad)
+                MovimientoStock.objects.bulk_create(
+                    MovimientoStock(producto_id=producto_id, cantidad=cantidad, tipo_operacion=tipo_operacion)
+                    for producto_id in afectados
+                )
+        actualizados += len(afectados)
+        procesados += len(lote)
+        yield _avance(procesados, len(ids), actualizados, errores)
+
+
+# Importación
+
+def filas_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    primera = texto.readline()
+    # Excel en español exporta con ';'
+    delimitador = ';' if primera.count(';') > primera.count(',') else ','
+    yield from csv.reader([primera], delimiter=delimitador)
+    yield from csv.reader(texto, delimiter=delimitador)
+
+
+def filas_xlsx(archivo):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ErrorImportacion(
+            'Para importar archivos .xlsx instala el extra xlsx (poetry install --extras xlsx) '
+            'o exporta el archivo como CSV'
+        )
+    # read_only lee la hoja en streaming sin cargarla completa en memoria
+    libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        for fila in libro.active.iter_rows(values_only=True):
+            yield ['' if valor is None else str(valor) for valor in fila]
+    finally:
+        libro.close()
+
+
+def leer_archivo(archivo, nombre):
+    """Pares (número de fila, {campo: texto}) con las columnas de COLUMNAS_IMPORTACION."""
+    extension = os.path.splitext(nombre)[1].lower()
+    if extension == '.csv':
+        filas = filas_csv(archivo)
+    elif extension == '.xlsx':
+        filas = filas_xlsx(archivo)
+    else:
+        raise ErrorImportacion('Formato no soportado: usa .csv o .xlsx')
+
+    encabezado = [columna.strip().lower() for columna in next(filas, [])]
+    if 'sku' not in encabezado:
+        raise ErrorImportacion('El archivo debe tener una columna "sku"')
+    columnas = {indice: COLUMNAS_IMPORTACION[nombre] for indice, nombre in enumerate(encabezado) if nombre in COLUMNAS_IMPORTACION}
+    if len(set(columnas.values())) < 2:
+        raise ErrorImportacion('El archivo debe tener al menos una columna precio, stock o estado')
+    # La fila 1 es el encabezado; las filas vacías se saltan sin correr la numeración de los errores
+    for numero, fila in enumerate(filas, start=2):
+        valores = {campo: fila[indice].strip() for indice, campo in columnas.items() if indice < len(fila) and fila[indice].strip()}
+        if valores:
+            yield numero, valores
+
+
+def _entero(valor, campo):
+    # Acepta 12990, 12990.0 (celdas numéricas de Excel), $12.990 y 12.990,5
+    texto = valor.replace('$', '').replace(' ', '')
+    if ',' in texto or re.fullmatch(r'\d{1,3}(\.\d{3})+', texto):
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        numero = round(float(texto))
+    except ValueError:
+        raise ValueError(f'{campo} inválido: {valor}')
+    if numero < 0:
+        raise ValueError(f'{campo} no puede ser negativo')
+    return numero
+
+
+def _importar_lote(lote, vistos):
+    # lote: [(número de fila, valores)]; aplica los cambios y devuelve (actualizados, errores).
+    # vistos ({sku: número de fila}) se comparte entre lotes para que un sku repetido sea error
+    # sin importar si la repetición cae en el mismo lote o en otro.
+    errores = []
+    por_sku = {}
+    for numero, valores in lote:
+        if 'sku' not in valores:
+            errores.append(f'Fila {numero}: falta el sku')
+        elif valores['sku'] in vistos:
+            errores.append(f'Fila {numero}: sku duplicado (ya aparece en la fila {vistos[valores["sku"]]})')
+        else:
+            vistos[valores['sku']] = numero
+            por_sku[valores['sku']] = (numero, valores)
+
+    with transaction.atomic():
+        productos = {
+            producto.sku: producto
+            for producto in Producto.objects.select_for_update()
+            .filter(sku__in=por_sku)
+            .order_by('producto_id')
+            .only('producto_id', 'sku', 'precio', 'stock', 'estado_producto')
+        }
+        modificados, campos, movimientos_stock, movimientos_estado = [], set(), [], []
+        for sku, (numero, valores) in por_sku.items():
+            producto = productos.get(sku)
+            if producto is None:
+                errores.append(f'Fila {numero}: no existe el sku {sku}')
+                continue
+            try:
+                precio = _entero(valores['precio'], 'precio') if 'precio' in valores else producto.precio
+                stock = _entero(valores['stock'], 'stock') if 'stock' in valores else producto.stock
+                estado = valores.get('estado_producto', producto.estado_producto).lower()
+                if estado not in ESTADOS_PRODUCTO:
+                    raise ValueError(f'estado inválido: {estado}')
+            except ValueError as error:
+                errores.append(f'Fila {numero}: {error}')
+                continue
+
+            cambiados = {
+                campo for campo, valor in (('precio', precio), ('stock', stock), ('estado_producto', estado))
+                if getattr(producto, campo) != valor
+            }
+            if not cambiados:
+                continue
+            if 'stock' in cambiados:
+                # La planilla trae el stock contado: se registra la diferencia como ajuste
+                movimientos_stock.append(MovimientoStock(producto_id=producto.producto_id, cantidad=stock - producto.stock, tipo_operacion='ajuste'))
+            if 'estado_producto' in cambiados:
+                movimientos_estado.append(MovimientoEstado(producto_id=producto.producto_id, estado_anterior=producto.estado_producto, estado_actual=estado))
+            producto.precio, producto.stock, producto.estado_producto = precio, stock, estado
+            modificados.append(producto)
+            campos |= cambiados
+
+        if modificados:
+            Producto.objects.bulk_update(modificados, sorted(campos))
+            MovimientoStock.objects.bulk_create(movimientos_stock)
+            MovimientoEstado.objects.bulk_create(movimientos_estado)
+    return len(modificados), errores
+
+
+def importar_productos(archivo, nombre):
+    """Actualiza precio, stock y estado por SKU desde un CSV/XLSX, leído y aplicado por lotes.
+
+    Si un sku aparece en varias filas se aplica la primera y las demás se informan como error.
+    """
+    filas = leer_archivo(archivo, nombre)
+    procesados = actualizados = 0
+    vistos = {}
+    for lote in lotes(filas):
+        modificados, errores = _importar_lote(lote, vistos)
+        actualizados += modificados
+        procesados += len(lote)
+        # Total desconocido: el archivo se lee en streaming
+        yield _avance(procesados, None, actualizados, errores)
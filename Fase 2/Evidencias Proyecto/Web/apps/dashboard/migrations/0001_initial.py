@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PedidoDiarioEstado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('estado', models.CharField(max_length=50)),
+                ('pedidos', models.PositiveIntegerField(default=0)),
+                ('total', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'pedido_diario_estado',
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'estado'), name='uq_pedido_diario_estado')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('producto', 'Producto'), ('categoria', 'Categoría'), ('marca', 'Marca')], max_length=20)),
+                ('clave', models.IntegerField(default=0)),
+                ('pedidos', models.PositiveIntegerField(default=0)),
+                ('unidades', models.PositiveIntegerField(default=0)),
+                ('ingresos', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'venta_diaria',
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'fecha', 'clave'), name='uq_venta_diaria')],
+            },
+        ),
+    ]
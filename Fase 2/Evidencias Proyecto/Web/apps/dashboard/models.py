@@ -1,3 +1,48 @@
 from django.db import models
 
-# Create your models here.
+
+class VentaDiaria(models.Model):
+    """Resumen diario de ventas por dimensión, mantenido por apps.dashboard.analitica."""
+
+    DIMENSIONES = [
+        ('total', 'Total'),
+        ('producto', 'Producto'),
+        ('categoria', 'Categoría'),
+        ('marca', 'Marca'),
+    ]
+
+    fecha = models.DateField()
+    dimension = models.CharField(max_length=20, choices=DIMENSIONES)
+    # producto_id, categoria_id o marca_id según la dimensión; 0 para el total y para productos sin marca
+    clave = models.IntegerField(default=0)
+    pedidos = models.PositiveIntegerField(default=0)
+    unidades = models.PositiveIntegerField(default=0)
+    ingresos = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'venta_diaria'
+        constraints = [
+            # Su índice (dimension, fecha, clave) sirve las consultas por rango de fechas
+            models.UniqueConstraint(fields=['dimension', 'fecha', 'clave'], name='uq_venta_diaria'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.dimension}:{self.clave} ${self.ingresos}"
+
+
+class PedidoDiarioEstado(models.Model):
+    """Pedidos y monto por día y estado actual (embudo de estados)."""
+
+    fecha = models.DateField()
+    estado = models.CharField(max_length=50)
+    pedidos = models.PositiveIntegerField(default=0)
+    total = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'pedido_diario_estado'
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'estado'], name='uq_pedido_diario_estado'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.estado}: {self.pedidos}"
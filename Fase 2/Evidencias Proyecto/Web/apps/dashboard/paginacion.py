@@ -0,0 +1,116 @@
+"""Paginación del dashboard sin SELECT COUNT(*)."""
+
+import hashlib
+import math
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+
+from apps.ventas.cache_catalogo import version_catalogo
+
+# Bajo este tamaño se cuenta exacto: es barato y pg_class.reltuples es impreciso en tablas chicas
+ESTIMACION_DESDE = 10000
+TIMEOUT_CONTEO = 60
+
+
+def numero_pagina(valor):
+    try:
+        return max(int(valor), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+class PaginaSinConteo:
+    """Página con la interfaz de django.core.paginator.Page que usan las plantillas del dashboard."""
+
+    def __init__(self, queryset, numero, por_pagina, total=None, total_estimado=False):
+        inicio = (numero - 1) * por_pagina
+        # La fila extra solo indica si hay página siguiente
+        filas = list(queryset[inicio:inicio + por_pagina + 1])
+
+        if not filas and numero > 1:
+            # Página fuera de rango (no se conoce la última): se muestra la primera
+            numero, inicio = 1, 0
+            filas = list(queryset[:por_pagina + 1])
+        self.object_list = filas[:por_pagina]
+        self.number = numero
+        self.por_pagina = por_pagina
+        self.total = total
+        self.total_estimado = total_estimado
+        self._hay_siguiente = len(filas) > por_pagina
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, indice):
+        return self.object_list[indice]
+
+    @property
+    def num_pages(self):
+        if self.total is None:
+            return None
+        # Con un total estimado la página actual puede superar la estimación
+        return max(math.ceil(self.total / self.por_pagina), self.number + self._hay_siguiente)
+
+    def has_next(self):
+        return self._hay_siguiente
+
+    def has_previous(self):
+        return self.number > 1
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def start_index(self):
+        return (self.number - 1) * self.por_pagina + 1 if self.object_list else 0
+
+    def end_index(self):
+        return (self.number - 1) * self.por_pagina + len(self.object_list)
+
+
+def estimacion_tabla(modelo, using='default'):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [modelo._meta.db_table])
+        fila = cursor.fetchone()
+    # -1 en tablas nunca analizadas
+    return fila[0] if fila and fila[0] >= 0 else None
+
+
+def contar_total(queryset):
+    """(total, estimado) de un queryset sin su ORDER BY ni anotaciones de la página."""
+    # Tabla sin filtros en PostgreSQL: estimación de reltuples (la mantienen ANALYZE y autovacuum);
+    # en otro caso un COUNT(*) en cache por consulta y versión del catálogo
+    if not queryset.query.where:
+        estimado = estimacion_tabla(queryset.model, queryset.db)
+        if estimado is not None and estimado >= ESTIMACION_DESDE:
+            return estimado, True
+    try:
+        sql = str(queryset.order_by().query)
+    except EmptyResultSet:
+        return 0, False
+    resumen = hashlib.sha1(sql.encode()).hexdigest()
+    clave = f"dashboard:conteo:{version_catalogo()}:{resumen}"
+    total = cache.get(clave)
+    if total is None:
+        total = queryset.count()
+        cache.set(clave, total, TIMEOUT_CONTEO)
+    return total, False
+
+
+def paginar(queryset, numero, por_pagina, conteo=None):
+    """Página `numero` de `queryset`; `conteo` es el queryset del total, sin anotaciones (None: sin total)."""
+    total, estimado = contar_total(conteo) if conteo is not None else (None, False)
+    return PaginaSinConteo(queryset, numero_pagina(numero), por_pagina, total, estimado)
@@ -1,3 +1,302 @@
-from django.test import TestCase
+import io
+from datetime import datetime, time, timedelta
 
-# Create your tests here.
+from django.utils import timezone
+
+from apps.ventas.cache_catalogo import catalogo_modificado
+from apps.ventas.models import Categoria, Marca, MovimientoEstado, MovimientoStock, Pedido, PedidoItem, Producto, SesionInvitado
+from apps.ventas.tests import VentasTestCase
+
+from . import analitica, contadores, kpis, masivo, paginacion
+
+
+class AnaliticaVentasTests(VentasTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hoy = timezone.localdate()
+        categoria = Categoria.objects.create(nombre="Alimentos", slug="alimentos")
+        cls.producto = Producto.objects.create(categoria=categoria, sku="ALI-1", nombre="Alimento", precio=1000, stock=50)
+        cls.invitado = SesionInvitado.objects.create(
+            session_id="prueba-analitica",
+            nombres="Ana",
+            apellido_paterno="Rojas",
+            email="ana@example.com",
+            telefono="912345678",
+            calle_envio="Av. Siempre Viva 742",
+            ciudad_envio="Santiago",
+            region_envio="RM",
+            codigo_postal_envio=7500,
+        )
+        # (días atrás, cantidad, estado): un pedido por fila
+        for dias, cantidad, estado in ((3, 1, "Entregado"), (3, 2, "Cancelado"), (2, 3, "Despachado"), (1, 4, "Procesando"), (0, 5, "Procesando")):
+            cls.pedido(cls.hoy - timedelta(days=dias), cantidad, estado)
+
+    @classmethod
+    def pedido(cls, dia, cantidad, estado):
+        subtotal = cls.producto.precio * cantidad
+        pedido = Pedido.objects.create(
+            cliente_invitado=cls.invitado, calle="Av. Siempre Viva 742", ciudad="Santiago", region="RM", total=subtotal, estado=estado
+        )
+        PedidoItem.objects.create(pedido=pedido, producto=cls.producto, cantidad=cantidad, precio_unitario=cls.producto.precio, subtotal=subtotal)
+        # fecha es auto_now_add: se fija al mediodía local del día pedido
+        Pedido.objects.filter(pk=pedido.pk).update(fecha=timezone.make_aware(datetime.combine(dia, time(12))))
+        return pedido
+
+    def dia(self, dias_atras):
+        return self.hoy - timedelta(days=dias_atras)
+
+    def unidades_por_dia(self, desde, hasta):
+        return [punto["unidades"] for punto in analitica.serie_diaria(desde, hasta)]
+
+    def test_sin_resumenes_todo_se_calcula_en_vivo(self):
+        self.assertEqual(analitica._tramos(self.dia(3), self.hoy), (None, (self.dia(3), self.hoy)))
+        self.assertEqual(self.unidades_por_dia(self.dia(4), self.hoy), [0, 1, 3, 4, 5])
+
+    def test_tramos_combinan_dias_resumidos_y_en_vivo(self):
+        analitica.actualizar_resumenes(hasta=self.dia(2))
+
+        self.assertEqual(analitica.ultimo_dia_resumido(), self.dia(2))
+        self.assertEqual(analitica._tramos(self.dia(3), self.hoy), ((self.dia(3), self.dia(2)), (self.dia(1), self.hoy)))
+        self.assertEqual(analitica._tramos(self.dia(3), self.dia(3)), ((self.dia(3), self.dia(3)), None))
+        self.assertEqual(analitica._tramos(self.dia(1), self.hoy), (None, (self.dia(1), self.hoy)))
+        self.assertEqual(self.unidades_por_dia(self.dia(4), self.hoy), [0, 1, 3, 4, 5])
+
+    def test_dias_resumidos_salen_del_resumen_y_los_demas_de_los_pedidos(self):
+        analitica.actualizar_resumenes(hasta=self.dia(2))
+        self.pedido(self.dia(3), 10, "Entregado")
+        self.pedido(self.dia(1), 20, "Entregado")
+
+        # El pedido nuevo de un día resumido aparece recién al volver a resumir
+        self.assertEqual(self.unidades_por_dia(self.dia(3), self.hoy), [1, 3, 24, 5])
+        analitica.actualizar_resumenes(desde=self.dia(3))
+        self.assertEqual(analitica.ultimo_dia_resumido(), self.dia(1))
+        self.assertEqual(self.unidades_por_dia(self.dia(3), self.hoy), [11, 3, 24, 5])
+
+    def test_totales_y_embudo_coinciden_con_el_calculo_en_vivo(self):
+        desde = self.dia(3)
+        vivo = {dimension: analitica.totales_ventas(dimension, desde, self.hoy) for dimension in analitica.DIMENSIONES}
+        embudo = analitica.embudo_estados(desde, self.hoy)
+
+        analitica.actualizar_resumenes()
+
+        self.assertEqual(analitica.ultimo_dia_resumido(), self.dia(1))
+        self.assertEqual({dimension: analitica.totales_ventas(dimension, desde, self.hoy) for dimension in analitica.DIMENSIONES}, vivo)
+        self.assertEqual(analitica.embudo_estados(desde, self.hoy), embudo)
+        # Los pedidos cancelados cuentan en el embudo pero no en las ventas
+        self.assertEqual(vivo["total"][0], {"pedidos": 4, "unidades": 13, "ingresos": 13000})
+        self.assertEqual({fila["estado"]: fila["pedidos"] for fila in embudo}["Cancelado"], 1)
+
+
+class ImportacionProductosTests(VentasTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Alimentos", slug="alimentos")
+        for sku in ("A-1", "A-2", "A-3"):
+            Producto.objects.create(categoria=categoria, sku=sku, nombre=f"Producto {sku}", precio=1000, stock=10)
+
+    def producto(self, sku):
+        return Producto.objects.values_list("precio", "stock", "estado_producto").get(sku=sku)
+
+    def test_entero_acepta_formatos_de_planilla(self):
+        for valor, esperado in (("12990", 12990), ("12990.0", 12990), ("$12.990", 12990), ("12.990,5", 12990), ("1.5", 2), (" 7 ", 7)):
+            with self.subTest(valor=valor):
+                self.assertEqual(masivo._entero(valor, "precio"), esperado)
+        for valor, mensaje in (("abc", "precio inválido: abc"), ("-5", "precio no puede ser negativo")):
+            with self.subTest(valor=valor), self.assertRaisesMessage(ValueError, mensaje):
+                masivo._entero(valor, "precio")
+
+    def test_sku_duplicado_es_error_aunque_caiga_en_otro_lote(self):
+        vistos = {}
+
+        primero = masivo._importar_lote([(2, {"sku": "A-1", "precio": "1500"}), (3, {"sku": "A-1", "precio": "9"})], vistos)
+        segundo = masivo._importar_lote([(4, {"sku": "A-1", "precio": "7"}), (5, {"precio": "1"}), (6, {"sku": "X-9", "stock": "1"})], vistos)
+
+        self.assertEqual(primero, (1, ["Fila 3: sku duplicado (ya aparece en la fila 2)"]))
+        self.assertEqual(segundo, (0, [
+            "Fila 4: sku duplicado (ya aparece en la fila 2)",
+            "Fila 5: falta el sku",
+            "Fila 6: no existe el sku X-9",
+        ]))
+        self.assertEqual(self.producto("A-1"), (1500, 10, "activo"))
+
+    def test_fila_invalida_no_impide_las_demas_del_lote(self):
+        actualizados, errores = masivo._importar_lote([
+            (2, {"sku": "A-1", "stock": "4"}),
+            (3, {"sku": "A-2", "precio": "caro"}),
+            (4, {"sku": "A-3", "estado_producto": "Inactivo"}),
+        ], {})
+
+        self.assertEqual(actualizados, 2)
+        self.assertEqual(errores, ["Fila 3: precio inválido: caro"])
+        self.assertEqual(self.producto("A-1"), (1000, 4, "activo"))
+        self.assertEqual(self.producto("A-2"), (1000, 10, "activo"))
+        self.assertEqual(self.producto("A-3"), (1000, 10, "inactivo"))
+        self.assertEqual(list(MovimientoStock.objects.values_list("producto__sku", "cantidad", "tipo_operacion")), [("A-1", -6, "ajuste")])
+        self.assertEqual(list(MovimientoEstado.objects.values_list("producto__sku", "estado_anterior", "estado_actual")), [("A-3", "activo", "inactivo")])
+
+    def test_importa_csv_de_excel_con_punto_y_coma(self):
+        archivo = io.BytesIO("SKU;Precio;Stock;Otra\nA-1;$12.990;10;x\n\nA-2;2.500;3;y\nA-1;1;1;z\n".encode("utf-8-sig"))
+
+        avances = list(masivo.importar_productos(archivo, "precios.CSV"))
+
+        self.assertEqual(avances, [{
+            "procesados": 3,
+            "total": None,
+            "actualizados": 2,
+            "errores": ["Fila 5: sku duplicado (ya aparece en la fila 2)"],
+        }])
+        self.assertEqual(self.producto("A-1"), (12990, 10, "activo"))
+        self.assertEqual(self.producto("A-2"), (2500, 3, "activo"))
+
+    def test_archivo_sin_columnas_requeridas(self):
+        for contenido, nombre, mensaje in (
+            (b"precio\n1\n", "precios.csv", 'El archivo debe tener una columna "sku"'),
+            (b"sku,otra\nA-1,1\n", "precios.csv", "al menos una columna precio, stock o estado"),
+            (b"sku,precio\n", "precios.txt", "Formato no soportado"),
+        ):
+            with self.subTest(nombre=nombre, contenido=contenido), self.assertRaisesMessage(masivo.ErrorImportacion, mensaje):
+                list(masivo.importar_productos(io.BytesIO(contenido), nombre))
+
+
+class ContadoresTests(VentasTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # SQLite no tiene los triggers: los contadores parten en 0 y solo los corrige el recálculo
+        cls.perros = Categoria.objects.create(nombre="Perros", slug="perros")
+        cls.cachorros = Categoria.objects.create(nombre="Cachorros", slug="cachorros", categoria_padre=cls.perros, nivel=2)
+        cls.gatos = Categoria.objects.create(nombre="Gatos", slug="gatos")
+        cls.marca = Marca.objects.create(nombre="Canino Feliz", slug="canino-feliz")
+        for sku, categoria, estado in (("P1", cls.perros, "activo"), ("P2", cls.perros, "inactivo"), ("C1", cls.cachorros, "activo")):
+            Producto.objects.create(categoria=categoria, marca=cls.marca, sku=sku, nombre=f"Producto {sku}", precio=1000, estado_producto=estado)
+
+    def valores(self, categoria):
+        return Categoria.objects.values_list("total_productos", "productos_activos", "total_subcategorias").get(pk=categoria.pk)
+
+    def test_revisar_informa_desvios_sin_corregir(self):
+        desviados = contadores.recalcular_contadores(Categoria, reparar=False)
+
+        self.assertEqual(desviados, [
+            {"pk": self.perros.pk, "total_productos": 0, "productos_activos": 0, "total_subcategorias": 0,
+             "real_total_productos": 2, "real_productos_activos": 1, "real_total_subcategorias": 1},
+            {"pk": self.cachorros.pk, "total_productos": 0, "productos_activos": 0, "total_subcategorias": 0,
+             "real_total_productos": 1, "real_productos_activos": 1, "real_total_subcategorias": 0},
+        ])
+        self.assertEqual(self.valores(self.perros), (0, 0, 0))
+
+    def test_reparar_corrige_solo_los_desviados(self):
+        Categoria.objects.filter(pk=self.gatos.pk).update(total_productos=0)
+
+        self.assertEqual(len(contadores.recalcular_contadores(Categoria)), 2)
+        self.assertEqual([fila["pk"] for fila in contadores.recalcular_contadores(Marca)], [self.marca.pk])
+
+        self.assertEqual(self.valores(self.perros), (2, 1, 1))
+        self.assertEqual(self.valores(self.cachorros), (1, 1, 0))
+        self.assertEqual(self.valores(self.gatos), (0, 0, 0))
+        self.assertEqual(Marca.objects.values_list("total_productos", "productos_activos").get(pk=self.marca.pk), (3, 2))
+        for modelo in contadores.MODELOS_CONTADORES:
+            self.assertEqual(contadores.recalcular_contadores(modelo, reparar=False), [])
+
+    def test_save_no_pisa_los_contadores(self):
+        categoria = Categoria.objects.get(pk=self.perros.pk)
+        contadores.recalcular_contadores(Categoria)
+
+        categoria.descripcion = "Todo para perros"
+        categoria.save()
+
+        self.assertEqual(self.valores(self.perros), (2, 1, 1))
+
+    def test_eliminar_categoria_muestra_contadores_y_verifica_con_exists(self):
+        contadores.recalcular_contadores(Categoria)
+        url = f"/dashboard/categorias/{self.perros.pk}/eliminar/"
+
+        respuesta = self.client.get(url)
+        # Con el contador en 0 (sin triggers) el POST igual comprueba que no haya productos
+        Categoria.objects.filter(pk=self.perros.pk).update(total_productos=0)
+        self.client.post(url)
+
+        self.assertEqual((respuesta.context["productos_count"], respuesta.context["subcategorias_count"]), (2, 1))
+        self.assertTrue(Categoria.objects.filter(pk=self.perros.pk).exists())
+
+
+class KpisTests(VentasTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre="Perros", slug="perros", punto_reorden=5)
+        Categoria.objects.create(nombre="Gatos", slug="gatos", activa=False)
+        Marca.objects.create(nombre="Canino Feliz", slug="canino-feliz")
+        # (stock, punto de reorden, estado): stock bajo = activo y stock < punto_reorden
+        for i, (stock, punto_reorden, estado) in enumerate(((2, 5, "activo"), (8, 10, "activo"), (10, 10, "activo"), (0, 5, "inactivo"))):
+            Producto.objects.create(
+                categoria=cls.categoria,
+                sku=f"K{i}",
+                nombre=f"Producto {i}",
+                precio=1000,
+                stock=stock,
+                punto_reorden=punto_reorden,
+                estado_producto=estado,
+            )
+
+    def test_una_consulta_por_tabla(self):
+        with self.assertNumQueries(3):
+            valores = kpis.calcular_kpis()
+
+        self.assertEqual(
+            {clave: valor for clave, valor in valores.items() if clave != "kpis_calculados"},
+            {
+                "total_productos": 4,
+                "productos_activos": 3,
+                "productos_stock_bajo": 2,
+                "total_categorias": 2,
+                "categorias_activas": 1,
+                "total_marcas": 1,
+                "marcas_activas": 1,
+            },
+        )
+
+    def test_dashboard_usa_la_cache_hasta_invalidarla(self):
+        self.assertEqual(self.client.get("/dashboard/").context["productos_stock_bajo"], 2)
+        Producto.objects.filter(sku="K1").update(stock=20)
+
+        self.assertEqual(self.client.get("/dashboard/").context["productos_stock_bajo"], 2)
+        kpis.invalidar_kpis()
+        self.assertEqual(self.client.get("/dashboard/").context["productos_stock_bajo"], 1)
+
+
+class PaginacionSinConteoTests(VentasTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Perros", slug="perros")
+        for i in range(5):
+            Producto.objects.create(categoria=categoria, sku=f"P{i}", nombre=f"Producto {i}", precio=1000 + i)
+
+    def productos(self):
+        return Producto.objects.order_by("producto_id")
+
+    def test_pagina_sin_total_no_ejecuta_count(self):
+        with self.assertNumQueries(1):
+            pagina = paginacion.paginar(self.productos(), "2", 2)
+
+        self.assertEqual([producto.sku for producto in pagina], ["P2", "P3"])
+        self.assertEqual((pagina.has_previous(), pagina.has_next(), pagina.num_pages), (True, True, None))
+        self.assertEqual((pagina.start_index(), pagina.end_index()), (3, 4))
+
+    def test_ultima_pagina_y_numeros_invalidos(self):
+        ultima = paginacion.paginar(self.productos(), 3, 2)
+        fuera_de_rango = paginacion.paginar(self.productos(), 9, 2)
+
+        self.assertEqual(([producto.sku for producto in ultima], ultima.has_next()), (["P4"], False))
+        self.assertEqual((fuera_de_rango.number, [producto.sku for producto in fuera_de_rango]), (1, ["P0", "P1"]))
+        for valor in ("abc", None, "-3", "0"):
+            with self.subTest(valor=valor):
+                self.assertEqual(paginacion.numero_pagina(valor), 1)
+
+    def test_total_se_cuenta_una_vez_por_consulta_y_version(self):
+        filtrados = Producto.objects.filter(precio__gte=1002)
+        self.assertEqual(paginacion.paginar(filtrados.order_by("producto_id"), 1, 2, conteo=filtrados).num_pages, 2)
+        Producto.objects.filter(sku="P0").update(precio=5000)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(paginacion.contar_total(filtrados), (3, False))
+        catalogo_modificado()
+        self.assertEqual(paginacion.contar_total(filtrados), (4, False))
+        self.assertEqual(paginacion.contar_total(Producto.objects.none()), (0, False))
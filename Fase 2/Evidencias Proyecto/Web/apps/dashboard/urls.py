@@ -6,6 +6,9 @@ app_name = 'dashboard'
 urlpatterns = [
     # Dashboard principal
     path("", views.admin_dashboard, name="admin_dashboard"),
+
+    # Analítica de ventas
+    path("ventas/", views.ventas_dashboard, name="ventas_dashboard"),
     
     # CRUD Categorías
     path("categorias/", views.categoria_list, name="categoria_list"),
@@ -16,6 +19,8 @@ urlpatterns = [
     # CRUD Productos
     path("productos/", views.producto_list, name="producto_list"),
     path("productos/crear/", views.producto_create, name="producto_create"),
+    path("productos/masivo/", views.producto_masivo, name="producto_masivo"),
+    path("productos/importar/", views.producto_importar, name="producto_importar"),
     path("productos/<int:producto_id>/editar/", views.producto_edit, name="producto_edit"),
     path("productos/<int:producto_id>/eliminar/", views.producto_delete, name="producto_delete"),
 ]
\ No newline at end of file
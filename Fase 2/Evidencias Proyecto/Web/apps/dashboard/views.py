@@ -1,31 +1,66 @@
+from datetime import timedelta
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from apps.ventas.models import Producto, Categoria, Marca
+from apps.ventas.busqueda import buscar_productos
+from apps.ventas.cache_catalogo import catalogo_modificado
+from apps.ventas.categorias import invalidar_arbol_categorias
+from .analitica import embudo_estados, ranking, resumen_ventas, serie_diaria, ultimo_dia_resumido
+from .kpis import FILTRO_STOCK_BAJO, invalidar_kpis, kpis_dashboard
+from .masivo import (
+    ESTADOS_PRODUCTO, TAMANO_LOTE, ErrorImportacion, ajustar_precios, cambiar_estado, cargar_stock, importar_productos,
+)
+from .paginacion import paginar
+
+DIAS_VENTAS = 30
+MAX_DIAS_VENTAS = 366
 
 
 def admin_dashboard(request):
     """Dashboard principal de administración"""
-    total_productos = Producto.objects.count()
-    productos_activos = Producto.objects.filter(estado_producto='activo').count()
-    total_categorias = Categoria.objects.count()
-    categorias_activas = Categoria.objects.filter(activa=True).count()
-    total_marcas = Marca.objects.count()
-    marcas_activas = Marca.objects.filter(activa=True).count()
-    
-    # Productos con stock bajo (menos de 10)
-    productos_stock_bajo = Producto.objects.filter(stock__lt=10, estado_producto='activo').count()
-    
+    # Totales, activos y stock bajo (bajo el punto de reorden de cada producto) desde la cache de kpis.py
+    context = kpis_dashboard()
+    return render(request, 'dashboard/admin/dashboard.html', context)
+
+
+def ventas_dashboard(request):
+    """Analítica de ventas por rango de fechas desde los resúmenes diarios"""
+    def fecha_param(nombre):
+        try:
+            return parse_date(request.GET.get(nombre) or '')
+        except ValueError:
+            return None
+
+    hasta = fecha_param('hasta') or timezone.localdate()
+    desde = fecha_param('desde') or hasta - timedelta(days=DIAS_VENTAS - 1)
+    if desde > hasta:
+        desde, hasta = hasta, desde
+    desde = max(desde, hasta - timedelta(days=MAX_DIAS_VENTAS - 1))
+
+    serie = serie_diaria(desde, hasta)
+    maximo = max((punto['ingresos'] for punto in serie), default=0)
+    for punto in serie:
+        punto['altura'] = round(punto['ingresos'] * 100 / maximo) if maximo else 0
+
     context = {
-        'total_productos': total_productos,
-        'productos_activos': productos_activos,
-        'total_categorias': total_categorias,
-        'categorias_activas': categorias_activas,
-        'total_marcas': total_marcas,
-        'marcas_activas': marcas_activas,
-        'productos_stock_bajo': productos_stock_bajo,
+        'desde': desde,
+        'hasta': hasta,
+        'serie': serie,
+        'resumen': resumen_ventas(serie),
+        'top_productos': ranking('producto', desde, hasta),
+        'top_categorias': ranking('categoria', desde, hasta),
+        'top_marcas': ranking('marca', desde, hasta),
+        'embudo': embudo_estados(desde, hasta),
+        'ultimo_resumen': ultimo_dia_resumido(),
+        'titulo': 'Ventas',
     }
-    return render(request, 'dashboard/admin/dashboard.html', context)
+    return render(request, 'dashboard/ventas/analitica.html', context)
 
 
 
@@ -34,16 +69,12 @@ def admin_dashboard(request):
 
 def categoria_list(request):
     """Lista todas las categorías"""
-    from django.db.models import Count
-    
-    categorias = Categoria.objects.annotate(
-        productos_count=Count('producto')
-    ).order_by('nivel', 'nombre')
+    # Cantidad de productos desde los contadores de la categoría, mantenidos por los triggers de
+    # contadores_catalogo_postgresql.sql; sin ellos hay que ejecutar manage.py recalcular_contadores
+    categorias = Categoria.objects.select_related('categoria_padre').order_by('nivel', 'nombre')
     
-    # Paginación
-    paginator = Paginator(categorias, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación sin COUNT(*): el total es estimado o sale de cache (paginacion.py)
+    page_obj = paginar(categorias, request.GET.get('page'), 20, conteo=Categoria.objects.all())
     
     context = {
         'categorias': page_obj,
@@ -60,6 +91,7 @@ def categoria_create(request):
             descripcion = request.POST.get('descripcion', '')
             categoria_padre_id = request.POST.get('categoria_padre')
             slug = request.POST.get('slug', '')
+            punto_reorden = int(request.POST.get('punto_reorden') or 10)
             
             # Determinar el nivel
             nivel = 1
@@ -74,8 +106,12 @@ def categoria_create(request):
                 categoria_padre=categoria_padre,
                 nivel=nivel,
                 slug=slug,
+                punto_reorden=punto_reorden,
                 activa=True
             )
+            invalidar_arbol_categorias()
+            catalogo_modificado()
+            invalidar_kpis()
             
             messages.success(request, f'Categoría "{nombre}" creada exitosamente.')
             return redirect('dashboard:categoria_list')
@@ -103,6 +139,8 @@ def categoria_edit(request, categoria_id):
             categoria.descripcion = request.POST.get('descripcion', '')
             categoria.slug = request.POST.get('slug', '')
             categoria.activa = request.POST.get('activa') == 'on'
+            punto_reorden_anterior = categoria.punto_reorden
+            categoria.punto_reorden = int(request.POST.get('punto_reorden') or punto_reorden_anterior)
             
             # Si cambia la categoría padre, actualizar nivel
             categoria_padre_id = request.POST.get('categoria_padre')
@@ -115,6 +153,14 @@ def categoria_edit(request, categoria_id):
                 categoria.nivel = 1
             
             categoria.save()
+            if categoria.punto_reorden != punto_reorden_anterior:
+                # Los productos que heredaban el valor anterior toman el nuevo; los personalizados se mantienen
+                Producto.objects.filter(
+                    categoria=categoria, punto_reorden=punto_reorden_anterior
+                ).update(punto_reorden=categoria.punto_reorden)
+            invalidar_arbol_categorias()
+            catalogo_modificado()
+            invalidar_kpis()
             
             messages.success(request, f'Categoría "{categoria.nombre}" actualizada exitosamente.')
             return redirect('dashboard:categoria_list')
@@ -138,23 +184,32 @@ def categoria_delete(request, categoria_id):
     categoria = get_object_or_404(Categoria, categoria_id=categoria_id)
     
     if request.method == 'POST':
+        # Comprobación exacta: los contadores dependen de los triggers y en una base sin ellos
+        # quedarían en 0, permitiendo borrar una categoría con productos
+        if Producto.objects.filter(categoria=categoria).exists():
+            messages.error(
+                request,
+                f'No se puede eliminar "{categoria.nombre}": tiene productos asociados. '
+                'Muévelos a otra categoría o desactiva la categoría.',
+            )
+            return redirect('dashboard:categoria_delete', categoria_id=categoria.categoria_id)
         try:
             nombre = categoria.nombre
             categoria.delete()
+            invalidar_arbol_categorias()
+            catalogo_modificado()
+            invalidar_kpis()
             messages.success(request, f'Categoría "{nombre}" eliminada exitosamente.')
         except Exception as e:
             messages.error(request, f'Error al eliminar categoría: {str(e)}')
         
         return redirect('dashboard:categoria_list')
     
-    # Verificar si tiene productos asociados
-    productos_count = Producto.objects.filter(categoria=categoria).count()
-    subcategorias_count = Categoria.objects.filter(categoria_padre=categoria).count()
-    
+    # Impacto de la eliminación desde los contadores de la categoría (el POST igual verifica con exists())
     context = {
         'categoria': categoria,
-        'productos_count': productos_count,
-        'subcategorias_count': subcategorias_count,
+        'productos_count': categoria.total_productos,
+        'subcategorias_count': categoria.total_subcategorias,
         'titulo': f'Eliminar: {categoria.nombre}'
     }
     return render(request, 'dashboard/categoria/delete.html', context)
@@ -164,29 +219,37 @@ def categoria_delete(request, categoria_id):
 # CRUD PRODUCTOS
 
 
+def filtros_productos(datos):
+    return {campo: datos.get(campo) for campo in ('categoria', 'marca', 'estado', 'busqueda', 'stock_bajo')}
+
+
+def filtrar_productos(productos, filtros):
+    """Aplica los filtros del listado; también los usa la acción masiva sobre todos los filtrados"""
+    if filtros['categoria']:
+        productos = productos.filter(categoria_id=filtros['categoria'])
+    if filtros['marca']:
+        productos = productos.filter(marca_id=filtros['marca'])
+    if filtros['estado']:
+        productos = productos.filter(estado_producto=filtros['estado'])
+    if filtros['stock_bajo']:
+        # Activos bajo su punto de reorden (índice parcial idx_producto_stock_bajo)
+        productos = productos.filter(FILTRO_STOCK_BAJO)
+    if filtros['busqueda']:
+        # Búsqueda por nombre, descripción, SKU y marca; los resultados se ordenan por relevancia
+        productos = buscar_productos(productos, filtros['busqueda']).order_by('-relevancia', '-fecha_creation')
+    return productos
+
+
 def producto_list(request):
     """Lista todos los productos"""
     productos = Producto.objects.all().select_related('categoria', 'marca').order_by('-fecha_creation')
     
     # Filtros
-    categoria_id = request.GET.get('categoria')
-    marca_id = request.GET.get('marca')
-    estado = request.GET.get('estado')
-    busqueda = request.GET.get('busqueda')
+    filtros = filtros_productos(request.GET)
+    productos = filtrar_productos(productos, filtros)
     
-    if categoria_id:
-        productos = productos.filter(categoria_id=categoria_id)
-    if marca_id:
-        productos = productos.filter(marca_id=marca_id)
-    if estado:
-        productos = productos.filter(estado_producto=estado)
-    if busqueda:
-        productos = productos.filter(nombre__icontains=busqueda)
-    
-    # Paginación
-    paginator = Paginator(productos, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación sin COUNT(*): el total es estimado o sale de cache (paginacion.py)
+    page_obj = paginar(productos, request.GET.get('page'), 20, conteo=productos)
     
     # Datos para filtros
     categorias = Categoria.objects.filter(activa=True)
@@ -196,17 +259,115 @@ def producto_list(request):
         'productos': page_obj,
         'categorias': categorias,
         'marcas': marcas,
-        'filtros': {
-            'categoria': categoria_id,
-            'marca': marca_id,
-            'estado': estado,
-            'busqueda': busqueda,
-        },
+        'filtros': filtros,
+        'estados': ESTADOS_PRODUCTO,
         'titulo': 'Gestión de Productos'
     }
     return render(request, 'dashboard/producto/list.html', context)
 
 
+def producto_masivo(request):
+    """Acción masiva (precio, estado o stock) sobre los productos seleccionados o todos los filtrados"""
+    volver = request.POST.get('volver', '')
+    if not volver.startswith(reverse('dashboard:producto_list')):
+        volver = reverse('dashboard:producto_list')
+    if request.method != 'POST':
+        return redirect(volver)
+    
+    if request.POST.get('todos'):
+        productos = filtrar_productos(Producto.objects.all(), filtros_productos(request.POST))
+        ids = list(productos.order_by('producto_id').values_list('producto_id', flat=True))
+    else:
+        ids = sorted({int(producto_id) for producto_id in request.POST.getlist('productos') if producto_id.isdigit()})
+    if not ids:
+        messages.warning(request, 'Selecciona al menos un producto.')
+        return redirect(volver)
+    
+    accion = request.POST.get('accion')
+    valor = request.POST.get('valor', '').strip()
+    actualizados, errores = 0, []
+    try:
+        if accion == 'precio':
+            try:
+                porcentaje = float(valor.replace(',', '.'))
+            except ValueError:
+                raise ValueError('el porcentaje debe ser un número')
+            avance = ajustar_precios(ids, porcentaje)
+        elif accion == 'estado':
+            avance = cambiar_estado(ids, valor)
+        elif accion == 'stock':
+            try:
+                cantidad = int(valor)
+            except ValueError:
+                raise ValueError('la cantidad de stock debe ser un número entero')
+            if cantidad == 0:
+                raise ValueError('la cantidad de stock no puede ser 0')
+            avance = cargar_stock(ids, cantidad, 'ingreso' if cantidad > 0 else 'ajuste')
+        else:
+            raise ValueError('acción inválida')
+        for lote in avance:
+            actualizados = lote['actualizados']
+            errores += lote['errores']
+    except ValueError as e:
+        messages.error(request, f'Error en la acción masiva: {str(e)}')
+    else:
+        messages.success(request, f'{actualizados} de {len(ids)} productos actualizados.')
+    finally:
+        # También si falló a mitad: los lotes anteriores ya quedaron aplicados
+        if actualizados:
+            catalogo_modificado()
+            invalidar_kpis()
+    
+    if errores:
+        messages.warning(request, f'{len(errores)} productos sin cambios: {", ".join(errores[:10])}')
+    return redirect(volver)
+
+
+def producto_importar(request):
+    """Importa precio, stock y estado por SKU desde CSV o XLSX, mostrando el avance por lotes"""
+    if request.method == 'POST' and request.FILES.get('archivo'):
+        archivo = request.FILES['archivo']
+        return StreamingHttpResponse(avance_importacion(request, archivo), content_type='text/html; charset=utf-8')
+    
+    context = {
+        'tamano_lote': TAMANO_LOTE,
+        'estados': ESTADOS_PRODUCTO,
+        'titulo': 'Importar Productos'
+    }
+    return render(request, 'dashboard/producto/importar.html', context)
+
+
+def avance_importacion(request, archivo):
+    # La página se envía en partes: cabecera, una línea por lote y el resumen final
+    pagina = render_to_string('dashboard/producto/importar_avance.html', {'archivo': archivo.name, 'titulo': 'Importar Productos'}, request)
+    cabecera, pie = pagina.split('<!-- avance -->')
+    yield cabecera
+    actualizados, errores = 0, 0
+    try:
+        for lote in importar_productos(archivo, archivo.name):
+            actualizados = lote['actualizados']
+            errores += len(lote['errores'])
+            yield format_html(
+                '<li class="list-group-item">{} filas procesadas, {} productos actualizados</li>',
+                lote['procesados'], actualizados,
+            )
+            for error in lote['errores']:
+                yield format_html('<li class="list-group-item list-group-item-warning">{}</li>', error)
+        yield format_html(
+            '<li class="list-group-item list-group-item-success"><strong>Importación terminada:</strong> {} productos actualizados, {} filas con errores</li>',
+            actualizados, errores,
+        )
+    except ErrorImportacion as e:
+        yield format_html('<li class="list-group-item list-group-item-danger">{}</li>', str(e))
+    except Exception as e:
+        yield format_html('<li class="list-group-item list-group-item-danger">Error al importar: {}</li>', str(e))
+    finally:
+        if actualizados:
+            catalogo_modificado()
+            invalidar_kpis()
+    yield pie
+
+
 def producto_create(request):
     """Crear nuevo producto"""
     if request.method == 'POST':
@@ -225,9 +386,13 @@ def producto_create(request):
                 descripcion=request.POST.get('descripcion', ''),
                 precio=int(request.POST.get('precio')),
                 stock=int(request.POST.get('stock', 0)),
+                # Sin valor propio se hereda el punto de reorden de la categoría
+                punto_reorden=int(request.POST.get('punto_reorden') or categoria.punto_reorden),
                 imagen_url=request.POST.get('imagen_url', ''),
                 estado_producto='activo'
             )
+            catalogo_modificado()
+            invalidar_kpis()
             
             messages.success(request, f'Producto "{producto.nombre}" creado exitosamente.')
             return redirect('dashboard:producto_list')
@@ -262,10 +427,13 @@ def producto_edit(request, producto_id):
             producto.descripcion = request.POST.get('descripcion', '')
             producto.precio = int(request.POST.get('precio'))
             producto.stock = int(request.POST.get('stock', 0))
+            producto.punto_reorden = int(request.POST.get('punto_reorden') or producto.categoria.punto_reorden)
             producto.imagen_url = request.POST.get('imagen_url', '')
             producto.estado_producto = request.POST.get('estado_producto')
             
             producto.save()
+            catalogo_modificado()
+            invalidar_kpis()
             
             messages.success(request, f'Producto "{producto.nombre}" actualizado exitosamente.')
             return redirect('dashboard:producto_list')
@@ -293,6 +461,8 @@ def producto_delete(request, producto_id):
         try:
             nombre = producto.nombre
             producto.delete()
+            catalogo_modificado()
+            invalidar_kpis()
             messages.success(request, f'Producto "{nombre}" eliminado exitosamente.')
         except Exception as e:
             messages.error(request, f'Error al eliminar producto: {str(e)}')
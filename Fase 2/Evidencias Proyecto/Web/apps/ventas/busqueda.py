@@ -0,0 +1,138 @@
+"""Búsqueda de productos ordenada por relevancia: tsvector y pg_trgm en PostgreSQL
+("Base de datos/busqueda_productos_postgresql.sql"), índice invertido en memoria en otros motores."""
+
+import re
+import threading
+import unicodedata
+
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+
+from .cache_catalogo import version_catalogo
+from .models import Producto
+
+CONFIGURACION_TS = "spanish"
+# Similitud mínima de trigramas para aceptar un término como error de tipeo (umbral por defecto de pg_trgm)
+UMBRAL_SIMILITUD = 0.3
+# El índice en memoria limita los resultados para que la anotación CASE no crezca sin control
+MAX_RESULTADOS_MEMORIA = 1000
+
+# Pesos equivalentes a setweight(..., 'A'/'B'/'C') del trigger de PostgreSQL
+PESO_NOMBRE = 1.0
+PESO_MARCA = 0.4
+PESO_DESCRIPCION = 0.2
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize("NFKD", texto or "").lower()
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    return re.findall(r"[a-z0-9]+", normalizar(texto))
+
+
+def trigramas(termino):
+    relleno = f"  {termino} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+def similitud(a, b):
+    ta, tb = trigramas(a), trigramas(b)
+    return len(ta & tb) / len(ta | tb) if ta and tb else 0.0
+
+
+class IndiceInvertido:
+    def __init__(self, filas):
+        # termino -> {producto_id: peso acumulado}
+        self.postings = {}
+        for producto_id, nombre, sku, marca, descripcion in filas:
+            for texto, peso in ((nombre, PESO_NOMBRE), (sku, PESO_NOMBRE), (marca, PESO_MARCA), (descripcion, PESO_DESCRIPCION)):
+                for termino in tokenizar(texto):
+                    documentos = self.postings.setdefault(termino, {})
+                    documentos[producto_id] = documentos.get(producto_id, 0.0) + peso
+        self.vocabulario = sorted(self.postings)
+
+    def expandir(self, token):
+        # Coincidencia exacta, por prefijo (perro -> perros) y por trigramas (perrp -> perro)
+        expansion = {}
+        for termino in self.vocabulario:
+            if termino == token:
+                expansion[termino] = 1.0
+            elif len(token) >= 3 and termino.startswith(token):
+                expansion[termino] = 0.8
+            else:
+                parecido = similitud(token, termino)
+                if parecido >= UMBRAL_SIMILITUD:
+                    expansion[termino] = 0.6 * parecido
+        return expansion
+
+    def buscar(self, texto):
+        tokens = tokenizar(texto)
+        if not tokens:
+            return {}
+        puntajes = None
+        # Todos los tokens deben coincidir (como websearch_to_tsquery); cada uno aporta su mejor término
+        for token in tokens:
+            por_token = {}
+            for termino, factor in self.expandir(token).items():
+                for producto_id, peso in self.postings[termino].items():
+                    por_token[producto_id] = max(por_token.get(producto_id, 0.0), factor * peso)
+            if puntajes is None:
+                puntajes = por_token
+            else:
+                puntajes = {pid: puntaje + por_token[pid] for pid, puntaje in puntajes.items() if pid in por_token}
+            if not puntajes:
+                return {}
+        return puntajes
+
+
+_indice_local = {"version": None, "indice": None}
+_bloqueo_indice = threading.Lock()
+
+
+def indice_en_memoria():
+    # En PostgreSQL el trigger mantiene producto.busqueda; este índice solo lo usan los demás motores
+    # y se reconstruye cuando cambia la versión del catálogo
+    version = version_catalogo()
+    with _bloqueo_indice:
+        if _indice_local["version"] != version or _indice_local["indice"] is None:
+            filas = Producto.objects.values_list("producto_id", "nombre", "sku", "marca__nombre", "descripcion")
+            _indice_local["indice"] = IndiceInvertido(filas)
+            _indice_local["version"] = version
+        return _indice_local["indice"]
+
+
+def usa_busqueda_postgres():
+    return connection.vendor == "postgresql"
+
+
+def buscar_productos(queryset, texto):
+    # Devuelve el queryset filtrado y anotado con `relevancia` (mayor es mejor)
+    texto = (texto or "").strip()
+    if not texto:
+        return queryset.annotate(relevancia=Value(0.0, output_field=FloatField()))
+
+    if usa_busqueda_postgres():
+        # %% escapa el operador de similitud de pg_trgm dentro de RawSQL
+        coincide = RawSQL(
+            f"(producto.busqueda @@ websearch_to_tsquery('{CONFIGURACION_TS}', %s) OR producto.nombre %% %s)",
+            (texto, texto),
+            output_field=BooleanField(),
+        )
+        relevancia = RawSQL(
+            f"(ts_rank_cd(producto.busqueda, websearch_to_tsquery('{CONFIGURACION_TS}', %s)) + similarity(producto.nombre, %s))::float8",
+            (texto, texto),
+            output_field=FloatField(),
+        )
+        return queryset.annotate(coincide=coincide, relevancia=relevancia).filter(coincide=True)
+
+    puntajes = indice_en_memoria().buscar(texto)
+    mejores = sorted(puntajes.items(), key=lambda item: (-item[1], item[0]))[:MAX_RESULTADOS_MEMORIA]
+    relevancia = Case(
+        *(When(producto_id=producto_id, then=Value(round(puntaje, 6))) for producto_id, puntaje in mejores),
+        default=Value(0.0),
+        output_field=FloatField(),
+    ) if mejores else Value(0.0, output_field=FloatField())
+    return queryset.filter(producto_id__in=[producto_id for producto_id, _ in mejores]).annotate(relevancia=relevancia)
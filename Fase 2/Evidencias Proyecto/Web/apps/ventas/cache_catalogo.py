@@ -0,0 +1,24 @@
+"""Versión del catálogo incluida en las claves de cache de la tienda; catalogo_modificado() la cambia
+al escribir productos o categorías y tras cada pedido."""
+
+from django.conf import settings
+from django.core.cache import cache
+
+CLAVE_VERSION_CATALOGO = "ventas:version_catalogo"
+TIMEOUT_CATALOGO = settings.CATALOGO_CACHE_TIMEOUT
+
+
+def version_catalogo():
+    version = cache.get(CLAVE_VERSION_CATALOGO)
+    if version is None:
+        version = 1
+        cache.add(CLAVE_VERSION_CATALOGO, version, None)
+    return version
+
+
+def catalogo_modificado():
+    # Las entradas con la versión anterior dejan de leerse y expiran solas
+    try:
+        cache.incr(CLAVE_VERSION_CATALOGO)
+    except ValueError:
+        cache.set(CLAVE_VERSION_CATALOGO, 1, None)
@@ -0,0 +1,102 @@
+"""Paginación por cursor (keyset) del catálogo: WHERE (campo, producto_id) > (valor, id) en vez de
+OFFSET, sobre los índices idx_producto_catalogo* de Producto.Meta."""
+
+import base64
+import json
+from functools import cached_property
+
+from django.core.exceptions import ValidationError
+from django.db.models import FloatField, Q
+
+from .models import Producto
+
+ORDENES_CATALOGO = {
+    # Solo disponible con ?q=: `relevancia` es la anotación de busqueda.buscar_productos()
+    "relevancia": ("Relevancia", "-relevancia"),
+    "recientes": ("Más recientes", "-fecha_creation"),
+    "precio_asc": ("Menor precio", "precio"),
+    "precio_desc": ("Mayor precio", "-precio"),
+    "nombre": ("Nombre", "nombre"),
+}
+ORDEN_POR_DEFECTO = "recientes"
+ORDEN_BUSQUEDA = "relevancia"
+# Campos anotados por los que se puede ordenar (no existen en Producto._meta)
+CAMPOS_ANOTADOS = {"relevancia": FloatField()}
+TAMANO_PAGINA = 24
+
+
+def codificar_cursor(valores):
+    # isoformat() conserva los microsegundos (DjangoJSONEncoder los trunca y el cursor dejaría de ser exacto)
+    texto = json.dumps(valores, default=lambda valor: valor.isoformat(), separators=(",", ":"))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor, campo):
+    # Un cursor inválido o manipulado simplemente vuelve a la primera página
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valor, producto_id = json.loads(texto)
+        campo_modelo = CAMPOS_ANOTADOS.get(campo) or Producto._meta.get_field(campo)
+        return campo_modelo.to_python(valor), int(producto_id)
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def filtro_keyset(campo, descendente, valor, producto_id):
+    # producto_id desempata cada orden: el orden es total y el cursor identifica una fila exacta
+    if descendente:
+        return Q(**{f"{campo}__lt": valor}) | Q(**{campo: valor, "producto_id__lt": producto_id})
+    return Q(**{f"{campo}__gt": valor}) | Q(**{campo: valor, "producto_id__gt": producto_id})
+
+
+class PaginaCatalogo:
+    def __init__(self, queryset, items, orden, siguiente, anterior):
+        self.queryset = queryset
+        self.items = items
+        self.orden = orden
+        self.siguiente = siguiente
+        self.anterior = anterior
+
+    @property
+    def es_primera(self):
+        return self.anterior is None
+
+    @cached_property
+    def total(self):
+        # El COUNT solo se ejecuta si la plantilla lo pide, y se evita si todo cabe en una página
+        if self.es_primera and self.siguiente is None:
+            return len(self.items)
+        return self.queryset.count()
+
+
+def paginar_catalogo(queryset, orden=ORDEN_POR_DEFECTO, despues=None, antes=None, tamano=TAMANO_PAGINA):
+    if orden not in ORDENES_CATALOGO:
+        orden = ORDEN_POR_DEFECTO
+    criterio = ORDENES_CATALOGO[orden][1]
+    descendente = criterio.startswith("-")
+    campo = criterio.lstrip("-")
+    cursor = decodificar_cursor(despues or antes, campo) if (despues or antes) else None
+    hacia_atras = cursor is not None and not despues
+
+    # Hacia atrás se recorre el índice en sentido inverso y luego se invierte la página
+    invertir = descendente != hacia_atras
+    prefijo = "-" if invertir else ""
+    filas = queryset.order_by(f"{prefijo}{campo}", f"{prefijo}producto_id")
+    if cursor:
+        filas = filas.filter(filtro_keyset(campo, invertir, *cursor))
+    items = list(filas[:tamano + 1])
+    hay_mas = len(items) > tamano
+    items = items[:tamano]
+    if hacia_atras:
+        items.reverse()
+
+    def cursor_de(producto):
+        return codificar_cursor([getattr(producto, campo), producto.producto_id])
+
+    if hacia_atras:
+        siguiente = cursor_de(items[-1]) if items else None
+        anterior = cursor_de(items[0]) if items and hay_mas else None
+    else:
+        siguiente = cursor_de(items[-1]) if items and hay_mas else None
+        anterior = cursor_de(items[0]) if items and cursor else None
+    return PaginaCatalogo(queryset, items, orden, siguiente, anterior)
@@ -0,0 +1,59 @@
+"""Árbol de categorías en cache: descendientes[id] permite filtrar una categoría padre con un solo
+categoria_id IN (...). Se invalida con invalidar_arbol_categorias()."""
+
+from django.core.cache import cache
+
+from .models import Categoria
+
+CLAVE_ARBOL_CATEGORIAS = "ventas:arbol_categorias"
+# Respaldo para otros procesos cuya cache no recibe la invalidación (cache local por proceso)
+TIMEOUT_ARBOL_CATEGORIAS = 300
+
+
+def construir_arbol_categorias():
+    # Una sola consulta (id, padre, slug); los descendientes de cada categoría se arman en Python
+    filas = Categoria.objects.filter(activa=True).values_list("categoria_id", "categoria_padre_id", "slug")
+    activas = []
+    hijos = {}
+    por_slug = {}
+    for categoria_id, padre_id, slug in filas:
+        activas.append(categoria_id)
+        if padre_id is not None:
+            hijos.setdefault(padre_id, []).append(categoria_id)
+        if slug:
+            por_slug[slug] = categoria_id
+
+    descendientes = {}
+    for categoria_id in activas:
+        visitados = [categoria_id]
+        pendientes = list(hijos.get(categoria_id, []))
+        while pendientes:
+            actual = pendientes.pop()
+            if actual in visitados:
+                continue
+            visitados.append(actual)
+            pendientes.extend(hijos.get(actual, []))
+        descendientes[categoria_id] = visitados
+    return {"por_slug": por_slug, "descendientes": descendientes}
+
+
+def arbol_categorias():
+    arbol = cache.get(CLAVE_ARBOL_CATEGORIAS)
+    if arbol is None:
+        arbol = construir_arbol_categorias()
+        cache.set(CLAVE_ARBOL_CATEGORIAS, arbol, TIMEOUT_ARBOL_CATEGORIAS)
+    return arbol
+
+
+def categoria_por_slug(slug):
+    return arbol_categorias()["por_slug"].get(slug)
+
+
+def descendientes_categoria(categoria_id):
+    # Incluye la propia categoría; una categoría inactiva o inexistente no tiene descendientes
+    return arbol_categorias()["descendientes"].get(categoria_id, [])
+
+
+def invalidar_arbol_categorias():
+    # La llaman las vistas de categorías del dashboard al escribir
+    cache.delete(CLAVE_ARBOL_CATEGORIAS)
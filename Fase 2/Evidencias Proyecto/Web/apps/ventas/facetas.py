@@ -0,0 +1,103 @@
+"""Conteos de facetas del catálogo a partir de una sola consulta agrupada, en cache por búsqueda y
+versión del catálogo."""
+
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+from .busqueda import buscar_productos, normalizar
+from .cache_catalogo import TIMEOUT_CATALOGO, version_catalogo
+from .categorias import arbol_categorias, descendientes_categoria
+from .models import Producto
+
+# clave -> (etiqueta, mínimo inclusive, máximo exclusivo)
+RANGOS_PRECIO = {
+    "hasta-5000": ("Hasta $5.000", 0, 5000),
+    "5000-15000": ("$5.000 a $15.000", 5000, 15000),
+    "15000-30000": ("$15.000 a $30.000", 15000, 30000),
+    "30000-60000": ("$30.000 a $60.000", 30000, 60000),
+    "desde-60000": ("Más de $60.000", 60000, None),
+}
+
+
+def filtro_rango_precio(clave):
+    _, minimo, maximo = RANGOS_PRECIO[clave]
+    filtro = Q(precio__gte=minimo)
+    if maximo is not None:
+        filtro &= Q(precio__lt=maximo)
+    return filtro
+
+
+def anotacion_rango_precio():
+    return Case(
+        *(When(filtro_rango_precio(clave), then=Value(indice)) for indice, clave in enumerate(RANGOS_PRECIO)),
+        output_field=IntegerField(),
+    )
+
+
+def clave_facetas(texto):
+    texto = " ".join(normalizar(texto).split())
+    resumen = hashlib.sha1(texto.encode()).hexdigest()
+    return f"ventas:facetas:{version_catalogo()}:{resumen}"
+
+
+def grupos_facetas(texto):
+    # Una fila por (categoria, marca, rango de precio, en_stock) de los productos activos que cumplen la búsqueda
+    clave = clave_facetas(texto)
+    grupos = cache.get(clave)
+    if grupos is None:
+        productos = Producto.objects.filter(estado_producto="activo")
+        if texto:
+            productos = buscar_productos(productos, texto)
+        grupos = list(
+            productos.annotate(
+                rango_precio=anotacion_rango_precio(),
+                en_stock=Case(When(stock__gt=0, then=Value(1)), default=Value(0), output_field=IntegerField()),
+            )
+            .order_by()
+            .values_list("categoria_id", "marca_id", "rango_precio", "en_stock")
+            .annotate(total=Count("producto_id"))
+        )
+        cache.set(clave, grupos, TIMEOUT_CATALOGO)
+    return grupos
+
+
+def calcular_facetas(texto="", categoria_id=None, marca_id=None, rango_precio=None, solo_en_stock=False):
+    categorias_filtro = set(descendientes_categoria(categoria_id)) if categoria_id else None
+    indice_rango = list(RANGOS_PRECIO).index(rango_precio) if rango_precio in RANGOS_PRECIO else None
+
+    # Cada faceta ignora su propio filtro (elegir una marca no oculta las demás marcas), así las mismas
+    # filas agrupadas sirven para todas las facetas y cualquier combinación de filtros
+    def cumple(grupo, excepto):
+        categoria, marca, rango, en_stock, _ = grupo
+        return (
+            (excepto == "categoria" or categorias_filtro is None or categoria in categorias_filtro)
+            and (excepto == "marca" or marca_id is None or marca == marca_id)
+            and (excepto == "precio" or indice_rango is None or rango == indice_rango)
+            and (excepto == "stock" or not solo_en_stock or en_stock)
+        )
+
+    por_categoria, por_marca, por_rango = {}, {}, {}
+    en_stock_total = 0
+    for grupo in grupos_facetas(texto):
+        categoria, marca, rango, en_stock, total = grupo
+        if cumple(grupo, "categoria"):
+            por_categoria[categoria] = por_categoria.get(categoria, 0) + total
+        if cumple(grupo, "marca") and marca is not None:
+            por_marca[marca] = por_marca.get(marca, 0) + total
+        if cumple(grupo, "precio") and rango is not None:
+            por_rango[rango] = por_rango.get(rango, 0) + total
+        if cumple(grupo, "stock") and en_stock:
+            en_stock_total += total
+
+    return {
+        # Conteo por categoría incluyendo sus subcategorías, igual que el filtro del catálogo
+        "categorias": {
+            categoria: sum(por_categoria.get(descendiente, 0) for descendiente in descendientes)
+            for categoria, descendientes in arbol_categorias()["descendientes"].items()
+        },
+        "marcas": por_marca,
+        "rangos_precio": {clave: por_rango.get(indice, 0) for indice, clave in enumerate(RANGOS_PRECIO)},
+        "en_stock": en_stock_total,
+    }
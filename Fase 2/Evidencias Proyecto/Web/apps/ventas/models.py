@@ -94,7 +94,25 @@ class UsuarioAdmin(models.Model):
         return f"{self.nombre} ({self.email})"
 
 
-class Categoria(models.Model):
+class ContadoresEnBD:
+    """Modelos con contadores mantenidos por triggers (Base de datos/contadores_catalogo_postgresql.sql).
+
+    save() de una fila existente no escribe CAMPOS_CONTADORES, para no pisar con valores leídos antes
+    los cambios que hicieron los triggers mientras tanto.
+    """
+
+    CAMPOS_CONTADORES = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name not in self.CAMPOS_CONTADORES
+            ]
+        super().save(*args, **kwargs)
+
+
+class Categoria(ContadoresEnBD, models.Model):
     categoria_id = models.AutoField(primary_key=True)
     nombre = models.CharField(max_length=50)
     descripcion = models.TextField(blank=True, null=True)
@@ -102,6 +120,14 @@ class Categoria(models.Model):
     nivel = models.IntegerField(default=1)
     activa = models.BooleanField(default=True)
     slug = models.CharField(max_length=50, blank=True, null=True)
+    # Punto de reorden que heredan los productos nuevos de la categoría
+    punto_reorden = models.IntegerField(default=10)
+    # Contadores mantenidos por triggers sobre producto y categoria (solo lectura para Django)
+    total_productos = models.IntegerField(default=0)
+    productos_activos = models.IntegerField(default=0)
+    total_subcategorias = models.IntegerField(default=0)
+
+    CAMPOS_CONTADORES = ('total_productos', 'productos_activos', 'total_subcategorias')
 
     class Meta:
         db_table = 'categoria'
@@ -185,7 +211,7 @@ class MetodoPago(models.Model):
         return f"MetodoPago {self.metodo_pago_id} ({self.tipo_metodo})"
 
 
-class Marca(models.Model):
+class Marca(ContadoresEnBD, models.Model):
     marca_id = models.AutoField(primary_key=True)
     nombre = models.CharField(max_length=50)
     descripcion = models.TextField(blank=True, null=True)
@@ -193,6 +219,11 @@ class Marca(models.Model):
     sitio_web = models.CharField(max_length=50, blank=True, null=True)
     slug = models.CharField(max_length=50)
     activa = models.BooleanField(default=True)
+    # Contadores mantenidos por triggers sobre producto (solo lectura para Django)
+    total_productos = models.IntegerField(default=0)
+    productos_activos = models.IntegerField(default=0)
+
+    CAMPOS_CONTADORES = ('total_productos', 'productos_activos')
 
     class Meta:
         db_table = 'marca'
@@ -222,6 +253,8 @@ class Producto(models.Model):
     fecha_creation = models.DateTimeField(auto_now_add=True)
     estado_producto = models.CharField(max_length=50, default='activo')  # enum estado_producto
     marca = models.ForeignKey(Marca, on_delete=models.SET_NULL, blank=True, null=True)
+    # Stock bajo = activo y stock < punto_reorden (idx_producto_stock_bajo es parcial sobre esa condición)
+    punto_reorden = models.IntegerField(default=10)
 
     class Meta:
         db_table = 'producto'
@@ -229,11 +262,24 @@ class Producto(models.Model):
         constraints = [
             models.CheckConstraint(check=Q(precio__gte=0), name='producto_precio_check'),
             models.CheckConstraint(check=Q(stock__gte=0), name='producto_stock_check'),
+            models.CheckConstraint(check=Q(punto_reorden__gte=0), name='producto_punto_reorden_check'),
         ]
         indexes = [
             models.Index(fields=['categoria'], name='idx_producto_categoria'),
             models.Index(fields=['sku'], name='idx_producto_sku'),
             models.Index(fields=['marca'], name='idx_producto_marca'),
+            # Catálogo de la tienda (ventas/catalogo.py): filtro por estado/categoría/marca y un índice por orden
+            # para que la paginación por cursor recorra el índice sin ordenar en memoria
+            models.Index(fields=['estado_producto', 'categoria', 'marca'], name='idx_producto_catalogo'),
+            models.Index(fields=['estado_producto', 'fecha_creation', 'producto_id'], name='idx_producto_catalogo_fecha'),
+            models.Index(fields=['estado_producto', 'precio', 'producto_id'], name='idx_producto_catalogo_precio'),
+            models.Index(fields=['estado_producto', 'nombre', 'producto_id'], name='idx_producto_catalogo_nombre'),
+            # Dashboard: KPI y listado de stock bajo (dashboard/kpis.py)
+            models.Index(
+                fields=['categoria', 'stock'],
+                name='idx_producto_stock_bajo',
+                condition=Q(estado_producto='activo', stock__lt=models.F('punto_reorden')),
+            ),
         ]
 
     def __str__(self):
@@ -445,6 +491,10 @@ class PedidoItem(models.Model):
     class Meta:
         db_table = 'pedido_item'
         managed = False
+        indexes = [
+            # Ítems de los pedidos de un rango de fechas (resúmenes de apps.dashboard.analitica)
+            models.Index(fields=['pedido'], name='idx_pedido_item_pedido'),
+        ]
         constraints = [
             models.CheckConstraint(check=Q(cantidad__gt=0), name='pedido_item_cantidad_check'),
             models.CheckConstraint(check=Q(precio_unitario__gte=0), name='pedido_item_precio_unitario_check'),
@@ -1,3 +1,271 @@
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from .busqueda import _indice_local, buscar_productos
+from .cache_catalogo import catalogo_modificado, version_catalogo
+from .catalogo import paginar_catalogo
+from .categorias import arbol_categorias, categoria_por_slug, descendientes_categoria, invalidar_arbol_categorias
+from .facetas import calcular_facetas
+from .models import Categoria, Marca, Producto
+
+
+def crear_tablas_ventas():
+    # Los modelos de ventas son managed=False: las migraciones no crean sus tablas en la BD de pruebas
+    existentes = set(connection.introspection.table_names())
+    with connection.schema_editor() as editor:
+        for modelo in apps.get_app_config("ventas").get_models():
+            if modelo._meta.db_table not in existentes:
+                editor.create_model(modelo)
+
+
+class VentasTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        crear_tablas_ventas()
+        super().setUpClass()
+
+    def setUp(self):
+        # La cache sobrevive entre pruebas y los ids se reutilizan tras cada rollback
+        cache.clear()
+
+
+class PaginacionCatalogoTests(VentasTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre="Accesorios", slug="accesorios")
+        # Precios repetidos: producto_id desempata y ninguna fila se repite ni se pierde entre páginas
+        for i, precio in enumerate([3000, 1000, 2000, 1000, 3000, 1000, 2000]):
+            Producto.objects.create(categoria=cls.categoria, sku=f"ACC-{i}", nombre=f"Accesorio {i}", precio=precio, stock=1)
+
+    def recorrer(self, orden, tamano=2):
+        paginas, despues = [], None
+        while True:
+            pagina = paginar_catalogo(Producto.objects.all(), orden, despues=despues, tamano=tamano)
+            paginas.append(pagina)
+            despues = pagina.siguiente
+            if despues is None:
+                return paginas
+
+    def ids(self, pagina):
+        return [producto.producto_id for producto in pagina.items]
+
+    def test_recorre_cada_orden_sin_repetir_ni_saltar_filas(self):
+        for orden, criterio in (("precio_asc", "precio"), ("precio_desc", "-precio"), ("nombre", "nombre"), ("recientes", "-fecha_creation")):
+            with self.subTest(orden=orden):
+                desempate = "-producto_id" if criterio.startswith("-") else "producto_id"
+                esperado = list(Producto.objects.order_by(criterio, desempate).values_list("producto_id", flat=True))
+
+                paginas = self.recorrer(orden)
+
+                self.assertEqual([producto_id for pagina in paginas for producto_id in self.ids(pagina)], esperado)
+                self.assertEqual([len(pagina.items) for pagina in paginas], [2, 2, 2, 1])
+
+    def test_anterior_vuelve_a_la_pagina_previa(self):
+        paginas = self.recorrer("precio_asc")
+
+        for previa, actual in zip(paginas, paginas[1:]):
+            atras = paginar_catalogo(Producto.objects.all(), "precio_asc", antes=actual.anterior, tamano=2)
+            self.assertEqual(self.ids(atras), self.ids(previa))
+            self.assertEqual(atras.es_primera, previa.es_primera)
+        self.assertTrue(paginas[0].es_primera)
+
+    def test_cursor_invalido_vuelve_a_la_primera_pagina(self):
+        primera = paginar_catalogo(Producto.objects.all(), "precio_asc", tamano=2)
+
+        for cursor in ("basura", "W10", "WyJ4IiwxXQ"):
+            with self.subTest(cursor=cursor):
+                pagina = paginar_catalogo(Producto.objects.all(), "precio_asc", despues=cursor, tamano=2)
+                self.assertEqual(self.ids(pagina), self.ids(primera))
+                self.assertTrue(pagina.es_primera)
+
+    def test_total_no_cuenta_si_todo_cabe_en_una_pagina(self):
+        with self.assertNumQueries(1):
+            pagina = paginar_catalogo(Producto.objects.all(), "nombre", tamano=10)
+            self.assertEqual(pagina.total, 7)
+        with self.assertNumQueries(2):
+            self.assertEqual(paginar_catalogo(Producto.objects.all(), "nombre", tamano=3).total, 7)
+
+    def test_vista_catalogo_ignora_un_cursor_invalido(self):
+        esperado = list(Producto.objects.order_by("precio", "producto_id").values_list("producto_id", flat=True))
+
+        respuesta = self.client.get("/catalogo/", {"orden": "precio_asc", "despues": "basura"})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.ids(respuesta.context["pagina"]), esperado)
+        self.assertIsNone(respuesta.context["pagina"].siguiente)
+
+
+class BusquedaEnMemoriaTests(VentasTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Perros", slug="perros")
+        marca = Marca.objects.create(nombre="Canino Feliz", slug="canino-feliz")
+        cls.alimento = Producto.objects.create(categoria=categoria, sku="ALI-PERRO", nombre="Alimento perro adulto", precio=1000)
+        cls.juguete = Producto.objects.create(
+            categoria=categoria, sku="JUG-1", nombre="Juguete mordedor", descripcion="Ideal para perros pequeños", precio=1000
+        )
+        cls.arena = Producto.objects.create(categoria=categoria, sku="ARE-1", nombre="Arena sanitaria", marca=marca, precio=1000)
+
+    def setUp(self):
+        super().setUp()
+        # SQLite usa el índice en memoria del proceso: se descarta el que armaron pruebas anteriores
+        _indice_local["indice"] = None
+
+    def buscar(self, texto):
+        return [producto.producto_id for producto in buscar_productos(Producto.objects.all(), texto).order_by("-relevancia", "producto_id")]
+
+    def test_nombre_pesa_mas_que_descripcion(self):
+        self.assertEqual(self.buscar("perro"), [self.alimento.producto_id, self.juguete.producto_id])
+
+    def test_tolera_errores_de_tipeo_y_acentos(self):
+        self.assertEqual(self.buscar("alimneto"), [self.alimento.producto_id])
+        self.assertEqual(self.buscar("PEQUEÑOS"), [self.juguete.producto_id])
+
+    def test_todos_los_terminos_deben_coincidir(self):
+        self.assertEqual(self.buscar("alimento perro"), [self.alimento.producto_id])
+        self.assertEqual(self.buscar("juguete sanitaria"), [])
+
+    def test_busca_por_sku_y_marca(self):
+        self.assertEqual(self.buscar("ARE-1"), [self.arena.producto_id])
+        self.assertEqual(self.buscar("canino"), [self.arena.producto_id])
+
+    def test_texto_vacio_no_filtra(self):
+        productos = buscar_productos(Producto.objects.all(), "  ")
+
+        self.assertEqual(productos.count(), 3)
+        self.assertEqual({producto.relevancia for producto in productos}, {0.0})
+
+    def test_indice_se_reconstruye_al_modificar_el_catalogo(self):
+        self.buscar("perro")
+        Producto.objects.filter(pk=self.arena.pk).update(nombre="Cama perro")
+
+        self.assertNotIn(self.arena.producto_id, self.buscar("cama"))
+        catalogo_modificado()
+        self.assertEqual(self.buscar("cama"), [self.arena.producto_id])
+
+
+class FacetasTests(VentasTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.perros = Categoria.objects.create(nombre="Perros", slug="perros")
+        cls.cachorros = Categoria.objects.create(nombre="Cachorros", slug="cachorros", categoria_padre=cls.perros, nivel=2)
+        cls.gatos = Categoria.objects.create(nombre="Gatos", slug="gatos")
+        cls.marca_a = Marca.objects.create(nombre="Marca A", slug="marca-a")
+        cls.marca_b = Marca.objects.create(nombre="Marca B", slug="marca-b")
+        for sku, categoria, marca, precio, stock, estado in (
+            ("P1", cls.perros, cls.marca_a, 3000, 1, "activo"),
+            ("P2", cls.cachorros, cls.marca_a, 10000, 0, "activo"),
+            ("P3", cls.cachorros, cls.marca_b, 10000, 2, "activo"),
+            ("P4", cls.gatos, cls.marca_b, 70000, 1, "activo"),
+            ("P5", cls.gatos, None, 3000, 1, "inactivo"),
+        ):
+            Producto.objects.create(
+                categoria=categoria, marca=marca, sku=sku, nombre=f"Producto {sku}", precio=precio, stock=stock, estado_producto=estado
+            )
+
+    def test_sin_filtros_cuenta_productos_activos_con_subcategorias(self):
+        facetas = calcular_facetas()
+
+        self.assertEqual(
+            facetas["categorias"],
+            {self.perros.categoria_id: 3, self.cachorros.categoria_id: 2, self.gatos.categoria_id: 1},
+        )
+        self.assertEqual(facetas["marcas"], {self.marca_a.marca_id: 2, self.marca_b.marca_id: 2})
+        self.assertEqual(
+            facetas["rangos_precio"],
+            {"hasta-5000": 1, "5000-15000": 2, "15000-30000": 0, "30000-60000": 0, "desde-60000": 1},
+        )
+        self.assertEqual(facetas["en_stock"], 3)
+
+    def test_cada_faceta_ignora_su_propio_filtro(self):
+        por_marca = calcular_facetas(marca_id=self.marca_a.marca_id)
+        por_categoria = calcular_facetas(categoria_id=self.perros.categoria_id, solo_en_stock=True)
+
+        self.assertEqual(por_marca["marcas"], {self.marca_a.marca_id: 2, self.marca_b.marca_id: 2})
+        self.assertEqual(por_marca["categorias"][self.perros.categoria_id], 2)
+        self.assertEqual(por_marca["categorias"][self.gatos.categoria_id], 0)
+        self.assertEqual(por_marca["en_stock"], 1)
+        self.assertEqual(por_categoria["marcas"], {self.marca_a.marca_id: 1, self.marca_b.marca_id: 1})
+        self.assertEqual(por_categoria["en_stock"], 2)
+        self.assertEqual(por_categoria["categorias"][self.gatos.categoria_id], 1)
+        self.assertEqual(por_categoria["rangos_precio"]["5000-15000"], 1)
+
+    def test_grupos_quedan_en_cache_hasta_que_cambia_el_catalogo(self):
+        calcular_facetas()
+        Producto.objects.filter(sku="P2").update(stock=5)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(calcular_facetas(marca_id=self.marca_b.marca_id)["en_stock"], 2)
+        catalogo_modificado()
+        self.assertEqual(calcular_facetas()["en_stock"], 4)
+
+
+class ArbolCategoriasTests(VentasTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.perros = Categoria.objects.create(nombre="Perros", slug="perros")
+        cls.cachorros = Categoria.objects.create(nombre="Cachorros", slug="cachorros", categoria_padre=cls.perros, nivel=2)
+        cls.senior = Categoria.objects.create(nombre="Senior", slug="senior", categoria_padre=cls.perros, nivel=2, activa=False)
+        cls.gatos = Categoria.objects.create(nombre="Gatos", slug="gatos")
+        for sku, categoria in (("P1", cls.perros), ("C1", cls.cachorros), ("S1", cls.senior), ("G1", cls.gatos)):
+            Producto.objects.create(categoria=categoria, sku=sku, nombre=f"Producto {sku}", precio=1000, stock=1)
+
+    def test_descendientes_incluyen_la_categoria_y_solo_subcategorias_activas(self):
+        self.assertEqual(sorted(descendientes_categoria(self.perros.pk)), sorted([self.perros.pk, self.cachorros.pk]))
+        self.assertEqual(descendientes_categoria(self.cachorros.pk), [self.cachorros.pk])
+        self.assertEqual(descendientes_categoria(self.senior.pk), [])
+        self.assertEqual(categoria_por_slug("gatos"), self.gatos.pk)
+        self.assertIsNone(categoria_por_slug("senior"))
+
+    def test_arbol_queda_en_cache_hasta_invalidarlo(self):
+        arbol_categorias()
+        Categoria.objects.filter(pk=self.senior.pk).update(activa=True)
+
+        with self.assertNumQueries(0):
+            self.assertNotIn(self.senior.pk, descendientes_categoria(self.perros.pk))
+        invalidar_arbol_categorias()
+        self.assertIn(self.senior.pk, descendientes_categoria(self.perros.pk))
+
+    def test_filtrar_el_catalogo_por_categoria_padre_incluye_sus_subcategorias(self):
+        respuesta = self.client.get("/catalogo/", {"categoria": "perros"})
+
+        self.assertEqual(sorted(producto.sku for producto in respuesta.context["productos"]), ["C1", "P1"])
+
+
+class CacheCatalogoTests(VentasTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre="Perros", slug="perros")
+        cls.producto = Producto.objects.create(categoria=cls.categoria, sku="CAM-1", nombre="Cama acolchada", precio=19990, stock=3)
+
+    def test_version_cambia_con_cada_modificacion(self):
+        version = version_catalogo()
+
+        catalogo_modificado()
+
+        self.assertEqual(version_catalogo(), version + 1)
+
+    def test_catalogo_se_sirve_del_fragmento_hasta_que_cambia_la_version(self):
+        self.client.get("/catalogo/")
+        Producto.objects.filter(pk=self.producto.pk).update(nombre="Cama térmica")
+
+        self.assertContains(self.client.get("/catalogo/"), "Cama acolchada")
+        catalogo_modificado()
+        self.assertContains(self.client.get("/catalogo/"), "Cama térmica")
+
+    def test_editar_desde_el_dashboard_invalida_el_detalle(self):
+        url = f"/producto/{self.producto.pk}/"
+        self.assertContains(self.client.get(url), "Cama acolchada")
+
+        self.client.post(f"/dashboard/productos/{self.producto.pk}/editar/", {
+            "categoria": self.categoria.pk,
+            "sku": "CAM-1",
+            "nombre": "Cama térmica",
+            "precio": 21990,
+            "stock": 3,
+            "estado_producto": "activo",
+        })
+
+        self.assertContains(self.client.get(url), "Cama térmica")
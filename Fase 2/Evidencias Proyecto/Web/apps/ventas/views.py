@@ -1,5 +1,13 @@
+from django.core.cache import cache
 from django.shortcuts import render, get_object_or_404
+from django.utils.functional import SimpleLazyObject
+from urllib.parse import urlencode
 from .models import Producto, Categoria, Marca
+from .busqueda import buscar_productos
+from .cache_catalogo import TIMEOUT_CATALOGO, version_catalogo
+from .facetas import RANGOS_PRECIO, calcular_facetas, filtro_rango_precio
+from .catalogo import ORDENES_CATALOGO, ORDEN_BUSQUEDA, ORDEN_POR_DEFECTO, paginar_catalogo
+from .categorias import categoria_por_slug, descendientes_categoria
 
 def index(request):
     # Obtener productos recomendados (los primeros 8 productos activos)
@@ -10,56 +18,135 @@ def index(request):
     # Obtener todas las marcas activas para mostrar en el carrusel
     marcas = Marca.objects.filter(activa=True)
     
+    # Los querysets son perezosos: con los fragmentos en cache la plantilla no llega a ejecutarlos
     context = {
         'productos': productos_recomendados,
         'marcas': marcas,
+        'version_catalogo': version_catalogo(),
+        'cache_timeout': TIMEOUT_CATALOGO,
     }
     return render(request, 'ventas/index.html', context)
     
 def producto(request, producto_id):
-    # Vista para un producto específico
-    producto = get_object_or_404(Producto, producto_id=producto_id, estado_producto='activo')
+    # Vista para un producto específico; el producto se guarda en cache por versión del catálogo
+    version = version_catalogo()
+    clave = f"ventas:producto:{version}:{producto_id}"
+    producto = cache.get(clave)
+    if producto is None:
+        producto = get_object_or_404(
+            Producto.objects.select_related('categoria', 'marca'),
+            producto_id=producto_id,
+            estado_producto='activo',
+        )
+        cache.set(clave, producto, TIMEOUT_CATALOGO)
     
     # Productos relacionados de la misma categoría
     productos_relacionados = Producto.objects.filter(
-        categoria=producto.categoria,
+        categoria_id=producto.categoria_id,
         estado_producto='activo'
     ).exclude(producto_id=producto_id)[:4]
     
     context = {
         'producto': producto,
         'productos_relacionados': productos_relacionados,
+        'version_catalogo': version,
+        'cache_timeout': TIMEOUT_CATALOGO,
     }
     return render(request, 'ventas/producto.html', context)
 
 def catalogo(request):
-    # Obtener todos los productos activos
+    # Productos activos; el catálogo solo muestra la marca (no la categoría) de cada producto
     productos = Producto.objects.filter(
         estado_producto='activo'
-    ).select_related('categoria', 'marca')
+    ).select_related('marca')
     
     # Filtros opcionales
     categoria_slug = request.GET.get('categoria')
     marca_id = request.GET.get('marca')
+    rango_precio = request.GET.get('precio')
+    solo_en_stock = request.GET.get('stock') == '1'
+    texto = request.GET.get('q', '').strip()
+    # Con búsqueda se ordena por relevancia salvo que se pida otro orden; sin búsqueda no hay relevancia
+    orden = request.GET.get('orden') or (ORDEN_BUSQUEDA if texto else ORDEN_POR_DEFECTO)
+    if orden not in ORDENES_CATALOGO or (orden == ORDEN_BUSQUEDA and not texto):
+        orden = ORDEN_POR_DEFECTO
     
-    # Filtrar por slug de categoría
-    if categoria_slug:
-        categoria_obj = Categoria.objects.filter(slug=categoria_slug, activa=True).first()
-        if categoria_obj:
-            productos = productos.filter(categoria=categoria_obj)
+    # Filtrar por slug de categoría, incluyendo sus subcategorías (árbol precalculado en cache)
+    categoria_id = categoria_por_slug(categoria_slug) if categoria_slug else None
+    if categoria_id:
+        productos = productos.filter(categoria_id__in=descendientes_categoria(categoria_id))
     
+    marca_id = marca_id if marca_id and marca_id.isdigit() else None
     if marca_id:
         productos = productos.filter(marca_id=marca_id)
     
-    # Obtener todas las categorías y marcas para los filtros
-    categorias = Categoria.objects.filter(activa=True)
-    marcas = Marca.objects.filter(activa=True)
+    rango_precio = rango_precio if rango_precio in RANGOS_PRECIO else None
+    if rango_precio:
+        productos = productos.filter(filtro_rango_precio(rango_precio))
+    
+    if solo_en_stock:
+        productos = productos.filter(stock__gt=0)
+    
+    if texto:
+        productos = buscar_productos(productos, texto)
+    
+    # Página por cursor: ?despues=<cursor> avanza y ?antes=<cursor> retrocede.
+    # Es perezosa para que un fragmento en cache evite la consulta
+    despues = request.GET.get('despues')
+    antes = request.GET.get('antes')
+    pagina = SimpleLazyObject(lambda: paginar_catalogo(productos, orden=orden, despues=despues, antes=antes))
+    
+    # Parámetros que deben conservar los enlaces de paginación
+    filtros_url = urlencode({
+        clave: valor for clave, valor in (
+            ('q', texto), ('categoria', categoria_slug), ('marca', marca_id), ('precio', rango_precio),
+            ('stock', '1' if solo_en_stock else None), ('orden', orden),
+        ) if valor
+    })
+    
+    def opciones_filtros():
+        # Categorías y marcas para los filtros, con sus conteos (una consulta agrupada en cache).
+        # Van en conteo_faceta: total_productos es el contador de la tabla y no debe pisarse
+        facetas = calcular_facetas(
+            texto,
+            categoria_id=categoria_id,
+            marca_id=int(marca_id) if marca_id else None,
+            rango_precio=rango_precio,
+            solo_en_stock=solo_en_stock,
+        )
+        categorias = list(Categoria.objects.filter(activa=True))
+        for categoria in categorias:
+            categoria.conteo_faceta = facetas['categorias'].get(categoria.categoria_id, 0)
+        marcas = list(Marca.objects.filter(activa=True))
+        for marca in marcas:
+            marca.conteo_faceta = facetas['marcas'].get(marca.marca_id, 0)
+        return {
+            'categorias': categorias,
+            'marcas': marcas,
+            'rangos_precio': [
+                (clave, etiqueta, facetas['rangos_precio'][clave]) for clave, (etiqueta, _, _) in RANGOS_PRECIO.items()
+            ],
+            'total_en_stock': facetas['en_stock'],
+        }
     
     context = {
-        'productos': productos,
-        'categorias': categorias,
-        'marcas': marcas,
+        'productos': SimpleLazyObject(lambda: pagina.items),
+        'pagina': pagina,
+        'ordenes': [
+            (clave, etiqueta) for clave, (etiqueta, _) in ORDENES_CATALOGO.items()
+            if texto or clave != ORDEN_BUSQUEDA
+        ],
+        'busqueda': texto,
+        'orden_seleccionada': request.GET.get('orden'),
+        'filtros_url': filtros_url,
+        'filtros': SimpleLazyObject(opciones_filtros),
         'categoria_seleccionada': categoria_slug,
         'marca_seleccionada': marca_id,
+        'rango_precio_seleccionado': rango_precio,
+        'solo_en_stock': solo_en_stock,
+        # Claves de los fragmentos en cache: el listado depende además del cursor
+        'version_catalogo': version_catalogo(),
+        'cache_timeout': TIMEOUT_CATALOGO,
+        'clave_listado': f"{filtros_url}|{despues or ''}|{antes or ''}",
     }
     return render(request, 'ventas/catalogo.html', context)
@@ -0,0 +1,327 @@
+"""Benchmark de carga y latencia de la tienda (Django).
+
+Crea un SQLite temporal con las tablas de apps.ventas (que en producción son
+managed=False y vienen de los scripts de "Base de datos/"), siembra un catálogo
+sintético y recorre las vistas de la tienda, el carrito y el dashboard con N
+clientes concurrentes (django.test.Client, un hilo por cliente). El resultado
+usa el mismo formato JSON que API/benchmarks/bench_api.py:
+
+    python benchmarks/bench_web.py --productos 5000 --peticiones 300 --concurrencia 8 --salida bench_web.json
+
+Con --db-configurada se usa la base de pets/settings.py tal cual, sin crear
+tablas ni sembrar datos (solo lectura sobre el catálogo existente).
+
+El escenario "checkout" (solo con la base sintética) hace pedidos concurrentes
+sobre unos pocos productos con poco stock y verifica que no haya sobreventa:
+unidades vendidas + stock final == stock inicial y ningún stock negativo.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+RAIZ_WEB = Path(__file__).resolve().parent.parent
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-configurada", action="store_true", help="Usa la base de settings.py sin sembrar")
+    parser.add_argument("--productos", type=int, default=2000, help="Tamaño del catálogo sintético")
+    parser.add_argument("--categorias", type=int, default=10, help="Categorías principales (cada una con 3 subcategorías)")
+    parser.add_argument("--marcas", type=int, default=15)
+    parser.add_argument("--peticiones", type=int, default=200, help="Peticiones por escenario")
+    parser.add_argument("--concurrencia", type=int, default=8, help="Clientes concurrentes")
+    parser.add_argument("--escenarios", help="Lista separada por comas (por defecto todos)")
+    parser.add_argument("--productos-checkout", type=int, default=3, help="Productos muy demandados del escenario checkout")
+    parser.add_argument("--stock-checkout", type=int, default=100, help="Stock inicial de cada producto del escenario checkout")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto stdout)")
+    return parser.parse_args(argv)
+
+def configurar_django(args) -> str | None:
+    sys.path.insert(0, str(RAIZ_WEB))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pets.settings")
+    import django
+    from django.conf import settings
+
+    ruta_sqlite = None
+    if not args.db_configurada:
+        ruta_sqlite = tempfile.NamedTemporaryFile(suffix=".sqlite3", delete=False).name
+        settings.DATABASES = {
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": ruta_sqlite,
+                # BEGIN IMMEDIATE serializa las transacciones de escritura, el equivalente en SQLite
+                # del SELECT ... FOR UPDATE que usa el checkout en PostgreSQL
+                "OPTIONS": {"timeout": 30, "transaction_mode": "IMMEDIATE"},
+            }
+        }
+    settings.ALLOWED_HOSTS = ["testserver"]
+    django.setup()
+    return ruta_sqlite
+
+def crear_tablas():
+    from django.apps import apps
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command("migrate", run_syncdb=True, verbosity=0)
+    existentes = set(connection.introspection.table_names())
+    with connection.schema_editor() as editor:
+        for modelo in apps.get_app_config("ventas").get_models():
+            if modelo._meta.db_table not in existentes:
+                editor.create_model(modelo)
+
+def sembrar_catalogo(args):
+    from apps.ventas.models import Categoria, Marca, Producto
+
+    azar = random.Random(args.semilla)
+    principales = Categoria.objects.bulk_create(
+        Categoria(nombre=f"Categoría {i}", nivel=1, activa=True, slug=f"categoria-{i}")
+        for i in range(args.categorias)
+    )
+    subcategorias = Categoria.objects.bulk_create(
+        Categoria(nombre=f"Subcategoría {i}-{j}", nivel=2, categoria_padre=padre, activa=True, slug=f"categoria-{i}-{j}")
+        for i, padre in enumerate(principales) for j in range(3)
+    )
+    marcas = Marca.objects.bulk_create(
+        Marca(nombre=f"Marca {i}", slug=f"marca-{i}", activa=True) for i in range(args.marcas)
+    )
+    categorias = principales + subcategorias
+    estados = ["activo"] * 8 + ["inactivo", "eliminado"]
+    Producto.objects.bulk_create(
+        (
+            Producto(
+                categoria=azar.choice(categorias),
+                marca=azar.choice(marcas),
+                sku=f"BENCH-{i:07d}",
+                nombre=f"Producto sintético {i}",
+                descripcion="Descripción de prueba " * azar.randint(1, 10),
+                precio=azar.randint(500, 150000),
+                stock=azar.randint(0, 500),
+                imagen_url=f"https://cdn.example.com/productos/{i}.jpg",
+                estado_producto=azar.choice(estados),
+            )
+            for i in range(args.productos)
+        ),
+        batch_size=1000,
+    )
+
+DATOS_CHECKOUT = {
+    "nombres": "Cliente",
+    "apellido_paterno": "Benchmark",
+    "email": "bench@example.com",
+    "telefono": "912345678",
+    "calle": "Av. Siempre Viva 742",
+    "ciudad": "Santiago",
+    "region": "Metropolitana",
+    "codigo_postal": "8320",
+}
+
+def construir_escenarios(args, azar: random.Random):
+    from apps.ventas.models import Categoria, Marca, Producto
+
+    ids_activos = list(Producto.objects.filter(estado_producto="activo").values_list("producto_id", flat=True))
+    slugs = list(Categoria.objects.filter(activa=True).exclude(slug=None).values_list("slug", flat=True))
+    marcas = list(Marca.objects.filter(activa=True).values_list("marca_id", flat=True))
+    producto = lambda: azar.choice(ids_activos)
+    productos_checkout = ids_productos_checkout(args)
+
+    def preparar_checkout(producto_id, cantidad):
+        # El carrito queda solo con `cantidad` unidades de uno de los productos muy demandados
+        operaciones = [{"accion": "eliminar", "producto_id": otro} for otro in productos_checkout]
+        operaciones.append({"accion": "agregar", "producto_id": producto_id, "cantidad": cantidad})
+        return lambda cliente: cliente.post("/carrito/batch/", json.dumps({"operaciones": operaciones}), content_type="application/json")
+
+    return {
+        "index": lambda: ("GET", "/", None),
+        "catalogo": lambda: ("GET", "/catalogo/", None),
+        "catalogo_categoria": lambda: ("GET", f"/catalogo/?categoria={azar.choice(slugs)}", None),
+        "catalogo_marca": lambda: ("GET", f"/catalogo/?marca={azar.choice(marcas)}", None),
+        "catalogo_busqueda": lambda: ("GET", f"/catalogo/?q=producto+{azar.randint(1, args.productos)}", None),
+        "producto": lambda: ("GET", f"/producto/{producto()}/", None),
+        "carrito_agregar": lambda: ("POST", "/carrito/add/", {"action": "post", "producto_id": producto(), "cantidad": 1}),
+        "carrito_ver": lambda: ("GET", "/carrito/", None),
+        "dashboard": lambda: ("GET", "/dashboard/", None),
+        "dashboard_productos": lambda: ("GET", f"/dashboard/productos/?page={azar.randint(1, 20)}", None),
+        "checkout": lambda: (
+            "POST", "/carrito/checkout/", DATOS_CHECKOUT,
+            preparar_checkout(azar.choice(productos_checkout), azar.randint(1, 2)),
+        ),
+    }
+
+def ids_productos_checkout(args):
+    from apps.ventas.models import Producto
+
+    activos = Producto.objects.filter(estado_producto="activo").order_by("producto_id")
+    return list(activos.values_list("producto_id", flat=True)[:args.productos_checkout])
+
+def preparar_stock_checkout(args):
+    from apps.ventas.models import Producto
+
+    ids = ids_productos_checkout(args)
+    Producto.objects.filter(producto_id__in=ids).update(stock=args.stock_checkout)
+    return ids
+
+def verificar_checkout(args, ids):
+    from django.db.models import Sum
+    from apps.ventas.models import MovimientoStock, PedidoItem, Producto
+
+    stock_final = dict(Producto.objects.filter(producto_id__in=ids).values_list("producto_id", "stock"))
+    vendidos = dict(
+        PedidoItem.objects.filter(producto_id__in=ids).values("producto_id").annotate(total=Sum("cantidad")).values_list("producto_id", "total")
+    )
+    movimientos = dict(
+        MovimientoStock.objects.filter(producto_id__in=ids, tipo_operacion="venta").values("producto_id")
+        .annotate(total=Sum("cantidad")).values_list("producto_id", "total")
+    )
+    productos = {
+        str(producto_id): {
+            "stock_inicial": args.stock_checkout,
+            "vendidos": vendidos.get(producto_id, 0),
+            "movimientos": movimientos.get(producto_id, 0),
+            "stock_final": stock_final[producto_id],
+        }
+        for producto_id in ids
+    }
+    sobreventa = any(
+        p["stock_final"] < 0 or p["vendidos"] + p["stock_final"] != p["stock_inicial"] or p["movimientos"] != -p["vendidos"]
+        for p in productos.values()
+    )
+    return {"productos": productos, "sobreventa": sobreventa}
+
+# Límite de peticiones para escenarios cuyo costo crece con el catálogo
+MAX_PETICIONES_ESCENARIO = {}
+
+def percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    inferior = int(k)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (k - inferior)
+
+def ejecutar_escenario(generador, peticiones: int, concurrencia: int, clientes):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    latencias: list[float] = []
+    consultas: list[int] = []
+    errores: dict[str, int] = {}
+    bloqueo = threading.Lock()
+    pendientes = iter(range(peticiones))
+
+    def trabajador(cliente):
+        # Cada hilo tiene su propia conexión; CaptureQueriesContext solo ve las de este hilo
+        try:
+            while True:
+                with bloqueo:
+                    if next(pendientes, None) is None:
+                        return
+                    metodo, ruta, datos, *preparar = generador()
+                if preparar:
+                    # Peticiones previas (p. ej. armar el carrito) que no se miden
+                    preparar[0](cliente)
+                with CaptureQueriesContext(connection) as capturadas:
+                    inicio = time.perf_counter()
+                    respuesta = cliente.post(ruta, datos) if metodo == "POST" else cliente.get(ruta)
+                    duracion = (time.perf_counter() - inicio) * 1000
+                with bloqueo:
+                    latencias.append(duracion)
+                    consultas.append(len(capturadas))
+                    if respuesta.status_code >= 400:
+                        errores[str(respuesta.status_code)] = errores.get(str(respuesta.status_code), 0) + 1
+        finally:
+            connection.close()
+
+    hilos = [threading.Thread(target=trabajador, args=(cliente,)) for cliente in clientes[:concurrencia]]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+    return {
+        "peticiones": len(latencias),
+        "concurrencia": concurrencia,
+        "duracion_s": round(duracion, 4),
+        "throughput_rps": round(len(latencias) / duracion, 2) if duracion else 0.0,
+        "latencia_ms": {
+            "p50": round(percentil(latencias, 50), 3),
+            "p95": round(percentil(latencias, 95), 3),
+            "p99": round(percentil(latencias, 99), 3),
+            "max": round(max(latencias, default=0.0), 3),
+            "media": round(statistics.fmean(latencias), 3) if latencias else 0.0,
+        },
+        "consultas_por_peticion": round(statistics.fmean(consultas), 3) if consultas else None,
+        "errores": errores,
+    }
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    ruta_sqlite = configurar_django(args)
+    from django.db import connection
+    from django.test import Client
+
+    try:
+        if ruta_sqlite:
+            crear_tablas()
+            sembrar_catalogo(args)
+            connection.close()
+        azar = random.Random(args.semilla)
+        escenarios = construir_escenarios(args, azar)
+        if not ruta_sqlite:
+            # El checkout escribe pedidos y descuenta stock: solo sobre la base sintética
+            escenarios.pop("checkout")
+        if args.escenarios:
+            escenarios = {nombre: escenarios[nombre] for nombre in args.escenarios.split(",")}
+        # Los clientes se mantienen entre escenarios para conservar la sesión (y el carrito);
+        # los errores 500 se cuentan en vez de propagarse
+        clientes = [Client(raise_request_exception=False) for _ in range(args.concurrencia)]
+        resultados = {}
+        for nombre, generador in escenarios.items():
+            peticiones = min(args.peticiones, MAX_PETICIONES_ESCENARIO.get(nombre, args.peticiones))
+            if nombre == "checkout":
+                # Clientes nuevos para que los carritos de los escenarios anteriores no afecten los pedidos
+                ids_checkout = preparar_stock_checkout(args)
+                resultados[nombre] = ejecutar_escenario(
+                    generador, peticiones, args.concurrencia, [Client(raise_request_exception=False) for _ in range(args.concurrencia)]
+                )
+                resultados[nombre]["verificacion"] = verificar_checkout(args, ids_checkout)
+            else:
+                resultados[nombre] = ejecutar_escenario(generador, peticiones, args.concurrencia, clientes)
+            print(f"{nombre}: {resultados[nombre]['throughput_rps']} rps, p95 {resultados[nombre]['latencia_ms']['p95']} ms", file=sys.stderr)
+    finally:
+        connection.close()
+        if ruta_sqlite:
+            os.unlink(ruta_sqlite)
+
+    resultado = {
+        "meta": {
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "destino": "sqlite" if ruta_sqlite else connection.vendor,
+            "productos": args.productos if ruta_sqlite else None,
+            "peticiones": args.peticiones,
+            "concurrencia": args.concurrencia,
+            "semilla": args.semilla,
+        },
+        "escenarios": resultados,
+    }
+    salida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salida:
+        Path(args.salida).write_text(salida + "\n", encoding="utf-8")
+    else:
+        print(salida)
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -89,6 +90,41 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Con CACHE_REDIS_URL la cache (y la versión del catálogo) se comparte entre procesos
+# (requiere el extra cache: poetry install --extras cache);
+# sin ella cada proceso usa su propia memoria y las invalidaciones del dashboard solo
+# alcanzan al proceso que atendió la escritura hasta que vence CATALOGO_CACHE_TIMEOUT.
+
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+        'KEY_PREFIX': 'cordillerapets',
+    } if CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cordillerapets',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+# Segundos que viven los fragmentos y datos del catálogo en cache (ventas/cache_catalogo.py)
+CATALOGO_CACHE_TIMEOUT = int(os.getenv("CATALOGO_CACHE_TIMEOUT", "300"))
+
+
+# Carrito de compras (carrito/almacenamiento.py)
+# Por defecto AlmacenamientoSesion: el carrito es JSON en la sesión y el badge de la cabecera no consulta
+# ninguna tabla. AlmacenamientoBaseDatos (tablas carrito/carrito_linea, requiere manage.py migrate carrito)
+# y AlmacenamientoCache (la cache de arriba) son opcionales y se activan con esta variable.
+
+CARRITO_ALMACENAMIENTO = os.getenv(
+    "CARRITO_ALMACENAMIENTO", "apps.carrito.almacenamiento.AlmacenamientoSesion"
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 